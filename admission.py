@@ -0,0 +1,141 @@
+"""
+Admission control for LLM calls
+A global concurrency limit with a bounded wait queue plus a per-user in-flight limit.
+Excess requests are shed immediately with 429 and Retry-After instead of piling up
+until they time out or trip the provider's own rate limits.
+"""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from fastapi import HTTPException, status
+
+from config import settings
+from metrics import metrics
+
+
+class AdmissionController:
+    """Gatekeeper in front of the agent's LLM work (one per event loop/process)"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float, max_per_user: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_per_user = max_per_user
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._active = 0
+        self._per_user: Dict[int, int] = {}
+        # EWMA of how long an admitted request holds its slot, for Retry-After hints
+        self._avg_service_seconds = 5.0
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely to be free"""
+        backlog = (self._waiting + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self._avg_service_seconds))
+
+    def _reject(self, reason: str, detail: str):
+        metrics.incr(f"admission.rejected.{reason}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(self._retry_after())}
+        )
+
+    def _update_gauges(self):
+        metrics.set_gauge("admission.queue_depth", self._waiting)
+        metrics.set_gauge("admission.in_flight", self._active)
+
+    def _check_user(self, user_id: int):
+        if self._per_user.get(user_id, 0) >= self.max_per_user:
+            self._reject("per_user", "You already have a message being answered. Please wait for it to finish.")
+
+    def _check_queue(self):
+        if self._active + self._waiting >= self.max_concurrency + self.max_queue:
+            self._reject("queue_full", "SwasthAI is handling many requests right now. Please try again shortly.")
+
+    def check(self, user_id: int):
+        """
+        Shed a request early without reserving anything
+        
+        Raises 429 when the user is at their in-flight limit or the queue is full.
+        """
+        self._check_user(user_id)
+        self._check_queue()
+
+    @asynccontextmanager
+    async def user_slot(self, user_id: int):
+        """
+        Count one of the user's requests as in flight for the duration of the block
+        
+        Raises 429 at the per-user limit. Coalesced requests each hold their own
+        user slot, while only the one doing the LLM work holds an llm_slot().
+        """
+        self._check_user(user_id)
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        try:
+            yield
+        finally:
+            remaining = self._per_user.get(user_id, 1) - 1
+            if remaining:
+                self._per_user[user_id] = remaining
+            else:
+                self._per_user.pop(user_id, None)
+
+    @asynccontextmanager
+    async def llm_slot(self):
+        """
+        Hold one LLM slot for the duration of the block
+        
+        Waits in the bounded queue for at most queue_timeout seconds, then raises 429.
+        """
+        self._check_queue()
+        self._waiting += 1
+        self._update_gauges()
+        wait_started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject("timeout", "SwasthAI is handling many requests right now. Please try again shortly.")
+        finally:
+            self._waiting -= 1
+            metrics.observe("admission.wait_seconds", time.perf_counter() - wait_started)
+        
+        self._active += 1
+        self._update_gauges()
+        metrics.incr("admission.admitted")
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+            elapsed = time.perf_counter() - started
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * elapsed
+            self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self, user_id: int):
+        """A user slot and an LLM slot together (a request that is not coalesced)"""
+        async with self.user_slot(user_id):
+            async with self.llm_slot():
+                yield
+
+
+# Global admission controller instance
+_admission = None
+
+
+def get_admission() -> AdmissionController:
+    """Get or create the global admission controller"""
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_queue=settings.LLM_MAX_QUEUE,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+            max_per_user=settings.LLM_MAX_IN_FLIGHT_PER_USER,
+        )
+    return _admission
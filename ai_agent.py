@@ -1,24 +1,249 @@
 """
 Enhanced SwasthAI Medical Assistant with Advanced Tool Calling
-Powered by LangChain, LangGraph, and Gemini with function calling
+Powered by LangChain, LangGraph, and Gemini/OpenAI (with failover) with function calling
 """
-from typing import List, Dict, TypedDict, Annotated, Sequence, Any
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import List, Dict, TypedDict, Annotated, Sequence, Any, Iterator, AsyncIterator, Optional
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, AIMessageChunk, SystemMessage, ToolMessage
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langchain_core.tools import tool
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain_community.tools import DuckDuckGoSearchRun
+from langchain_core.runnables import RunnableLambda
 from config import settings
+from tool_cache import cached_tool_result
+from answer_cache import get_answer_cache
+from medical_corpus import search_local_wikipedia
+from drug_labels import lookup_local_drug_label
+from http_client import get_http_client, get_async_http_client
+from triage import match_emergency_keyword
+from metrics import metrics
+from llm_router import create_router
+from context_builder import build_context, estimate_tokens, prompt_tokens, MESSAGE_OVERHEAD_TOKENS
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import asyncio
+import httpx
 import operator
-import requests
 import json
+import threading
+import time
 
 
 # ==================== MEDICAL TOOLS ====================
 
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+OPENFDA_LABEL_URL = "https://api.fda.gov/drug/label.json"
+
+_ddgs_local = threading.local()
+
+
+def _ddgs(timeout: int):
+    """
+    Per-thread DDGS instance for a timeout in whole seconds
+    
+    DDGS fixes its timeout when created, so there is one per timeout (at most a
+    few) and each keeps its HTTP client and connections across calls.
+    """
+    from duckduckgo_search import DDGS
+    
+    instances = getattr(_ddgs_local, "instances", None)
+    if instances is None:
+        instances = _ddgs_local.instances = {}
+    ddgs = instances.get(timeout)
+    if ddgs is None:
+        ddgs = instances[timeout] = DDGS(timeout=timeout)
+    return ddgs
+
+
+def _request_timeout(deadline: float) -> float:
+    """Seconds left before a tool's deadline, used as the timeout of its next HTTP request"""
+    return max(0.1, deadline - time.monotonic())
+
+
+def _duckduckgo_text(query: str, deadline: float) -> str:
+    """
+    Run a DuckDuckGo text search and format the top results (raises LookupError if none)
+    
+    Raises TimeoutError without searching when less than a second is left before deadline.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining < 1:
+        raise TimeoutError(f"No time left to search for '{query}'")
+    # A single backend: "auto" falls through api/html/lite on errors, a few requests
+    # each, which could keep a worker busy long past the tool deadline
+    results = _ddgs(int(remaining)).text(query, backend="html", max_results=3)
+    if not results:
+        raise LookupError(f"No search results for '{query}'")
+    
+    formatted_results = []
+    for i, result in enumerate(results[:3], 1):
+        formatted_results.append(f"{i}. {result.get('title', 'N/A')}\n   {result.get('body', 'N/A')}")
+    return f"Medical Information Search Results:\n\n" + "\n\n".join(formatted_results)
+
+
+@cached_tool_result("search_medical_info", ttl=6 * 3600, stale_ttl=24 * 3600)
+def _search_web(query: str) -> str:
+    """Cached DuckDuckGo search"""
+    return _duckduckgo_text(query, time.monotonic() + _tool_timeout("search_medical_info"))
+
+
+def _wikipedia_search_params(query: str) -> Dict[str, Any]:
+    return {"action": "query", "list": "search", "srsearch": query, "srlimit": 2, "format": "json", "formatversion": 2}
+
+
+def _wikipedia_extract_params(titles: List[str]) -> Dict[str, Any]:
+    return {
+        "action": "query", "prop": "extracts", "exintro": 1, "explaintext": 1, "exlimit": len(titles),
+        "redirects": 1, "titles": "|".join(titles), "format": "json", "formatversion": 2,
+    }
+
+
+def _wikipedia_titles(search_data: Dict[str, Any], query: str) -> List[str]:
+    titles = [hit["title"] for hit in search_data.get("query", {}).get("search", [])]
+    if not titles:
+        raise LookupError(f"No Wikipedia page for '{query}'")
+    return titles
+
+
+def _format_wikipedia_extracts(titles: List[str], extract_data: Dict[str, Any]) -> str:
+    """Format page intros like the LangChain Wikipedia wrapper did (3000 chars max)"""
+    extracts = {page["title"]: page.get("extract", "") for page in extract_data.get("query", {}).get("pages", [])}
+    text = "\n\n".join(f"Page: {title}\nSummary: {extracts.get(title, '')}" for title in titles)
+    return f"Wikipedia Medical Info:\n{text[:3000]}"
+
+
+@cached_tool_result("search_wikipedia_medical", ttl=7 * 24 * 3600, stale_ttl=30 * 24 * 3600)
+def _fetch_wikipedia(query: str) -> str:
+    """Fetch Wikipedia summaries over the network (raises LookupError if no page matches)"""
+    client = get_http_client()
+    deadline = time.monotonic() + _tool_timeout("search_wikipedia_medical")
+    search = client.get(WIKIPEDIA_API_URL, params=_wikipedia_search_params(query), timeout=_request_timeout(deadline))
+    search.raise_for_status()
+    titles = _wikipedia_titles(search.json(), query)
+    
+    extracts = client.get(WIKIPEDIA_API_URL, params=_wikipedia_extract_params(titles), timeout=_request_timeout(deadline))
+    extracts.raise_for_status()
+    return _format_wikipedia_extracts(titles, extracts.json())
+
+
+@cached_tool_result("search_wikipedia_medical", ttl=7 * 24 * 3600, stale_ttl=30 * 24 * 3600)
+async def _afetch_wikipedia(query: str) -> str:
+    """Async version of _fetch_wikipedia"""
+    client = get_async_http_client()
+    deadline = time.monotonic() + _tool_timeout("search_wikipedia_medical")
+    search = await client.get(WIKIPEDIA_API_URL, params=_wikipedia_search_params(query), timeout=_request_timeout(deadline))
+    search.raise_for_status()
+    titles = _wikipedia_titles(search.json(), query)
+    
+    extracts = await client.get(WIKIPEDIA_API_URL, params=_wikipedia_extract_params(titles), timeout=_request_timeout(deadline))
+    extracts.raise_for_status()
+    return _format_wikipedia_extracts(titles, extracts.json())
+
+
+def _local_wikipedia(query: str) -> Optional[str]:
+    """Offline index result, or None (raises LookupError if the network fallback is disabled)"""
+    result = search_local_wikipedia(query, top_k=2, max_chars=3000)
+    if result:
+        return f"Wikipedia Medical Info:\n{result}"
+    if not settings.WIKIPEDIA_NETWORK_FALLBACK:
+        raise LookupError(f"No offline Wikipedia article for '{query}'")
+    return None
+
+
+def _lookup_wikipedia(query: str) -> str:
+    """Answer from the offline index, using the network API only as a fallback"""
+    return _local_wikipedia(query) or _fetch_wikipedia(query)
+
+
+async def _alookup_wikipedia(query: str) -> str:
+    """Async version of _lookup_wikipedia"""
+    return _local_wikipedia(query) or await _afetch_wikipedia(query)
+
+
+def _openfda_params(drug_name: str) -> Dict[str, Any]:
+    return {"search": f"openfda.brand_name:{drug_name}", "limit": 1}
+
+
+def _parse_openfda_label(drug_name: str, response: httpx.Response) -> Optional[str]:
+    """Formatted label from an OpenFDA response, or None if it has no result"""
+    if response.status_code == 200:
+        data = response.json()
+        if data.get('results'):
+            result = data['results'][0]
+            return _format_drug_info(
+                drug_name,
+                result['warnings'][0] if result.get('warnings') else None,
+                result['indications_and_usage'][0] if result.get('indications_and_usage') else None,
+            )
+    return None
+
+
+@cached_tool_result("check_drug_interactions", ttl=7 * 24 * 3600, stale_ttl=30 * 24 * 3600)
+def _fetch_drug_info(drug_name: str) -> str:
+    """Fetch drug label information from OpenFDA, falling back to a web search"""
+    deadline = time.monotonic() + _tool_timeout("check_drug_interactions")
+    response = get_http_client().get(OPENFDA_LABEL_URL, params=_openfda_params(drug_name), timeout=_request_timeout(deadline))
+    info = _parse_openfda_label(drug_name, response)
+    if info:
+        return info
+    
+    # Fallback to web search, within whatever is left of the deadline
+    return _duckduckgo_text(f"{drug_name} medication side effects interactions", deadline)
+
+
+@cached_tool_result("check_drug_interactions", ttl=7 * 24 * 3600, stale_ttl=30 * 24 * 3600)
+async def _afetch_drug_info(drug_name: str) -> str:
+    """Async version of _fetch_drug_info"""
+    deadline = time.monotonic() + _tool_timeout("check_drug_interactions")
+    response = await get_async_http_client().get(OPENFDA_LABEL_URL, params=_openfda_params(drug_name), timeout=_request_timeout(deadline))
+    info = _parse_openfda_label(drug_name, response)
+    if info:
+        return info
+    
+    # duckduckgo_search has no async client; keep it off the event loop
+    return await asyncio.to_thread(_duckduckgo_text, f"{drug_name} medication side effects interactions", deadline)
+
+
+def _format_drug_info(drug_name: str, warnings: Optional[str], indications: Optional[str]) -> str:
+    """Format drug label fields the way check_drug_interactions reports them"""
+    info = {
+        'drug_name': drug_name,
+        'warnings': warnings[:500] if warnings else 'N/A',
+        'indications': indications[:500] if indications else 'N/A',
+    }
+    return json.dumps(info, indent=2)
+
+
+def _local_drug_info(drug_name: str) -> Optional[str]:
+    label = lookup_local_drug_label(drug_name)
+    return _format_drug_info(drug_name, *label) if label else None
+
+
+def _lookup_drug_info(drug_name: str) -> str:
+    """Answer from the local OpenFDA label store, falling back to the network"""
+    return _local_drug_info(drug_name) or _fetch_drug_info(drug_name)
+
+
+async def _alookup_drug_info(drug_name: str) -> str:
+    """Async version of _lookup_drug_info"""
+    return _local_drug_info(drug_name) or await _afetch_drug_info(drug_name)
+
+
+def _medical_search_failure(query: str, error: Exception) -> str:
+    if isinstance(error, LookupError):
+        return f"No search results found for '{query}'. I'll provide information from my medical knowledge base."
+    if isinstance(error, ImportError):
+        return f"Search functionality temporarily unavailable. I'll provide information about {query} from my medical knowledge base."
+    return f"Search temporarily unavailable: {str(error)}. I'll provide information about {query} from my medical knowledge base."
+
+
+def _wikipedia_failure(query: str, error: Exception) -> str:
+    if isinstance(error, LookupError):
+        return f"Wikipedia information not available for '{query}'. The page may not exist or there may be a connection issue."
+    return f"Unable to access Wikipedia at the moment: {str(error)}. This could be due to network issues or Wikipedia API limitations. I can still provide general medical information about {query} from my training data."
+
+
+def _drug_info_failure(drug_name: str, error: Exception) -> str:
+    return f"Unable to retrieve drug information for {drug_name}. Please consult a pharmacist."
+
+
 @tool
 def search_medical_info(query: str) -> str:
     """
@@ -32,22 +257,17 @@ def search_medical_info(query: str) -> str:
         Relevant medical information from reliable sources
     """
     try:
-        from duckduckgo_search import DDGS
-        
-        # Use DDGS directly for better reliability
-        with DDGS() as ddgs:
-            results = ddgs.text(f"medical health {query}", max_results=3)
-            if results:
-                formatted_results = []
-                for i, result in enumerate(results[:3], 1):
-                    formatted_results.append(f"{i}. {result.get('title', 'N/A')}\n   {result.get('body', 'N/A')}")
-                return f"Medical Information Search Results:\n\n" + "\n\n".join(formatted_results)
-            else:
-                return f"No search results found for '{query}'. I'll provide information from my medical knowledge base."
-    except ImportError:
-        return f"Search functionality temporarily unavailable. I'll provide information about {query} from my medical knowledge base."
+        return _search_web(f"medical health {query}")
+    except Exception as e:
+        return _medical_search_failure(query, e)
+
+
+async def _asearch_medical_info(query: str) -> str:
+    # duckduckgo_search has no async client; keep it off the event loop
+    try:
+        return await asyncio.to_thread(_search_web, f"medical health {query}")
     except Exception as e:
-        return f"Search temporarily unavailable: {str(e)}. I'll provide information about {query} from my medical knowledge base."
+        return _medical_search_failure(query, e)
 
 
 @tool
@@ -63,20 +283,16 @@ def search_wikipedia_medical(query: str) -> str:
         Detailed encyclopedic information from Wikipedia
     """
     try:
-        wikipedia = WikipediaQueryRun(
-            api_wrapper=WikipediaAPIWrapper(
-                top_k_results=2,
-                doc_content_chars_max=3000,
-                lang="en"
-            )
-        )
-        result = wikipedia.run(query)
-        if not result or "Page" in result and "does not exist" in result:
-            return f"Wikipedia information not available for '{query}'. The page may not exist or there may be a connection issue."
-        return f"Wikipedia Medical Info:\n{result}"
+        return _lookup_wikipedia(query)
+    except Exception as e:
+        return _wikipedia_failure(query, e)
+
+
+async def _asearch_wikipedia_medical(query: str) -> str:
+    try:
+        return await _alookup_wikipedia(query)
     except Exception as e:
-        error_msg = str(e)
-        return f"Unable to access Wikipedia at the moment: {error_msg}. This could be due to network issues or Wikipedia API limitations. I can still provide general medical information about {query} from my training data."
+        return _wikipedia_failure(query, e)
 
 
 @tool
@@ -92,26 +308,22 @@ def check_drug_interactions(drug_name: str) -> str:
         Information about the drug including common side effects and precautions
     """
     try:
-        # Using OpenFDA API for drug information
-        url = f"https://api.fda.gov/drug/label.json?search=openfda.brand_name:{drug_name}&limit=1"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('results'):
-                result = data['results'][0]
-                info = {
-                    'drug_name': drug_name,
-                    'warnings': result.get('warnings', ['No warnings available'])[0][:500] if result.get('warnings') else 'N/A',
-                    'indications': result.get('indications_and_usage', ['No information available'])[0][:500] if result.get('indications_and_usage') else 'N/A',
-                }
-                return json.dumps(info, indent=2)
-        
-        # Fallback to web search
-        search = DuckDuckGoSearchRun()
-        return search.run(f"{drug_name} medication side effects interactions")
+        return _lookup_drug_info(drug_name)
     except Exception as e:
-        return f"Unable to retrieve drug information for {drug_name}. Please consult a pharmacist."
+        return _drug_info_failure(drug_name, e)
+
+
+async def _acheck_drug_interactions(drug_name: str) -> str:
+    try:
+        return await _alookup_drug_info(drug_name)
+    except Exception as e:
+        return _drug_info_failure(drug_name, e)
+
+
+# Native async implementations, used when the graph runs via ainvoke/astream
+search_medical_info.coroutine = _asearch_medical_info
+search_wikipedia_medical.coroutine = _asearch_wikipedia_medical
+check_drug_interactions.coroutine = _acheck_drug_interactions
 
 
 @tool
@@ -165,21 +377,9 @@ def get_emergency_guidance(symptom: str) -> str:
     Returns:
         Emergency guidance and whether immediate medical attention is needed
     """
-    emergency_keywords = {
-        'chest pain': '🚨 EMERGENCY: Call ambulance immediately (102/108). This could be a heart attack.',
-        'breathing': '🚨 EMERGENCY: Seek immediate medical help. Difficulty breathing requires urgent care.',
-        'severe bleeding': '🚨 EMERGENCY: Apply pressure to wound and call for emergency help immediately.',
-        'stroke': '🚨 EMERGENCY: Call 102/108 immediately. Remember FAST: Face drooping, Arm weakness, Speech difficulty, Time to call.',
-        'snake bite': '🚨 EMERGENCY: Keep calm, immobilize affected area, go to nearest hospital immediately.',
-        'poisoning': '🚨 EMERGENCY: Call poison control or go to emergency room immediately.',
-        'severe burn': '🚨 EMERGENCY: Cool with water, cover with clean cloth, seek immediate medical care.',
-        'unconscious': '🚨 EMERGENCY: Call 102/108, check breathing, put in recovery position if breathing.',
-    }
-    
-    symptom_lower = symptom.lower()
-    for keyword, guidance in emergency_keywords.items():
-        if keyword in symptom_lower:
-            return f"{guidance}\n\nEmergency Numbers India:\n- Ambulance: 102 or 108\n- Emergency: 112"
+    guidance = match_emergency_keyword(symptom)
+    if guidance:
+        return guidance
     
     return """Based on symptoms, if any of these apply, seek immediate care:
 - Severe pain (chest, abdomen, head)
@@ -323,12 +523,154 @@ Communication Style:
 Remember: You're an intelligent assistant with access to current information. Use your tools wisely to provide the best possible guidance while being clear about limitations."""
 
 
+FALLBACK_RESPONSE = "I apologize, I couldn't process that. Could you please rephrase?"
+
+
+def _message_text(content: Any) -> str:
+    """Extract plain text from message content (string or list of content parts)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content
+            if isinstance(part, (str, dict))
+        )
+    return ""
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a patient's conversation with SwasthAI, a medical assistant.
+Update the existing summary with the new messages. Keep what matters for future medical guidance:
+symptoms and their duration, conditions, medications, allergies, age/sex/pregnancy if mentioned,
+advice already given and any red flags. Drop greetings and repetition.
+Write at most 150 words in plain English bullet points."""
+
+
+def system_prompt(summary: str = "") -> str:
+    """System prompt, with the rolling conversation summary appended when there is one"""
+    if not summary:
+        return ENHANCED_MEDICAL_PROMPT
+    # Gemini accepts a single leading system message, so the summary goes inside it
+    return f"{ENHANCED_MEDICAL_PROMPT}\n\nSUMMARY OF EARLIER CONVERSATION WITH THIS USER:\n{summary}"
+
+
+def cached_answer(user_message: str, conversation_history: List[Dict[str, str]] = None, summary: str = None) -> Optional[str]:
+    """Answer cache lookup; only first-turn questions are independent of history"""
+    if conversation_history or summary or not settings.ANSWER_CACHE_ENABLED:
+        return None
+    return get_answer_cache().get(user_message)
+
+
 # ==================== AGENT STATE ====================
 
 class AgentState(TypedDict):
     """Enhanced state with tool support"""
     messages: Annotated[Sequence[BaseMessage], operator.add]
     conversation_history: List[Dict[str, str]]
+    summary: str  # Rolling summary of older turns, "" if none
+
+
+# ==================== TOOL EXECUTION ====================
+
+# Per-tool deadlines in seconds; tools not listed use settings.TOOL_TIMEOUT_SECONDS
+TOOL_TIMEOUTS = {
+    "search_medical_info": 6.0,
+    "search_wikipedia_medical": 6.0,
+    "check_drug_interactions": 6.0,
+    "calculate_bmi": 1.0,
+    "get_emergency_guidance": 1.0,
+    "search_nearby_facilities": 1.0,
+    "general_health_tips": 1.0,
+}
+
+# Shared pool so a timed-out call never holds up the rest of the turn. A thread
+# cannot be interrupted, so each network tool also bounds its own requests by its
+# deadline (DDGS timeout, per-request httpx timeouts, no fallback once it has
+# passed) and gives its worker back
+_tool_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="swasthai-tool")
+
+
+def _tool_timeout(tool_name: str) -> float:
+    """Deadline for a single tool call"""
+    return TOOL_TIMEOUTS.get(tool_name, settings.TOOL_TIMEOUT_SECONDS)
+
+
+def _tool_failure_message(tool_call: Dict[str, Any], status: str, detail: str) -> ToolMessage:
+    """Structured ToolMessage telling the model a tool call did not produce a result"""
+    content = json.dumps({
+        "status": status,
+        "tool": tool_call["name"],
+        "detail": detail,
+        "instruction": "Continue without this tool and answer from your medical knowledge.",
+    })
+    return ToolMessage(content=content, tool_call_id=tool_call["id"], name=tool_call["name"], status="error")
+
+
+class ParallelToolNode:
+    """
+    Graph node that runs every tool call from one model turn concurrently,
+    each under its own deadline. A call that times out or fails becomes an
+    error ToolMessage so the model can carry on with the results it has.
+    """
+    
+    def __init__(self, tools: List[Any]):
+        self.tools_by_name = {t.name: t for t in tools}
+    
+    @staticmethod
+    def _tool_calls(state: AgentState) -> List[Dict[str, Any]]:
+        return list(getattr(state["messages"][-1], "tool_calls", None) or [])
+    
+    def _result_message(self, tool_call: Dict[str, Any], output: Any) -> ToolMessage:
+        content = output if isinstance(output, str) else json.dumps(output, default=str)
+        return ToolMessage(content=content, tool_call_id=tool_call["id"], name=tool_call["name"])
+    
+    def invoke(self, state: AgentState) -> Dict[str, List[ToolMessage]]:
+        """Run tool calls on the shared thread pool"""
+        tool_calls = self._tool_calls(state)
+        started = time.monotonic()
+        pending = []
+        for tool_call in tool_calls:
+            tool = self.tools_by_name.get(tool_call["name"])
+            future = _tool_executor.submit(tool.invoke, tool_call["args"]) if tool else None
+            pending.append((tool_call, future))
+        
+        messages = []
+        for tool_call, future in pending:
+            if future is None:
+                messages.append(_tool_failure_message(tool_call, "error", "Unknown tool"))
+                continue
+            
+            timeout = _tool_timeout(tool_call["name"])
+            remaining = max(0.0, started + timeout - time.monotonic())
+            try:
+                messages.append(self._result_message(tool_call, future.result(timeout=remaining)))
+            except FutureTimeoutError:
+                # Only drops a call still queued; a running one ends at its client timeout
+                future.cancel()
+                messages.append(_tool_failure_message(tool_call, "timed_out", f"No result within {timeout:g}s"))
+            except Exception as e:
+                messages.append(_tool_failure_message(tool_call, "error", str(e)))
+        
+        return {"messages": messages}
+    
+    async def _arun(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        tool = self.tools_by_name.get(tool_call["name"])
+        if tool is None:
+            return _tool_failure_message(tool_call, "error", "Unknown tool")
+        
+        timeout = _tool_timeout(tool_call["name"])
+        try:
+            output = await asyncio.wait_for(tool.ainvoke(tool_call["args"]), timeout=timeout)
+            return self._result_message(tool_call, output)
+        except asyncio.TimeoutError:
+            return _tool_failure_message(tool_call, "timed_out", f"No result within {timeout:g}s")
+        except Exception as e:
+            return _tool_failure_message(tool_call, "error", str(e))
+    
+    async def ainvoke(self, state: AgentState) -> Dict[str, List[ToolMessage]]:
+        """Run tool calls concurrently on the event loop"""
+        messages = await asyncio.gather(*(self._arun(call) for call in self._tool_calls(state)))
+        return {"messages": list(messages)}
 
 
 # ==================== SWASTHAI AGENT ====================
@@ -336,21 +678,26 @@ class AgentState(TypedDict):
 class EnhancedSwasthAIAgent:
     """
     Enhanced SwasthAI Medical Assistant with Tool Calling
-    Uses Gemini 2.5 Flash with function calling for intelligent responses
+    Uses Gemini 2.5 Flash or OpenAI (via llm_router) with function calling for intelligent responses
     """
     
     def __init__(self):
         """Initialize the enhanced AI agent"""
         self.tools = self._initialize_tools()
-        self.llm = self._initialize_llm()
+        self.base_llm = self._initialize_llm()
+        # Bind tools to the LLM
+        self.llm = self.base_llm.bind_tools(self.tools)
         self.graph = self._build_graph()
     
     def _initialize_tools(self):
         """Initialize all available tools"""
-        return [
-            search_medical_info,
-            search_wikipedia_medical,
-            check_drug_interactions,
+        network_tools = [search_medical_info, search_wikipedia_medical, check_drug_interactions]
+        if settings.AI_PROVIDER.lower() == "fake":
+            # Offline load testing: recorded responses instead of DuckDuckGo/Wikipedia/OpenFDA
+            from fake_llm import fixture_tool
+            network_tools = [fixture_tool(t) for t in network_tools]
+        
+        return network_tools + [
             calculate_bmi,
             get_emergency_guidance,
             search_nearby_facilities,
@@ -358,22 +705,8 @@ class EnhancedSwasthAIAgent:
         ]
     
     def _initialize_llm(self):
-        """Initialize Gemini with function calling"""
-        if not settings.GOOGLE_API_KEY:
-            raise ValueError("GOOGLE_API_KEY not set in environment")
-        
-        try:
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                google_api_key=settings.GOOGLE_API_KEY,
-                temperature=0.7,
-                max_output_tokens=2000,
-                convert_system_message_to_human=True
-            )
-            # Bind tools to the LLM
-            return llm.bind_tools(self.tools)
-        except Exception as e:
-            raise ValueError(f"Failed to initialize Gemini: {e}")
+        """Initialize the provider router (AI_PROVIDER first, failover to the other)"""
+        return create_router()
     
     def _build_graph(self) -> StateGraph:
         """Build the conversation flow graph with tool support"""
@@ -394,7 +727,8 @@ class EnhancedSwasthAIAgent:
             messages = state["messages"]
             
             # Add system prompt
-            full_messages = [SystemMessage(content=ENHANCED_MEDICAL_PROMPT)] + list(messages)
+            full_messages = [SystemMessage(content=system_prompt(state.get("summary", "")))] + list(messages)
+            metrics.observe("llm.prompt_tokens", prompt_tokens(full_messages))
             
             # Get response from LLM (may include tool calls)
             response = self.llm.invoke(full_messages)
@@ -404,12 +738,26 @@ class EnhancedSwasthAIAgent:
                 "conversation_history": state.get("conversation_history", [])
             }
         
+        async def acall_model(state: AgentState) -> AgentState:
+            """Call the LLM with tool support without blocking the event loop"""
+            messages = state["messages"]
+            full_messages = [SystemMessage(content=system_prompt(state.get("summary", "")))] + list(messages)
+            metrics.observe("llm.prompt_tokens", prompt_tokens(full_messages))
+            response = await self.llm.ainvoke(full_messages)
+            
+            return {
+                "messages": [response],
+                "conversation_history": state.get("conversation_history", [])
+            }
+        
         # Create the graph
         workflow = StateGraph(AgentState)
         
         # Add nodes
-        workflow.add_node("agent", call_model)
-        workflow.add_node("tools", ToolNode(self.tools))
+        # Sync and async implementations so the graph serves both invoke() and ainvoke()
+        workflow.add_node("agent", RunnableLambda(call_model, afunc=acall_model, name="agent"))
+        tool_node = ParallelToolNode(self.tools)
+        workflow.add_node("tools", RunnableLambda(tool_node.invoke, afunc=tool_node.ainvoke, name="tools"))
         
         # Set entry point
         workflow.set_entry_point("agent")
@@ -430,43 +778,159 @@ class EnhancedSwasthAIAgent:
         # Compile the graph
         return workflow.compile()
     
-    def chat(self, user_message: str, conversation_history: List[Dict[str, str]] = None) -> str:
+    def _prepare_messages(self, user_message: str, conversation_history: List[Dict[str, str]] = None, summary: str = None) -> List[BaseMessage]:
+        """Convert stored conversation history plus the new message into LangChain messages within the token budget"""
+        reserved = estimate_tokens(system_prompt(summary or "")) + MESSAGE_OVERHEAD_TOKENS
+        messages, tokens = build_context(conversation_history, user_message, reserved_tokens=reserved)
+        metrics.observe("context.history_messages", len(messages) - 1)
+        metrics.observe("context.initial_prompt_tokens", tokens)
+        return messages
+    
+    def _initial_state(self, user_message: str, conversation_history: List[Dict[str, str]] = None, summary: str = None) -> AgentState:
+        """Build the graph input state for a user message"""
+        return {
+            "messages": self._prepare_messages(user_message, conversation_history, summary),
+            "conversation_history": conversation_history or [],
+            "summary": summary or ""
+        }
+    
+    @staticmethod
+    def _final_response(messages: Sequence[BaseMessage]) -> str:
+        """Extract the final AI response from the graph output messages"""
+        for message in reversed(messages):
+            if isinstance(message, AIMessage) and message.content:
+                return _message_text(message.content)
+        
+        return FALLBACK_RESPONSE
+    
+    @staticmethod
+    def _stream_events(mode: str, chunk: Any) -> Iterator[Dict[str, Any]]:
+        """Translate one graph stream chunk into chat events (see stream_chat)"""
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == "agent" and isinstance(message, AIMessageChunk):
+                text = _message_text(message.content)
+                if text:
+                    yield {"type": "token", "content": text}
+        
+        elif mode == "updates":
+            for node, update in chunk.items():
+                for message in (update or {}).get("messages", []):
+                    if node == "agent" and isinstance(message, AIMessage):
+                        if message.tool_calls:
+                            yield {"type": "tool_start", "tools": [call["name"] for call in message.tool_calls]}
+                        elif message.content:
+                            yield {"type": "final", "response": _message_text(message.content)}
+                    elif node == "tools" and isinstance(message, ToolMessage):
+                        yield {"type": "tool_end", "tool": message.name}
+    
+    @staticmethod
+    def _remember_answer(user_message: str, conversation_history: List[Dict[str, str]], summary: str, response: str):
+        """Store a first-turn answer in the answer cache"""
+        if conversation_history or summary or not settings.ANSWER_CACHE_ENABLED or response == FALLBACK_RESPONSE:
+            return
+        get_answer_cache().put(user_message, response)
+    
+    def chat(self, user_message: str, conversation_history: List[Dict[str, str]] = None, summary: str = None) -> str:
         """
         Process user message with tool support
         
         Args:
             user_message: The user's message
             conversation_history: Previous conversation context
+            summary: Rolling summary of turns older than conversation_history
         
         Returns:
             AI assistant's response (may include tool results)
         """
-        # Convert conversation history
-        messages = []
-        if conversation_history:
-            for msg in conversation_history[-10:]:
-                if msg["role"] == "user":
-                    messages.append(HumanMessage(content=msg["content"]))
-                elif msg["role"] == "assistant":
-                    messages.append(AIMessage(content=msg["content"]))
+        cached = cached_answer(user_message, conversation_history, summary)
+        if cached is not None:
+            return cached
         
-        # Add current message
-        messages.append(HumanMessage(content=user_message))
+        result = self.graph.invoke(self._initial_state(user_message, conversation_history, summary))
+        response = self._final_response(result["messages"])
+        self._remember_answer(user_message, conversation_history, summary, response)
+        return response
+    
+    async def achat(self, user_message: str, conversation_history: List[Dict[str, str]] = None, summary: str = None) -> str:
+        """
+        Async version of chat() - awaits the LLM instead of blocking the event loop
         
-        # Run the graph
-        state = {
-            "messages": messages,
-            "conversation_history": conversation_history or []
-        }
+        Synchronous tools are run in the default executor by LangChain. The caller
+        checks cached_answer() first, so a cache hit never waits for an LLM slot.
+        """
+        result = await self.graph.ainvoke(self._initial_state(user_message, conversation_history, summary))
+        response = self._final_response(result["messages"])
+        self._remember_answer(user_message, conversation_history, summary, response)
+        return response
+    
+    def stream_chat(self, user_message: str, conversation_history: List[Dict[str, str]] = None, summary: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process user message and yield events as the graph runs
         
-        result = self.graph.invoke(state)
+        Yields dicts with a "type" key:
+            token: {"content"} - text fragment generated by the agent node
+            tool_start: {"tools"} - the model requested these tools
+            tool_end: {"tool"} - a tool finished and its result went back to the model
+            done: {"response"} - final assistant response
+        """
+        cached = cached_answer(user_message, conversation_history, summary)
+        if cached is not None:
+            yield {"type": "token", "content": cached}
+            yield {"type": "done", "response": cached}
+            return
         
-        # Extract final AI response
-        for message in reversed(result["messages"]):
-            if isinstance(message, AIMessage) and message.content:
-                return message.content
+        final_response = None
+        for mode, chunk in self.graph.stream(
+            self._initial_state(user_message, conversation_history, summary),
+            stream_mode=["messages", "updates"]
+        ):
+            for event in self._stream_events(mode, chunk):
+                if event["type"] == "final":
+                    final_response = event["response"]
+                else:
+                    yield event
         
-        return "I apologize, I couldn't process that. Could you please rephrase?"
+        response = final_response or FALLBACK_RESPONSE
+        self._remember_answer(user_message, conversation_history, summary, response)
+        yield {"type": "done", "response": response}
+    
+    async def astream_chat(self, user_message: str, conversation_history: List[Dict[str, str]] = None, summary: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of stream_chat(); the caller checks cached_answer() first, as for achat()"""
+        final_response = None
+        async for mode, chunk in self.graph.astream(
+            self._initial_state(user_message, conversation_history, summary),
+            stream_mode=["messages", "updates"]
+        ):
+            for event in self._stream_events(mode, chunk):
+                if event["type"] == "final":
+                    final_response = event["response"]
+                else:
+                    yield event
+        
+        response = final_response or FALLBACK_RESPONSE
+        self._remember_answer(user_message, conversation_history, summary, response)
+        yield {"type": "done", "response": response}
+    
+    def summarize(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Fold older messages into the rolling conversation summary
+        
+        Args:
+            previous_summary: Current summary ("" if none)
+            messages: Messages to fold in, oldest first
+        
+        Returns:
+            Updated summary
+        """
+        transcript = "\n".join(
+            f"{msg['role'].upper()}: {msg['content'][:1000]}" for msg in messages
+        )
+        response = self.base_llm.invoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"EXISTING SUMMARY:\n{previous_summary or '(none)'}\n\nNEW MESSAGES:\n{transcript}")
+        ])
+        return _message_text(response.content).strip()
     
     def get_greeting(self) -> str:
         """Get enhanced greeting message"""
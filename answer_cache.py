@@ -0,0 +1,223 @@
+"""
+Semantic answer cache for first-turn questions
+Near-duplicate questions ("symptoms of dengue", "dengue ke lakshan") are matched
+locally with character n-gram MinHash + LSH, so no embedding service is needed.
+
+A fuzzy match alone is never enough: numbers, doses and words that say who the
+question is about (child, pregnant, type, my) must be identical, because
+"type 1" vs "type 2" or "can I take" vs "can my child take" need different answers.
+"""
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from metrics import metrics
+
+
+# Hinglish and English variants mapped to one canonical word
+SYNONYMS = {
+    "lakshan": "symptoms", "lakshana": "symptoms", "symptom": "symptoms", "signs": "symptoms",
+    "ilaj": "treatment", "ilaaj": "treatment", "upchar": "treatment", "treat": "treatment", "cure": "treatment",
+    "dawai": "medicine", "dawa": "medicine", "medication": "medicine", "medicines": "medicine", "tablet": "medicine",
+    "bukhar": "fever", "bukhaar": "fever",
+    "sar": "head", "dard": "pain", "ache": "pain",
+    "khansi": "cough", "zukam": "cold", "jukam": "cold",
+    "madhumeh": "diabetes",
+    "bachav": "prevention", "bachao": "prevention", "prevent": "prevention", "avoid": "prevention",
+    "kid": "child", "kids": "child", "children": "child", "bachcha": "child", "bacha": "child", "bachche": "child",
+    "babies": "baby", "newborn": "infant", "infants": "infant",
+    "pregnant": "pregnancy", "garbhavastha": "pregnancy", "dosage": "dose", "doses": "dose",
+}
+
+# Words that carry no meaning for matching (pronouns stay: they change whose question it is)
+STOPWORDS = {
+    "what", "are", "is", "the", "a", "an", "of", "for", "to", "in", "on", "and", "or", "about",
+    "tell", "please", "you", "do", "does", "should", "know",
+    "ke", "ka", "ki", "kya", "hai", "hain", "mein", "ko", "se", "batao", "bataiye", "kaise", "kare", "karein",
+}
+
+# Words (after synonyms) that must match exactly, as must any token containing a digit
+QUALIFIERS = {
+    "child", "baby", "infant", "toddler", "teen", "elderly", "adult", "pregnancy", "breastfeeding",
+    "type", "mg", "ml", "mcg", "dose", "overdose", "much", "many",
+    "i", "my", "me", "he", "she", "his", "her", "him", "we", "our", "wife", "husband",
+    "mother", "father", "son", "daughter", "mera", "meri", "mujhe",
+}
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // NUM_BANDS
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed seed so signatures are comparable across restarts
+_rng = random.Random(20251104)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, map synonyms, drop stopwords and sort words so word order does not matter"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    words = [SYNONYMS.get(word, word) for word in words]
+    return " ".join(sorted(set(word for word in words if word not in STOPWORDS)))
+
+
+def qualifiers(normalized: str) -> frozenset:
+    """Numbers and qualifier words of a normalized question; a hit needs these to be identical"""
+    return frozenset(
+        word for word in normalized.split()
+        if word in QUALIFIERS or any(ch.isdigit() for ch in word)
+    )
+
+
+def minhash_signature(normalized: str) -> Tuple[int, ...]:
+    """MinHash signature over character n-grams of a normalized question"""
+    padded = f" {normalized} "
+    shingles = {padded[i:i + SHINGLE_SIZE] for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimated_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERMUTATIONS
+
+
+def _bands(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [
+        (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        for band in range(NUM_BANDS)
+    ]
+
+
+class AnswerCache:
+    """In-process LSH index of recent first-turn answers"""
+
+    def __init__(self, threshold: float, ttl: float, max_entries: int):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for band in _bands(entry["signature"]):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _find(self, signature: Tuple[int, ...], required: frozenset, threshold: float) -> List[Tuple[float, int]]:
+        """Candidates from shared LSH buckets with the same qualifiers whose estimated similarity meets the threshold"""
+        now = time.time()
+        candidates = set()
+        for band in _bands(signature):
+            candidates |= self._buckets.get(band, set())
+
+        matches = []
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry["expires_at"] < now:
+                self._remove(entry_id)
+                continue
+            if entry["qualifiers"] != required:
+                continue
+            similarity = estimated_similarity(signature, entry["signature"])
+            if similarity >= threshold:
+                matches.append((similarity, entry_id))
+        return sorted(matches, reverse=True)
+
+    def get(self, question: str) -> Optional[str]:
+        """Return the cached answer for a near-duplicate question, if any"""
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        signature = minhash_signature(normalized)
+        with self._lock:
+            matches = self._find(signature, qualifiers(normalized), self.threshold)
+            if not matches:
+                metrics.incr("answer_cache.miss")
+                return None
+            entry_id = matches[0][1]
+            self._entries.move_to_end(entry_id)
+            metrics.incr("answer_cache.hit")
+            return self._entries[entry_id]["response"]
+
+    def put(self, question: str, response: str):
+        """Remember the answer to a first-turn question"""
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        signature = minhash_signature(normalized)
+        required = qualifiers(normalized)
+        with self._lock:
+            # Replace an existing near-identical entry instead of piling up duplicates
+            for _, entry_id in self._find(signature, required, self.threshold):
+                self._remove(entry_id)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "question": question,
+                "signature": signature,
+                "qualifiers": required,
+                "response": response,
+                "expires_at": time.time() + self.ttl,
+            }
+            for band in _bands(signature):
+                self._buckets.setdefault(band, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            metrics.set_gauge("answer_cache.entries", len(self._entries))
+
+    def invalidate(self, question: Optional[str] = None) -> int:
+        """Drop entries matching a question (same threshold as lookups), or everything"""
+        with self._lock:
+            if question is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._buckets.clear()
+            else:
+                normalized = normalize_question(question)
+                matches = self._find(
+                    minhash_signature(normalized), qualifiers(normalized), self.threshold
+                ) if normalized else []
+                for _, entry_id in matches:
+                    self._remove(entry_id)
+                removed = len(matches)
+            metrics.set_gauge("answer_cache.entries", len(self._entries))
+            return removed
+
+
+# Global answer cache instance
+_answer_cache = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get or create the global answer cache"""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache(
+            threshold=settings.ANSWER_CACHE_SIMILARITY,
+            ttl=settings.ANSWER_CACHE_TTL_SECONDS,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+        )
+    return _answer_cache
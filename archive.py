@@ -0,0 +1,267 @@
+"""
+Tiered archival of cold chat history
+Messages older than ARCHIVE_AFTER_DAYS move out of the hot `messages` table into one
+compressed block per user and month (message_archives), keeping the table and its
+indexes small enough to stay in cache. History and admin endpoints decompress a
+block only when a request actually reaches that far back.
+
+Usage:
+    python archive.py                       # Archive once using ARCHIVE_AFTER_DAYS
+    python archive.py --older-than-days 30
+"""
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from database import SessionLocal, Message, MessageArchive, record_stats
+from metrics import metrics
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Cold messages read per user per pass, bounding archiver memory for very active users
+ARCHIVE_BATCH_MESSAGES = 5000
+
+
+class ArchivedMessage(NamedTuple):
+    """A message read back from an archive block (the fields the history schemas use)"""
+    id: int
+    role: str
+    content: str
+    created_at: datetime
+
+
+# ==================== BLOCK ENCODING ====================
+
+def _codec() -> str:
+    return "zstd" if settings.ARCHIVE_CODEC == "zstd" and ZSTD_AVAILABLE else "zlib"
+
+
+def encode_block(messages: List[ArchivedMessage]) -> Tuple[str, bytes]:
+    """(codec, compressed bytes) for messages in chronological order"""
+    payload = json.dumps(
+        [[m.id, m.role, m.content, m.created_at.isoformat()] for m in messages],
+        ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    codec = _codec()
+    if codec == "zstd":
+        return codec, zstandard.ZstdCompressor(level=settings.ARCHIVE_COMPRESSION_LEVEL).compress(payload)
+    return codec, zlib.compress(payload, min(9, settings.ARCHIVE_COMPRESSION_LEVEL))
+
+
+def decode_block(block: MessageArchive) -> List[ArchivedMessage]:
+    """Messages of one block in chronological order"""
+    if block.codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("The zstandard package is needed to read zstd archive blocks")
+        payload = zstandard.ZstdDecompressor().decompress(block.data)
+    else:
+        payload = zlib.decompress(block.data)
+    return [
+        ArchivedMessage(message_id, role, content, datetime.fromisoformat(created_at))
+        for message_id, role, content, created_at in json.loads(payload)
+    ]
+
+
+# ==================== ARCHIVER ====================
+
+def archive_user(db, user_id: int, cutoff: datetime) -> int:
+    """Move one user's messages older than cutoff into their monthly blocks; returns messages moved"""
+    moved = 0
+    while True:
+        rows = db.execute(
+            select(Message.id, Message.role, Message.content, Message.created_at)
+            .where(Message.user_id == user_id, Message.created_at < cutoff)
+            .order_by(Message.created_at, Message.id)
+            .limit(ARCHIVE_BATCH_MESSAGES)
+        ).all()
+        if not rows:
+            return moved
+
+        by_month: Dict[str, List[ArchivedMessage]] = {}
+        for row in rows:
+            by_month.setdefault(row.created_at.strftime("%Y-%m"), []).append(ArchivedMessage(*row))
+
+        for month, messages in by_month.items():
+            block = db.execute(select(MessageArchive).where(
+                MessageArchive.user_id == user_id, MessageArchive.month == month
+            )).scalar_one_or_none()
+            if block is None:
+                block = MessageArchive(user_id=user_id, month=month)
+                db.add(block)
+            else:
+                messages = sorted(decode_block(block) + messages, key=lambda m: (m.created_at, m.id))
+            block.codec, block.data = encode_block(messages)
+            block.message_count = len(messages)
+            block.first_created_at = messages[0].created_at
+            block.last_created_at = messages[-1].created_at
+            block.last_message_id = max(m.id for m in messages)
+            metrics.incr("archive.blocks_written")
+
+        # Core delete on the connection: the rows still exist (archived), so the
+        # bulk-delete stats hook must not count them as removed
+        ids = [row.id for row in rows]
+        deleted = db.connection().execute(delete(Message.__table__).where(Message.__table__.c.id.in_(ids))).rowcount
+        if deleted != len(ids):
+            # Another archiver (e.g. a second worker) got there first
+            db.rollback()
+            metrics.incr("archive.conflicts")
+            return moved
+        db.commit()
+        moved += len(ids)
+
+
+def archive_old_messages(older_than_days: Optional[float] = None, max_users: Optional[int] = None) -> dict:
+    """
+    Archive every message older than the cutoff, user by user
+
+    Each user's batch is one transaction (blocks written and hot rows deleted
+    together), so an interrupted run leaves nothing half-moved.
+    """
+    days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    started = time.perf_counter()
+    db = SessionLocal()
+    users = moved = 0
+    try:
+        user_ids = db.execute(
+            select(Message.user_id).where(Message.created_at < cutoff).distinct()
+            .limit(max_users or settings.ARCHIVE_USERS_PER_RUN)
+        ).scalars().all()
+        for user_id in user_ids:
+            try:
+                moved += archive_user(db, user_id, cutoff)
+                users += 1
+            except Exception as e:
+                db.rollback()
+                metrics.incr("archive.failed_users")
+                print(f"Archiving failed for user {user_id}: {e}")
+    finally:
+        db.close()
+
+    seconds = time.perf_counter() - started
+    metrics.incr("archive.runs")
+    metrics.incr("archive.messages_moved", moved)
+    metrics.observe("archive.run_seconds", seconds)
+    return {"users": users, "messages": moved, "cutoff": cutoff.isoformat(), "seconds": round(seconds, 2)}
+
+
+# Background archiver task for this process
+_archiver_task: Optional[asyncio.Task] = None
+
+
+async def _archive_periodically():
+    while True:
+        try:
+            summary = await run_in_threadpool(archive_old_messages)
+            if summary["messages"]:
+                print(f"🗄️  Archived {summary['messages']:,} messages of {summary['users']:,} users")
+        except Exception as e:
+            print(f"Archiver run failed: {e}")
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL_MINUTES * 60)
+
+
+def start_archiver():
+    """Start the periodic archiver (application startup; no-op unless ARCHIVE_ENABLED)"""
+    global _archiver_task
+    if settings.ARCHIVE_ENABLED and _archiver_task is None:
+        _archiver_task = asyncio.get_running_loop().create_task(_archive_periodically())
+
+
+async def stop_archiver():
+    """Cancel the periodic archiver (application shutdown)"""
+    global _archiver_task
+    if _archiver_task is not None:
+        task, _archiver_task = _archiver_task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+# ==================== READS ====================
+
+async def load_archived_page(
+    db: AsyncSession, user_id: int, before: Optional[Tuple[datetime, int]], limit: int
+) -> List[ArchivedMessage]:
+    """
+    Up to `limit` archived messages older than the `before` position, newest first
+
+    Blocks are fetched and decompressed one at a time, newest month first, and
+    only until the page is full.
+    """
+    query = select(MessageArchive.id).where(MessageArchive.user_id == user_id)
+    if before:
+        query = query.where(MessageArchive.first_created_at <= before[0])
+    block_ids = (await db.execute(query.order_by(MessageArchive.month.desc()))).scalars().all()
+
+    page: List[ArchivedMessage] = []
+    for block_id in block_ids:
+        block = await db.get(MessageArchive, block_id)
+        for message in reversed(decode_block(block)):
+            if before is None or (message.created_at, message.id) < before:
+                page.append(message)
+                if len(page) >= limit:
+                    return page
+    return page
+
+
+async def load_all_archived(db: AsyncSession, user_id: int) -> List[ArchivedMessage]:
+    """Every archived message of a user in chronological order"""
+    result = await db.execute(
+        select(MessageArchive).where(MessageArchive.user_id == user_id).order_by(MessageArchive.month)
+    )
+    return [message for block in result.scalars() for message in decode_block(block)]
+
+
+async def archived_message_counts(db: AsyncSession, user_ids: List[int]) -> Dict[int, int]:
+    """user_id -> archived message count (from block headers, nothing decompressed)"""
+    if not user_ids:
+        return {}
+    result = await db.execute(
+        select(MessageArchive.user_id, func.sum(MessageArchive.message_count))
+        .where(MessageArchive.user_id.in_(user_ids)).group_by(MessageArchive.user_id)
+    )
+    return {user_id: int(total) for user_id, total in result.all()}
+
+
+async def delete_archived_messages(db: AsyncSession, user_id: int) -> int:
+    """Drop a user's archive blocks in the caller's transaction; returns messages removed"""
+    removed = (await db.execute(
+        select(func.coalesce(func.sum(MessageArchive.message_count), 0)).where(MessageArchive.user_id == user_id)
+    )).scalar()
+    if removed:
+        await db.execute(delete(MessageArchive).where(MessageArchive.user_id == user_id))
+        await db.run_sync(lambda session: record_stats(session.connection(), {"messages": -removed}))
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move cold SwasthAI chat history into compressed archive blocks")
+    parser.add_argument("--older-than-days", type=float, default=None,
+                        help=f"Archive messages older than this (default: ARCHIVE_AFTER_DAYS={settings.ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--max-users", type=int, default=None, help="Users to process in this run")
+    args = parser.parse_args()
+
+    from database import init_db
+    init_db()
+    summary = archive_old_messages(args.older_than_days, args.max_users)
+    print(f"🗄️  Archived {summary['messages']:,} messages of {summary['users']:,} users "
+          f"older than {summary['cutoff']} in {summary['seconds']}s ({_codec()})")
+
+
+if __name__ == "__main__":
+    main()
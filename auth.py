@@ -8,8 +8,10 @@ from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db, User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from database import get_async_db, User
 from config import settings
 
 # HTTP Bearer token scheme
@@ -56,9 +58,15 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_current_user(
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    """Look up a user by username"""
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalar_one_or_none()
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user from JWT token"""
     token = credentials.credentials
@@ -77,19 +85,20 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = await get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
     
     return user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authenticate a user by username and password"""
-    user = db.query(User).filter(User.username == username).first()
+    user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not await run_in_threadpool(verify_password, password, user.hashed_password):
         return None
     return user
 
@@ -0,0 +1,213 @@
+"""
+SwasthAI Database-Scale Benchmarks
+Measures latency and memory of data-heavy routes at several data scales and
+fails when a result regresses against benchmarks/baseline.json
+
+Usage:
+    python benchmarks/bench_routes.py                      # small + medium, compare to baseline
+    python benchmarks/bench_routes.py --scales large       # 100k users / 5M messages
+    python benchmarks/bench_routes.py --update-baseline    # record new baseline numbers
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+DATA_DIR = os.path.join(BENCH_DIR, ".data")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# name: (users, messages)
+SCALES = {
+    "small": (1_000, 20_000),
+    "medium": (10_000, 200_000),
+    "large": (100_000, 5_000_000),
+    "xlarge": (100_000, 50_000_000),
+}
+
+# Allowed slowdown before a result counts as a regression
+DEFAULT_TOLERANCE = 0.5
+LATENCY_SLACK_MS = 5.0
+MEMORY_SLACK_KB = 256.0
+
+
+# ==================== WORKER (one process per scale) ====================
+
+def _routes(admin_headers: dict, heavy_headers: dict, typical_headers: dict) -> dict:
+    """name -> (path, headers)"""
+    return {
+        "get_current_user": ("/api/user", typical_headers),
+        "messages_typical_user": ("/api/messages", typical_headers),
+        "messages_heaviest_user": ("/api/messages", heavy_headers),
+        "admin_users": ("/api/admin/users", admin_headers),
+        "admin_stats": ("/api/admin/stats", admin_headers),
+    }
+
+
+def run_worker(scale: str, requests: int) -> dict:
+    """Benchmark every route against the already-configured DATABASE_URL"""
+    sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)  # main.py mounts templates/ and static/ relative to the repo root
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func
+    from database import init_db, SessionLocal, User, Message
+    from auth import create_access_token, get_password_hash
+    from generate_data import generate
+    from main import app
+
+    users, messages = SCALES[scale]
+    init_db()
+    db = SessionLocal()
+    try:
+        if db.query(User).count() == 0:
+            generate(users, messages)
+        admin = db.query(User).filter(User.username == "bench_admin").first()
+        if admin is None:
+            admin = User(username="bench_admin", full_name="Bench Admin",
+                         hashed_password=get_password_hash("bench"), is_admin=True)
+            db.add(admin)
+            db.commit()
+
+        per_user = db.query(Message.user_id, func.count(Message.id).label("n")).group_by(Message.user_id).subquery()
+        heaviest = db.query(User.username).join(per_user, per_user.c.user_id == User.id).order_by(per_user.c.n.desc()).first()[0]
+        counts = [row[0] for row in db.query(per_user.c.n).order_by(per_user.c.n).all()]
+        median_count = counts[len(counts) // 2]
+        typical = db.query(User.username).join(per_user, per_user.c.user_id == User.id).filter(
+            per_user.c.n == median_count).first()[0]
+    finally:
+        db.close()
+
+    def headers(username: str) -> dict:
+        return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+    results = {}
+    with TestClient(app) as client:
+        for name, (path, route_headers) in _routes(headers("bench_admin"), headers(heaviest), headers(typical)).items():
+            response = client.get(path, headers=route_headers)  # Warm-up (and correctness check)
+            response.raise_for_status()
+
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                client.get(path, headers=route_headers)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            # Memory is measured on a separate request; tracemalloc slows everything down
+            tracemalloc.start()
+            client.get(path, headers=route_headers)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            timings.sort()
+            results[name] = {
+                "p50_ms": round(statistics.median(timings), 2),
+                "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 2),
+                "peak_kb": round(peak / 1024, 1),
+                "response_kb": round(len(response.content) / 1024, 1),
+            }
+            print(f"   {name:<24} p50 {results[name]['p50_ms']:>9.2f} ms   peak {results[name]['peak_kb']:>10.1f} KB",
+                  file=sys.stderr)
+    return results
+
+
+# ==================== RUNNER ====================
+
+def run_scale(scale: str, requests: int, database_url: str = None, regenerate: bool = False) -> dict:
+    """Run the worker for one scale in a fresh process with its own database"""
+    env = dict(os.environ)
+    if database_url is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        path = os.path.join(DATA_DIR, f"{scale}.db")
+        if regenerate:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        database_url = f"sqlite:///{path}"
+    env.update({
+        "DATABASE_URL": database_url,
+        "AI_PROVIDER": "fake",  # Startup builds the agent; keep it offline
+    })
+
+    users, messages = SCALES[scale]
+    print(f"📊 {scale}: {users:,} users, {messages:,} messages")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", scale, "--requests", str(requests)],
+        env=env, check=True, stdout=subprocess.PIPE, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions as human-readable lines"""
+    regressions = []
+    for scale, routes in results.items():
+        for route, current in routes.items():
+            base = baseline.get(scale, {}).get(route)
+            if base is None:
+                print(f"   ℹ️  {scale}/{route}: no baseline yet")
+                continue
+            latency_limit = base["p50_ms"] * (1 + tolerance) + LATENCY_SLACK_MS
+            memory_limit = base["peak_kb"] * (1 + tolerance) + MEMORY_SLACK_KB
+            if current["p50_ms"] > latency_limit:
+                regressions.append(f"{scale}/{route}: p50 {current['p50_ms']} ms > limit {latency_limit:.2f} ms "
+                                   f"(baseline {base['p50_ms']} ms)")
+            if current["peak_kb"] > memory_limit:
+                regressions.append(f"{scale}/{route}: peak {current['peak_kb']} KB > limit {memory_limit:.1f} KB "
+                                   f"(baseline {base['peak_kb']} KB)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SwasthAI routes at several data scales")
+    parser.add_argument("--scales", default="small,medium", help=f"Comma-separated: {', '.join(SCALES)}")
+    parser.add_argument("--requests", type=int, default=5, help="Timed requests per route (default: 5)")
+    parser.add_argument("--database-url", help="Benchmark an existing database instead of generated SQLite files")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the generated SQLite databases")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown/growth vs baseline (default: 0.5 = +50%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to baseline.json")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.requests)))
+        return 0
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"Unknown scale(s): {', '.join(unknown)}")
+
+    results = {scale: run_scale(scale, args.requests, args.database_url, args.regenerate) for scale in scales}
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Baseline updated: {BASELINE_PATH}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+SwasthAI Write Throughput Benchmark
+Compares chat-message write throughput under the "basic" and "production"
+database profiles (DATABASE_PROFILE), and production with write-behind batching
+(WRITE_BEHIND_ENABLED), with concurrent writers and readers
+
+Usage:
+    python benchmarks/bench_writes.py                          # SQLite, 16 writers, 4 readers, 10s
+    python benchmarks/bench_writes.py --writers 64 --seconds 30
+    python benchmarks/bench_writes.py --database-url postgresql://...   # Tables must be disposable
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+# name: environment overrides
+VARIANTS = {
+    "basic": {"DATABASE_PROFILE": "basic"},
+    "production": {"DATABASE_PROFILE": "production"},
+    "write-behind": {"DATABASE_PROFILE": "production", "WRITE_BEHIND_ENABLED": "true"},
+}
+USERS = 200
+
+
+# ==================== WORKER (one process per profile) ====================
+
+async def _run(writers: int, readers: int, seconds: float) -> dict:
+    from sqlalchemy import select
+    from sqlalchemy.exc import OperationalError
+    from database import init_db, engine, async_engine, SessionLocal, AsyncSessionLocal, User, Message
+    from main import _save_exchange
+    from write_behind import close_message_writer
+
+    init_db()
+    db = SessionLocal()
+    try:
+        db.add_all([User(username=f"bench_writer_{i}", full_name="Bench Writer", hashed_password="x")
+                    for i in range(USERS)])
+        db.commit()
+        user_ids = [row[0] for row in db.query(User.id).all()]
+    finally:
+        db.close()
+
+    stop_at = time.perf_counter() + seconds
+    counts = {"exchanges": 0, "reads": 0, "lock_errors": 0, "other_errors": 0}
+    latencies = []
+
+    async def writer(n: int):
+        turn = 0
+        while time.perf_counter() < stop_at:
+            user_id = user_ids[(n * 7919 + turn) % len(user_ids)]
+            turn += 1
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as session:
+                    await _save_exchange(session, user_id, "What are the symptoms of dengue?", "A" * 1500)
+                latencies.append(time.perf_counter() - started)
+                counts["exchanges"] += 1
+            except OperationalError as e:
+                counts["lock_errors" if "locked" in str(e) else "other_errors"] += 1
+
+    async def reader(n: int):
+        turn = 0
+        while time.perf_counter() < stop_at:
+            user_id = user_ids[(n * 104729 + turn) % len(user_ids)]
+            turn += 1
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(
+                        select(Message).where(Message.user_id == user_id).order_by(Message.id.desc()).limit(50)
+                    )
+                counts["reads"] += 1
+            except OperationalError as e:
+                counts["lock_errors" if "locked" in str(e) else "other_errors"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[writer(i) for i in range(writers)], *[reader(i) for i in range(readers)])
+    elapsed = time.perf_counter() - started
+    await close_message_writer()
+    await async_engine.dispose()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "exchanges_per_second": round(counts["exchanges"] / elapsed, 1),
+        "reads_per_second": round(counts["reads"] / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000, 2) if latencies else None,
+        "lock_errors": counts["lock_errors"],
+        "other_errors": counts["other_errors"],
+    }
+
+
+def run_worker(writers: int, readers: int, seconds: float) -> dict:
+    sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)  # main.py mounts templates/ and static/ relative to the repo root
+    return asyncio.run(_run(writers, readers, seconds))
+
+
+# ==================== RUNNER ====================
+
+def run_variant(variant: str, args) -> dict:
+    """Run the worker for one variant in a fresh process (engines are built at import)"""
+    env = dict(os.environ)
+    env.update(VARIANTS[variant], AI_PROVIDER="fake")
+    with tempfile.TemporaryDirectory() as tmp:
+        env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'writes.db')}"
+        env.pop("ASYNC_DATABASE_URL", None)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             "--writers", str(args.writers), "--readers", str(args.readers), "--seconds", str(args.seconds)],
+            env=env, check=True, stdout=subprocess.PIPE, text=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare write throughput across database settings")
+    parser.add_argument("--writers", type=int, default=16, help="Concurrent chat-exchange writers (default: 16)")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent history readers (default: 4)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration per profile (default: 10)")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"Comma-separated: {', '.join(VARIANTS)}")
+    parser.add_argument("--database-url", help="Use this database instead of a temporary SQLite file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.writers, args.readers, args.seconds)))
+        return 0
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        parser.error(f"Unknown variant(s): {', '.join(unknown)}")
+
+    print(f"✍️  {args.writers} writers + {args.readers} readers, {args.seconds:g}s per variant")
+    results = {}
+    for variant in variants:
+        results[variant] = run_variant(variant, args)
+        r = results[variant]
+        print(f"   {variant:<13} {r['exchanges_per_second']:>8.1f} exchanges/s   {r['reads_per_second']:>8.1f} reads/s   "
+              f"p50 {r['p50_ms']} ms   p99 {r['p99_ms']} ms   locked {r['lock_errors']}")
+
+    basic = results.get("basic", {}).get("exchanges_per_second")
+    if basic:
+        print()
+        for variant in variants[1:]:
+            print(f"📈 {variant}: {results[variant]['exchanges_per_second'] / basic:.2f}x basic write throughput")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,11 +16,105 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./swasthai.db"
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL (aiosqlite / asyncpg) when unset
+    DATABASE_PROFILE: str = "production"  # "production" (tuned connections) or "basic" (driver defaults)
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # With WAL, NORMAL only risks the last commits on power loss
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for a write lock instead of "database is locked"
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_CACHE_SIZE_MB: int = 64  # Page cache per connection
+    SQLITE_POOL_SIZE: int = 4  # Async connections to the SQLite file
+    DB_POOL_SIZE: int = 10  # Postgres: persistent connections per engine (sync and async each)
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 500  # Compiled SQL / asyncpg prepared statements; 0 behind PgBouncer
+    
+    # Write-behind batching of chat message inserts (see write_behind.py)
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_DURABILITY: str = "ack"  # "ack" waits for the batch commit; "async" returns once queued
+    WRITE_BEHIND_FLUSH_MS: float = 5.0  # How long a batch may fill before it is committed
+    WRITE_BEHIND_MAX_BATCH: int = 500  # Rows per transaction
+    WRITE_BEHIND_MAX_PENDING: int = 10000  # Queued rows before new writes wait (backpressure)
+    
+    # Tiered archival of cold chat history (see archive.py)
+    ARCHIVE_ENABLED: bool = False  # Run the archiver periodically inside the app
+    ARCHIVE_AFTER_DAYS: float = 90  # Messages older than this move to compressed monthly blocks
+    ARCHIVE_INTERVAL_MINUTES: float = 60
+    ARCHIVE_USERS_PER_RUN: int = 1000
+    ARCHIVE_CODEC: str = "zlib"  # "zstd" needs the zstandard package; falls back to zlib without it
+    ARCHIVE_COMPRESSION_LEVEL: int = 9
+    
+    # Compression of large message contents (SQLite; see content_compression.py)
+    CONTENT_COMPRESSION_ENABLED: bool = True
+    CONTENT_COMPRESSION_MIN_BYTES: int = 512  # Shorter values are stored as plain text
+    CONTENT_COMPRESSION_CODEC: str = "zlib"  # For newly trained dictionaries; "zstd" needs the zstandard package
+    CONTENT_COMPRESSION_LEVEL: int = 6
+    CONTENT_COMPRESSION_CHUNK_SIZE: int = 5000  # Message ids per transaction when converting existing rows
     
     # AI Configuration
     OPENAI_API_KEY: Optional[str] = None
     GOOGLE_API_KEY: Optional[str] = None
-    AI_PROVIDER: str = "openai"  # "openai" or "gemini"
+    AI_PROVIDER: str = "openai"  # "openai", "gemini", or "fake" (offline load testing); preferred provider
+    LLM_FALLBACK_PROVIDER: Optional[str] = None  # Defaults to the other provider; "none" disables failover
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 30.0  # Per-provider deadline before failing over
+    LLM_UNHEALTHY_ERROR_RATE: float = 0.5  # Providers above this error EWMA are tried last
+    LLM_HEDGE_ENABLED: bool = False  # Race a second provider when the first is slower than its p95
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_DELAY_SECONDS: float = 6.0  # Hedge delay until enough latency samples exist
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    TOOL_TIMEOUT_SECONDS: float = 8.0  # Default per-tool deadline (see ai_agent.TOOL_TIMEOUTS)
+    
+    # Offline stand-ins used when AI_PROVIDER=fake
+    FAKE_LLM_SEED: int = 0
+    FAKE_LLM_FIRST_TOKEN_MS: float = 600.0  # Median time to first token (log-normal)
+    FAKE_LLM_LATENCY_SIGMA: float = 0.4  # Spread of the log-normal latency distribution
+    FAKE_LLM_TOKENS_PER_SECOND: float = 60.0
+    FAKE_LLM_OUTPUT_TOKENS: int = 180  # Mean answer length
+    FAKE_LLM_TOOL_CALL_RATE: float = 0.6  # Share of user turns that call a tool first
+    FAKE_TOOL_FIXTURES_PATH: str = "./fixtures/tool_fixtures.json"
+    
+    # Tool result cache (in-process LRU backed by a SQLite file shared by workers)
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_PATH: str = "./tool_cache.db"
+    TOOL_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Semantic answer cache for first-turn questions
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = 0.95  # Estimated Jaccard similarity needed for a hit (numbers/qualifiers must match exactly)
+    ANSWER_CACHE_TTL_SECONDS: int = 6 * 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 2000
+    
+    # Offline Wikipedia medical index (built with ingest_wikipedia.py)
+    WIKI_INDEX_PATH: str = "./wiki_medical.db"
+    WIKIPEDIA_NETWORK_FALLBACK: bool = True
+    WIKI_MIN_PARTIAL_SCORE: float = 6.0  # BM25 an article matching only some query terms needs to count as a hit
+    
+    # Local OpenFDA drug-label store (built with ingest_openfda.py)
+    DRUG_LABEL_DB_PATH: str = "./drug_labels.db"
+    
+    # Shared HTTP client used by agent tools
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP2_ENABLED: bool = True
+    
+    # Conversation memory: older turns are folded into a per-user rolling summary
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1800  # Newest messages kept verbatim up to this many tokens; older ones are summarized
+    SUMMARY_MIN_PENDING_MESSAGES: int = 4  # Fold once this many older messages are unsummarized
+    SUMMARY_MAX_BATCH_MESSAGES: int = 40  # Most messages folded in one summarization call
+    
+    # Prompt size: history is added newest-first until the input budget is spent
+    CONTEXT_TOKEN_BUDGET: int = 4000  # Estimated input tokens (system prompt + summary + messages)
+    CONTEXT_MAX_TURN_TOKENS: int = 400  # Longer assistant turns are trimmed in the middle
+    
+    # Admission control in front of LLM calls (excess requests get 429 + Retry-After)
+    LLM_MAX_CONCURRENCY: int = 8  # Agent runs in flight at once per process
+    LLM_MAX_QUEUE: int = 32  # Requests allowed to wait for a slot
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 10.0  # Longest wait for a slot before shedding
+    LLM_MAX_IN_FLIGHT_PER_USER: int = 2
     
     # Server
     HOST: str = "0.0.0.0"
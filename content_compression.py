@@ -0,0 +1,261 @@
+"""
+Transparent compression of large chat message contents
+Message.content uses CompressedText: on SQLite, values of CONTENT_COMPRESSION_MIN_BYTES
+or more are stored as a compressed BLOB using a dictionary trained on our own replies
+(shared by every row, so even a few-KB reply compresses well). Smaller values stay
+plain TEXT. Reads decompress only the values a query actually fetches.
+
+Stored format: 3-byte header (codec, dictionary id) + compressed UTF-8. Dictionaries
+live in content_dictionaries and are never deleted, so old rows stay readable after
+retraining. On Postgres the type passes text through; TOAST already compresses large
+values there, and converting the column to bytea would rewrite the table under lock.
+
+Usage:
+    python content_compression.py            # Compress existing large messages in chunks
+    python content_compression.py --train    # Train a new dictionary from recent replies first
+"""
+import argparse
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Text, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+
+from config import settings
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+HEADER = struct.Struct(">BH")  # codec, dictionary id (0 = none)
+CODECS = {"zlib": 1, "zstd": 2}
+CODEC_NAMES = {number: name for name, number in CODECS.items()}
+
+# Dialects whose TEXT column can hold the compressed BLOB as-is
+COMPRESSED_DIALECTS = {"sqlite"}
+
+DICTIONARY_SIZE = 32 * 1024  # zlib cannot use more than 32 KB of preset dictionary
+TRAINING_SAMPLES = 2000
+MIN_TRAINING_SAMPLES = 50
+
+
+# ==================== DICTIONARIES ====================
+
+# id -> (codec, dictionary bytes), filled from content_dictionaries on demand
+_dictionaries: Dict[int, Tuple[str, bytes]] = {}
+# Dictionary id new values are compressed with (0 = none); None until loaded
+_current_id: Optional[int] = None
+
+
+def load_dictionaries(target_engine: Optional[Engine] = None):
+    """Read every stored dictionary and pick the newest usable one for new writes; returns its id (0 = none)"""
+    global _current_id
+    from database import engine, ContentDictionary
+    with (target_engine or engine).connect() as conn:
+        rows = conn.execute(select(ContentDictionary.id, ContentDictionary.codec, ContentDictionary.data)).all()
+    for row in rows:
+        _dictionaries[row.id] = (row.codec, row.data)
+    usable = [i for i, (codec, _) in _dictionaries.items() if codec == "zlib" or ZSTD_AVAILABLE]
+    _current_id = max(usable, default=0)
+    return _current_id
+
+
+def _dictionary(dictionary_id: int) -> Tuple[str, bytes]:
+    if dictionary_id not in _dictionaries:
+        # Trained by another process after this one loaded; one query, then cached
+        load_dictionaries()
+        if dictionary_id not in _dictionaries:
+            raise LookupError(f"Unknown content dictionary {dictionary_id}")
+    return _dictionaries[dictionary_id]
+
+
+def _build_zlib_dictionary(samples: List[str]) -> bytes:
+    """
+    Sentences and lines that recur across samples, most frequent last
+
+    Deflate only sees the dictionary as preceding text, and nearer matches cost
+    fewer bits, so the most common strings go at the end.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        counts.update({s for s in re.split(r"\n+|(?<=[.!?:])\s+", sample) if len(s) >= 8})
+    picked, size = [], 0
+    for segment, seen in counts.most_common():
+        if seen < 2:
+            break
+        encoded = segment.encode("utf-8") + b"\n"
+        if size + len(encoded) > DICTIONARY_SIZE:
+            continue
+        picked.append(encoded)
+        size += len(encoded)
+    return b"".join(reversed(picked))
+
+
+def train_dictionary(target_engine: Optional[Engine] = None) -> Optional[int]:
+    """
+    Train a dictionary on recent large messages and make it current
+
+    Returns the new id, or None when there are too few samples yet.
+    """
+    global _current_id
+    from database import engine, ContentDictionary
+    target_engine = target_engine or engine
+    if target_engine.dialect.name not in COMPRESSED_DIALECTS:
+        return None
+    with target_engine.connect() as conn:
+        samples = [
+            value for value in conn.execute(text(
+                "SELECT content FROM messages WHERE typeof(content) = 'text' "
+                "AND length(CAST(content AS BLOB)) >= :min_bytes ORDER BY id DESC LIMIT :n"
+            ), {"min_bytes": settings.CONTENT_COMPRESSION_MIN_BYTES, "n": TRAINING_SAMPLES}).scalars()
+        ]
+    if len(samples) < MIN_TRAINING_SAMPLES:
+        return None
+
+    codec = "zstd" if settings.CONTENT_COMPRESSION_CODEC == "zstd" and ZSTD_AVAILABLE else "zlib"
+    if codec == "zstd":
+        data = zstandard.train_dictionary(DICTIONARY_SIZE, [s.encode("utf-8") for s in samples]).as_bytes()
+    else:
+        data = _build_zlib_dictionary(samples)
+    if not data:
+        return None
+
+    with target_engine.begin() as conn:
+        dictionary_id = conn.execute(
+            ContentDictionary.__table__.insert().values(codec=codec, data=data, sample_count=len(samples))
+        ).inserted_primary_key[0]
+    if dictionary_id > 0xFFFF:
+        raise OverflowError("Content dictionary ids must fit the 2-byte header")
+    _dictionaries[dictionary_id] = (codec, data)
+    _current_id = dictionary_id
+    print(f"📖 Trained content dictionary {dictionary_id} ({codec}, {len(data):,} bytes, {len(samples):,} samples)")
+    return dictionary_id
+
+
+# ==================== CODEC ====================
+
+def compress_content(value: str) -> Optional[bytes]:
+    """Header + compressed bytes, or None when compression would not make the value smaller"""
+    if _current_id is None:
+        load_dictionaries()
+    raw = value.encode("utf-8")
+    if len(raw) < settings.CONTENT_COMPRESSION_MIN_BYTES:
+        return None
+    if _current_id:
+        codec, dictionary = _dictionary(_current_id)
+    else:
+        codec, dictionary = "zlib", b""
+    level = settings.CONTENT_COMPRESSION_LEVEL
+    if codec == "zstd":
+        compressor = zstandard.ZstdCompressor(
+            level=level, dict_data=zstandard.ZstdCompressionDict(dictionary)
+        ) if dictionary else zstandard.ZstdCompressor(level=level)
+        body = compressor.compress(raw)
+    else:
+        compressor = zlib.compressobj(level, zdict=dictionary) if dictionary else zlib.compressobj(level)
+        body = compressor.compress(raw) + compressor.flush()
+    packed = HEADER.pack(CODECS[codec], _current_id) + body
+    return packed if len(packed) < len(raw) else None
+
+
+def decompress_content(packed: bytes) -> str:
+    codec_number, dictionary_id = HEADER.unpack_from(packed)
+    codec = CODEC_NAMES[codec_number]
+    dictionary = _dictionary(dictionary_id)[1] if dictionary_id else b""
+    body = packed[HEADER.size:]
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("The zstandard package is needed to read zstd-compressed messages")
+        decompressor = zstandard.ZstdDecompressor(
+            dict_data=zstandard.ZstdCompressionDict(dictionary)
+        ) if dictionary else zstandard.ZstdDecompressor()
+        return decompressor.decompress(body).decode("utf-8")
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return (decompressor.decompress(body) + decompressor.flush()).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """TEXT that stores large values compressed (see module docstring); always str in Python"""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        # A character is at most 4 bytes: skip short values without encoding them
+        if (value is None or not settings.CONTENT_COMPRESSION_ENABLED
+                or dialect.name not in COMPRESSED_DIALECTS
+                or len(value) * 4 < settings.CONTENT_COMPRESSION_MIN_BYTES):
+            return value
+        return compress_content(value) or value
+
+    def process_result_value(self, value, dialect):
+        # Plain rows come back as str, compressed ones as bytes
+        if isinstance(value, bytes):
+            return decompress_content(value)
+        return value
+
+
+# ==================== EXISTING ROWS ====================
+
+def compress_existing_messages(target_engine: Optional[Engine] = None, chunk_size: Optional[int] = None) -> dict:
+    """
+    Compress large plain-text messages in id-range chunks, one short transaction each
+
+    Safe to interrupt and re-run: only rows still stored as text are touched.
+    """
+    from database import engine
+    target_engine = target_engine or engine
+    chunk_size = chunk_size or settings.CONTENT_COMPRESSION_CHUNK_SIZE
+    summary = {"messages": 0, "bytes_before": 0, "bytes_after": 0}
+    if target_engine.dialect.name not in COMPRESSED_DIALECTS:
+        return summary
+
+    with target_engine.connect() as conn:
+        low, high = conn.execute(text("SELECT MIN(id), MAX(id) FROM messages")).one()
+    if low is None:
+        return summary
+
+    for start in range(low - 1, high, chunk_size):
+        with target_engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, content FROM messages WHERE id > :start AND id <= :end "
+                "AND typeof(content) = 'text' AND length(CAST(content AS BLOB)) >= :min_bytes"
+            ), {"start": start, "end": start + chunk_size, "min_bytes": settings.CONTENT_COMPRESSION_MIN_BYTES}).all()
+            updates = []
+            for message_id, content in rows:
+                packed = compress_content(content)
+                if packed is not None:
+                    updates.append({"id": message_id, "content": packed})
+                    summary["bytes_before"] += len(content.encode("utf-8"))
+                    summary["bytes_after"] += len(packed)
+            if updates:
+                conn.execute(text("UPDATE messages SET content = :content WHERE id = :id"), updates)
+        summary["messages"] += len(updates)
+        print(f"   🗜️  {summary['messages']:,} messages compressed (id {min(start + chunk_size, high):,}/{high:,})", end="\r")
+    print()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress existing large SwasthAI chat messages")
+    parser.add_argument("--train", action="store_true", help="Train a new dictionary from recent messages first")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help=f"Message ids per transaction (default: {settings.CONTENT_COMPRESSION_CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    from database import init_db
+    init_db()
+    if args.train and train_dictionary() is None:
+        print(f"⚠️  Need at least {MIN_TRAINING_SAMPLES} messages of {settings.CONTENT_COMPRESSION_MIN_BYTES}+ bytes to train")
+    summary = compress_existing_messages(chunk_size=args.chunk_size)
+    saved = summary["bytes_before"] - summary["bytes_after"]
+    print(f"✅ Compressed {summary['messages']:,} messages, saved {saved / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Token-budget-aware context window for the SwasthAI agent
+Fills a fixed input budget with the newest history first and trims oversized turns,
+so prompt size (and therefore latency and cost) stays predictable.
+"""
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from config import settings
+
+ELISION_MARKER = "\n[... earlier part of this reply omitted ...]\n"
+
+# Fixed per-message overhead for role markers and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate (no tokenizer download or API call)
+    
+    Roughly one token per short word or punctuation mark; long words and
+    non-Latin scripts (e.g. Devanagari) split into more tokens.
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text or ""):
+        if piece.isascii():
+            tokens += 1 + len(piece) // 8
+        else:
+            tokens += max(1, len(piece) // 2)
+    return tokens
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Estimated tokens for one chat message, including tool-call arguments"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(f"{tool_call.get('name', '')} {tool_call.get('args', '')}")
+    return tokens
+
+
+def history_message_tokens(role: str, content: str) -> int:
+    """Estimated tokens a stored message will take in build_context (assistant turns are capped)"""
+    tokens = estimate_tokens(content)
+    if role == "assistant":
+        tokens = min(tokens, settings.CONTEXT_MAX_TURN_TOKENS)
+    return tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+def prompt_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Estimated tokens for a full prompt"""
+    return sum(message_tokens(message) for message in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the start and end of a long text within max_tokens, eliding the middle"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Binary-search the character cut that fits, split between head (2/3) and tail (1/3)
+    low, high = 0, len(text)
+    while low < high:
+        keep = (low + high + 1) // 2
+        head, tail = keep * 2 // 3, keep - keep * 2 // 3
+        candidate = text[:head] + ELISION_MARKER + (text[-tail:] if tail else "")
+        if estimate_tokens(candidate) <= max_tokens:
+            low = keep
+        else:
+            high = keep - 1
+    head, tail = low * 2 // 3, low - low * 2 // 3
+    return text[:head] + ELISION_MARKER + (text[-tail:] if tail else "")
+
+
+def build_context(
+    conversation_history: List[Dict[str, str]],
+    user_message: str,
+    reserved_tokens: int = 0,
+    budget: int = None,
+    max_turn_tokens: int = None
+) -> Tuple[List[BaseMessage], int]:
+    """
+    Build the message list for one turn within a token budget
+    
+    Args:
+        conversation_history: Stored messages, oldest first
+        user_message: The new user message (always included)
+        reserved_tokens: Tokens already spent outside these messages (system prompt, summary)
+        budget: Total input budget (defaults to CONTEXT_TOKEN_BUDGET)
+        max_turn_tokens: Cap for any single assistant turn (defaults to CONTEXT_MAX_TURN_TOKENS)
+    
+    Returns:
+        (messages, estimated tokens including reserved_tokens)
+    """
+    budget = budget or settings.CONTEXT_TOKEN_BUDGET
+    max_turn_tokens = max_turn_tokens or settings.CONTEXT_MAX_TURN_TOKENS
+    
+    current = HumanMessage(content=user_message)
+    used = reserved_tokens + message_tokens(current)
+    
+    selected: List[BaseMessage] = []
+    for msg in reversed(conversation_history or []):
+        content = msg["content"]
+        if msg["role"] == "assistant":
+            content = truncate_to_tokens(content, max_turn_tokens)
+            message = AIMessage(content=content)
+        elif msg["role"] == "user":
+            message = HumanMessage(content=content)
+        else:
+            continue
+        
+        tokens = message_tokens(message)
+        remaining = budget - used
+        if tokens > remaining:
+            # Squeeze in a shortened assistant turn if a useful amount still fits
+            if msg["role"] == "assistant" and remaining - MESSAGE_OVERHEAD_TOKENS >= 50:
+                message = AIMessage(content=truncate_to_tokens(content, remaining - MESSAGE_OVERHEAD_TOKENS))
+                tokens = message_tokens(message)
+                if tokens <= remaining:
+                    selected.append(message)
+                    used += tokens
+            break
+        selected.append(message)
+        used += tokens
+    
+    selected.reverse()
+    # History should open with a user turn; drop an orphaned leading reply
+    while selected and isinstance(selected[0], AIMessage):
+        used -= message_tokens(selected.pop(0))
+    
+    return selected + [current], used
@@ -0,0 +1,142 @@
+"""
+Rolling conversation summaries for SwasthAI
+Older messages are folded into a per-user summary after each turn, so prompts carry
+a compact preamble plus only the newest raw messages.
+
+Both sides are sized in tokens: the newest CHAT_HISTORY_TOKEN_BUDGET tokens of
+messages stay verbatim, and only messages older than that are summarized.
+"""
+import threading
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from context_builder import history_message_tokens
+from database import SessionLocal, Message, ConversationSummary
+from metrics import metrics
+from write_behind import sync_user_messages
+
+# Messages fetched per query while paging back through history
+HISTORY_PAGE_SIZE = 20
+
+# Users whose summary is being updated in this process
+_updating = set()
+_updating_lock = threading.Lock()
+
+
+async def load_conversation_context(db: AsyncSession, user_id: int) -> Tuple[List[Dict[str, str]], str]:
+    """
+    Context for the next turn
+    
+    Returns (recent messages in chronological order, rolling summary or "").
+    Raw history starts right after the last summarized message, so messages that
+    have left the raw window but are not folded yet are still sent verbatim. It
+    pages back until the whole prompt budget could be filled; build_context then
+    decides what fits next to the system prompt and summary.
+    """
+    await sync_user_messages(user_id)
+    record = await db.get(ConversationSummary, user_id)
+    last_message_id = record.last_message_id if record else 0
+    
+    recent_messages: List[Message] = []
+    tokens = 0
+    query = select(Message).where(Message.user_id == user_id, Message.id > last_message_id)
+    while tokens < settings.CONTEXT_TOKEN_BUDGET:
+        page_query = query
+        if recent_messages:
+            oldest = recent_messages[-1]
+            page_query = query.where(or_(
+                Message.created_at < oldest.created_at,
+                and_(Message.created_at == oldest.created_at, Message.id < oldest.id)
+            ))
+        result = await db.execute(
+            page_query.order_by(Message.created_at.desc(), Message.id.desc()).limit(HISTORY_PAGE_SIZE)
+        )
+        page = list(result.scalars())
+        for msg in page:
+            recent_messages.append(msg)
+            tokens += history_message_tokens(msg.role, msg.content)
+            if tokens >= settings.CONTEXT_TOKEN_BUDGET:
+                break
+        if len(page) < HISTORY_PAGE_SIZE:
+            break
+    recent_messages.reverse()
+    
+    history = [{"role": msg.role, "content": msg.content} for msg in recent_messages]
+    return history, record.summary if record else ""
+
+
+def _raw_window_start(db, user_id: int) -> int:
+    """Id of the oldest message within the newest CHAT_HISTORY_TOKEN_BUDGET tokens (0 if none)"""
+    window_start, tokens, before_id = 0, 0, None
+    while True:
+        query = db.query(Message.id, Message.role, Message.content).filter(Message.user_id == user_id)
+        if before_id is not None:
+            query = query.filter(Message.id < before_id)
+        page = query.order_by(Message.id.desc()).limit(HISTORY_PAGE_SIZE).all()
+        for message_id, role, content in page:
+            tokens += history_message_tokens(role, content)
+            if tokens > settings.CHAT_HISTORY_TOKEN_BUDGET and window_start:
+                return window_start
+            window_start = message_id
+        if len(page) < HISTORY_PAGE_SIZE:
+            return window_start
+        before_id = page[-1].id
+
+
+def update_conversation_summary(user_id: int):
+    """
+    Fold messages that have aged out of the raw window into the user's summary
+    
+    Meant to run as a background task after a turn has been saved. Does nothing
+    until enough messages are pending, so most turns cost no extra LLM call.
+    """
+    with _updating_lock:
+        if user_id in _updating:
+            return
+        _updating.add(user_id)
+    
+    db = SessionLocal()
+    try:
+        record = db.query(ConversationSummary).filter(ConversationSummary.user_id == user_id).first()
+        last_message_id = record.last_message_id if record else 0
+        
+        # Everything newer than the summary except the raw window the prompt already carries
+        window_start = _raw_window_start(db, user_id)
+        if not window_start:
+            return
+        pending = db.query(Message).filter(
+            Message.user_id == user_id,
+            Message.id > last_message_id,
+            Message.id < window_start
+        ).order_by(Message.id.asc()).limit(settings.SUMMARY_MAX_BATCH_MESSAGES).all()
+        
+        if len(pending) < settings.SUMMARY_MIN_PENDING_MESSAGES:
+            return
+        
+        from ai_agent import get_agent
+        summary = get_agent().summarize(
+            record.summary if record else "",
+            [{"role": msg.role, "content": msg.content} for msg in pending]
+        )
+        if not summary:
+            return
+        
+        if record is None:
+            record = ConversationSummary(user_id=user_id)
+            db.add(record)
+        record.summary = summary
+        record.last_message_id = pending[-1].id
+        db.commit()
+        metrics.incr("conversation_summary.updated")
+        metrics.observe("conversation_summary.folded_messages", len(pending))
+    except Exception as e:
+        db.rollback()
+        metrics.incr("conversation_summary.failed")
+        print(f"Conversation summary update failed for user {user_id}: {e}")
+    finally:
+        db.close()
+        with _updating_lock:
+            _updating.discard(user_id)
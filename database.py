@@ -1,21 +1,111 @@
 """
 Database models and connection setup for SwasthAI Chat MVP
 """
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from collections import Counter
+from datetime import datetime, date
+from typing import Dict, Optional
+
+from sqlalchemy import (
+    create_engine, event, func, inspect, select, update, insert, Index,
+    Column, Integer, BigInteger, String, Text, Date, DateTime, ForeignKey, Boolean, LargeBinary,
+    UniqueConstraint
+)
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime
+from sqlalchemy.orm import sessionmaker, relationship, column_property, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
+from content_compression import CompressedText
+
+def engine_options(url: str) -> dict:
+    """create_engine / create_async_engine arguments for the configured DATABASE_PROFILE"""
+    is_sqlite = url.startswith("sqlite")
+    options = {}
+    connect_args = {}
+    if is_sqlite and "+aiosqlite" not in url:
+        connect_args["check_same_thread"] = False
+    
+    if settings.DATABASE_PROFILE == "production":
+        options["query_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        options["pool_timeout"] = settings.DB_POOL_TIMEOUT_SECONDS
+        if not is_sqlite:
+            # Postgres: a fixed pool that detects connections dropped by the server or a proxy
+            options.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+                pool_pre_ping=True,
+            )
+        elif "+aiosqlite" in url and ":memory:" not in url and "mode=memory" not in url:
+            # aiosqlite defaults to NullPool (a new connection and pragma round per session).
+            # SQLite has a single writer, so a few pooled connections beat many that
+            # spin in the busy handler.
+            options.update(poolclass=AsyncAdaptedQueuePool, pool_size=settings.SQLITE_POOL_SIZE, max_overflow=0)
+        else:
+            options.pop("pool_timeout")
+        if "+asyncpg" in url:
+            # asyncpg's own per-connection cache of prepared statements
+            connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def _sqlite_pragmas() -> list:
+    return [
+        "PRAGMA journal_mode=WAL",  # Readers no longer block the writer (and vice versa)
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_MB * 1024}",  # Negative = KiB
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """Apply the production pragmas to every new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def tune_engine(target_engine):
+    """Register per-connection setup for the configured DATABASE_PROFILE"""
+    if settings.DATABASE_PROFILE == "production" and target_engine.dialect.name == "sqlite":
+        event.listen(target_engine, "connect", _configure_sqlite_connection)
+    return target_engine
+
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+engine = tune_engine(create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL)))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """The same database through an asyncio driver (aiosqlite for SQLite, asyncpg for Postgres)"""
+    scheme, _, rest = url.partition("://")
+    driver = {
+        "sqlite": "sqlite+aiosqlite",
+        "postgres": "postgresql+asyncpg",
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+    }.get(scheme, scheme)
+    return f"{driver}://{rest}"
+
+
+# Async engine and sessions for request handlers, so queries don't block the event loop.
+# expire_on_commit=False: attributes stay readable after commit without a (sync) reload.
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+tune_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -28,11 +118,15 @@ class User(Base):
     username = Column(String(50), unique=True, nullable=False, index=True)
     full_name = Column(String(100), nullable=False)
     hashed_password = Column(String(255), nullable=False)
-    is_admin = Column(Boolean, default=False, nullable=False)
+    # active_history: load the old value on change so admin promotions can be counted
+    is_admin = column_property(Column(Boolean, default=False, nullable=False), active_history=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
     messages = relationship("Message", back_populates="user", cascade="all, delete-orphan")
+    conversation_summary = relationship(
+        "ConversationSummary", back_populates="user", uselist=False, cascade="all, delete-orphan"
+    )
     
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', is_admin={self.is_admin})>"
@@ -43,11 +137,14 @@ class Message(Base):
     __tablename__ = "messages"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     role = Column(String(20), nullable=False)  # 'user' or 'assistant'
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)  # Large values stored compressed
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
+    # History is always read per user, newest first (see migrations.py, version 2)
+    __table_args__ = (Index("ix_messages_user_created_id", "user_id", "created_at", "id"),)
+    
     # Relationship
     user = relationship("User", back_populates="messages")
     
@@ -55,6 +152,236 @@ class Message(Base):
         return f"<Message(id={self.id}, role='{self.role}', user_id={self.user_id})>"
 
 
+class MessageArchive(Base):
+    """Compressed block of one user's messages from one month, moved out of `messages` (see archive.py)"""
+    __tablename__ = "message_archives"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(String(7), nullable=False)  # "YYYY-MM"
+    message_count = Column(Integer, nullable=False)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    last_message_id = Column(Integer, nullable=False)
+    codec = Column(String(10), nullable=False)  # "zlib" or "zstd"
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (UniqueConstraint("user_id", "month", name="uq_message_archives_user_month"),)
+    
+    def __repr__(self):
+        return f"<MessageArchive(user_id={self.user_id}, month='{self.month}', messages={self.message_count})>"
+
+
+class ContentDictionary(Base):
+    """Trained compression dictionary shared by message contents (see content_compression.py)"""
+    __tablename__ = "content_dictionaries"
+    
+    id = Column(Integer, primary_key=True)
+    codec = Column(String(10), nullable=False)  # "zlib" or "zstd"
+    data = Column(LargeBinary, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ConversationSummary(Base):
+    """Rolling summary of a user's older chat history"""
+    __tablename__ = "conversation_summaries"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    summary = Column(Text, nullable=False, default="")
+    last_message_id = Column(Integer, nullable=False, default=0)  # Newest message folded into the summary
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationship
+    user = relationship("User", back_populates="conversation_summary")
+    
+    def __repr__(self):
+        return f"<ConversationSummary(user_id={self.user_id}, last_message_id={self.last_message_id})>"
+
+
+class PlatformStat(Base):
+    """Running platform-wide counter (users, admins, messages), kept in step with writes"""
+    __tablename__ = "platform_stats"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<PlatformStat(name='{self.name}', value={self.value})>"
+
+
+class DailyStat(Base):
+    """Per-day activity bucket: sign-ups and messages created that (UTC) day"""
+    __tablename__ = "daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    new_users = Column(Integer, nullable=False, default=0)
+    messages = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DailyStat(day={self.day}, new_users={self.new_users}, messages={self.messages})>"
+
+
+# ==================== PLATFORM STATS ====================
+# Totals and daily buckets are updated inside the same transaction as the rows
+# they count, so /api/admin/stats never has to scan users or messages.
+# Daily buckets record activity: deleting a message later lowers the running
+# total but not the day it was sent on.
+
+STAT_NAMES = ("users", "admins", "messages")
+
+
+def _day(value: Optional[datetime]) -> date:
+    return (value or datetime.utcnow()).date()
+
+
+def _upsert_daily(connection, day: date, new_users: int, messages: int):
+    """Add to one day's bucket, creating it if needed"""
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(DailyStat).values(day=day, new_users=new_users, messages=messages)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyStat.day],
+            set_={
+                "new_users": DailyStat.new_users + stmt.excluded.new_users,
+                "messages": DailyStat.messages + stmt.excluded.messages,
+            }
+        ))
+        return
+    
+    result = connection.execute(
+        update(DailyStat).where(DailyStat.day == day).values(
+            new_users=DailyStat.new_users + new_users, messages=DailyStat.messages + messages
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(DailyStat).values(day=day, new_users=new_users, messages=messages))
+
+
+def daily_counts(rows: list, key: str) -> Dict[date, Counter]:
+    """day -> Counter({key: rows created that day}) for record_stats, from row dicts with created_at"""
+    daily: Dict[date, Counter] = {}
+    for row in rows:
+        daily.setdefault(_day(row.get("created_at")), Counter())[key] += 1
+    return daily
+
+
+def record_stats(connection, totals: Dict[str, int], daily: Optional[Dict[date, Counter]] = None):
+    """
+    Apply counter deltas on an open connection (inside the caller's transaction)
+    
+    Args:
+        totals: name -> delta for the running totals, e.g. {"messages": 2}
+        daily: day -> Counter(new_users=..., messages=...) to add to the buckets
+    """
+    for name, delta in totals.items():
+        if delta:
+            connection.execute(
+                update(PlatformStat).where(PlatformStat.name == name).values(value=PlatformStat.value + delta)
+            )
+    for day, counts in (daily or {}).items():
+        if counts["new_users"] or counts["messages"]:
+            _upsert_daily(connection, day, counts["new_users"], counts["messages"])
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_rows(session, flush_context):
+    """Turn the rows written by this flush into counter deltas (one UPDATE per counter)"""
+    totals = Counter()
+    daily: Dict[date, Counter] = {}
+    
+    for obj in session.new:
+        if isinstance(obj, User):
+            totals["users"] += 1
+            totals["admins"] += 1 if obj.is_admin else 0
+            daily.setdefault(_day(obj.created_at), Counter())["new_users"] += 1
+        elif isinstance(obj, Message):
+            totals["messages"] += 1
+            daily.setdefault(_day(obj.created_at), Counter())["messages"] += 1
+    
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            totals["users"] -= 1
+            totals["admins"] -= 1 if inspect(obj).dict.get("is_admin") else 0  # No reload of a deleted row
+        elif isinstance(obj, Message):
+            totals["messages"] -= 1
+    
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            added, _, removed = inspect(obj).attrs.is_admin.history
+            if added and removed and bool(added[0]) != bool(removed[0]):
+                totals["admins"] += 1 if added[0] else -1
+    
+    if totals or daily:
+        record_stats(session.connection(), totals, daily)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_delete(orm_execute_state):
+    """Keep totals right for bulk deletes (query(...).delete() or delete(Model)), which bypass the flush"""
+    if not orm_execute_state.is_delete or orm_execute_state.bind_mapper is None:
+        return None
+    model = orm_execute_state.bind_mapper.class_
+    if model is not Message and model is not User:
+        return None
+    
+    result = orm_execute_state.invoke_statement()
+    removed = result.rowcount
+    if removed:
+        connection = orm_execute_state.session.connection()
+        if model is Message:
+            record_stats(connection, {"messages": -removed})
+        else:
+            # The deleted rows are gone; recount admins from the (small) users table
+            admins = connection.execute(select(func.count()).select_from(User).where(User.is_admin == True)).scalar()
+            connection.execute(update(PlatformStat).where(PlatformStat.name == "admins").values(value=admins))
+            record_stats(connection, {"users": -removed})
+    return result
+
+
+def rebuild_platform_stats():
+    """Recompute every counter and daily bucket from the base tables (full scan; daily buckets only see unarchived messages)"""
+    with engine.begin() as conn:
+        totals = {
+            "users": conn.execute(select(func.count()).select_from(User)).scalar(),
+            "admins": conn.execute(select(func.count()).select_from(User).where(User.is_admin == True)).scalar(),
+            "messages": conn.execute(select(func.count()).select_from(Message)).scalar()
+            + conn.execute(select(func.coalesce(func.sum(MessageArchive.message_count), 0))).scalar(),
+        }
+        daily: Dict[date, Counter] = {}
+        for column, model, key in ((User.created_at, User, "new_users"), (Message.created_at, Message, "messages")):
+            day = func.date(column)
+            for value, count in conn.execute(select(day, func.count()).select_from(model).group_by(day)):
+                if value is not None:
+                    day_value = value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+                    daily.setdefault(day_value, Counter())[key] += count
+        
+        conn.execute(PlatformStat.__table__.delete())
+        conn.execute(DailyStat.__table__.delete())
+        conn.execute(insert(PlatformStat), [{"name": name, "value": totals[name]} for name in STAT_NAMES])
+        if daily:
+            conn.execute(insert(DailyStat), [
+                {"day": day, "new_users": counts["new_users"], "messages": counts["messages"]}
+                for day, counts in daily.items()
+            ])
+    return totals
+
+
+def ensure_platform_stats():
+    """Backfill the counters once, for databases created before they existed"""
+    with engine.connect() as conn:
+        present = conn.execute(select(func.count()).select_from(PlatformStat)).scalar()
+    if present < len(STAT_NAMES):
+        totals = rebuild_platform_stats()
+        print(f"📊 Platform stats backfilled ({totals['users']:,} users, {totals['messages']:,} messages)")
+
+
 # Database dependency
 def get_db():
     """Dependency for getting database session"""
@@ -65,10 +392,21 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for getting an async database session (used by the API routes)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # Create all tables
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    from migrations import run_migrations
+    run_migrations()
+    from content_compression import load_dictionaries
+    load_dictionaries()
+    ensure_platform_stats()
     print("✅ Database initialized successfully")
 
 
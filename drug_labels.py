@@ -0,0 +1,210 @@
+"""
+Local OpenFDA drug-label store for SwasthAI
+Compact SQLite lookup of label warnings and indications by brand or generic name,
+with Indian brand and international name aliases
+"""
+import functools
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from config import settings
+
+# Longest text kept per field; check_drug_interactions shows at most this much
+MAX_FIELD_CHARS = 500
+
+# Indian brands and international (INN) names -> the US names OpenFDA labels use
+DRUG_ALIASES = {
+    "paracetamol": "acetaminophen",
+    "crocin": "acetaminophen",
+    "dolo": "acetaminophen",
+    "calpol": "acetaminophen",
+    "brufen": "ibuprofen",
+    "disprin": "aspirin",
+    "ecosprin": "aspirin",
+    "salbutamol": "albuterol",
+    "asthalin": "albuterol",
+    "adrenaline": "epinephrine",
+    "noradrenaline": "norepinephrine",
+    "frusemide": "furosemide",
+    "lasix": "furosemide",
+    "lignocaine": "lidocaine",
+    "glibenclamide": "glyburide",
+    "glycomet": "metformin",
+    "pethidine": "meperidine",
+    "thyronorm": "levothyroxine",
+    "eltroxin": "levothyroxine",
+    "pan": "pantoprazole",
+    "pantocid": "pantoprazole",
+    "omez": "omeprazole",
+    "cetzine": "cetirizine",
+    "okacet": "cetirizine",
+    "montair": "montelukast",
+    "azithral": "azithromycin",
+    "azee": "azithromycin",
+    "amlong": "amlodipine",
+    "telma": "telmisartan",
+}
+
+# Dosage-form words dropped from a name along with strengths ("Dolo 650 tablet" -> "dolo")
+DOSAGE_FORM_WORDS = {
+    "tablet", "tablets", "tab", "tabs", "capsule", "capsules", "cap", "caps", "syrup",
+    "suspension", "injection", "drops", "cream", "gel", "ointment", "mg", "mcg", "ml",
+}
+
+
+def normalize_drug_name(name: str) -> str:
+    """Normalize a drug name for lookup"""
+    return " ".join(name.lower().split())
+
+
+def drug_name_candidates(name: str) -> List[str]:
+    """Names to try for a drug, in order: as given, without strength/form, and their aliases"""
+    normalized = normalize_drug_name(name)
+    stripped = " ".join(
+        word for word in normalized.split()
+        if word not in DOSAGE_FORM_WORDS and not any(c.isdigit() for c in word)
+    )
+    candidates = []
+    for candidate in (normalized, stripped, DRUG_ALIASES.get(normalized), DRUG_ALIASES.get(stripped)):
+        if candidate and candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+
+class DrugLabelStore:
+    """Drug label fields keyed by every brand and generic name on the label"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def create(self):
+        """Create empty tables, replacing any existing data"""
+        conn = self._connection()
+        conn.executescript("""
+            DROP TABLE IF EXISTS drug_names;
+            DROP TABLE IF EXISTS drug_labels;
+            CREATE TABLE drug_labels (
+                id INTEGER PRIMARY KEY,
+                warnings TEXT,
+                indications TEXT
+            );
+            CREATE TABLE drug_names (
+                name TEXT PRIMARY KEY,
+                label_id INTEGER NOT NULL REFERENCES drug_labels(id)
+            ) WITHOUT ROWID;
+        """)
+        conn.commit()
+        # Names that missed before may exist now, and old hits may be gone
+        _cached_lookup.cache_clear()
+
+    def add_label(self, names: Iterable[str], warnings: Optional[str], indications: Optional[str]) -> bool:
+        """
+        Store one label under all of its names
+
+        The first label seen for a name wins. Returns False if every name was already taken.
+        """
+        conn = self._connection()
+        names = {normalize_drug_name(name) for name in names if name and name.strip()}
+        taken = {
+            row[0] for row in conn.execute(
+                f"SELECT name FROM drug_names WHERE name IN ({','.join('?' * len(names))})", tuple(names)
+            )
+        } if names else set()
+        new_names = names - taken
+        if not new_names:
+            return False
+
+        cursor = conn.execute(
+            "INSERT INTO drug_labels (warnings, indications) VALUES (?, ?)",
+            (warnings[:MAX_FIELD_CHARS] if warnings else None, indications[:MAX_FIELD_CHARS] if indications else None)
+        )
+        conn.executemany(
+            "INSERT INTO drug_names (name, label_id) VALUES (?, ?)",
+            [(name, cursor.lastrowid) for name in new_names]
+        )
+        return True
+
+    def commit(self):
+        self._connection().commit()
+
+    def lookup(self, name: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """(warnings, indications) for a drug name, or None"""
+        return self._connection().execute(
+            """
+            SELECT l.warnings, l.indications
+            FROM drug_names n JOIN drug_labels l ON l.id = n.label_id
+            WHERE n.name = ?
+            """,
+            (normalize_drug_name(name),)
+        ).fetchone()
+
+    def lookup_prefix(self, name: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """Like lookup, for the shortest name that starts with these words ("metformin" -> "metformin hydrochloride")"""
+        prefix = normalize_drug_name(name) + " "
+        # Every name starting with "<prefix> " sorts before "<prefix>!"
+        return self._connection().execute(
+            """
+            SELECT l.warnings, l.indications
+            FROM drug_names n JOIN drug_labels l ON l.id = n.label_id
+            WHERE n.name >= ? AND n.name < ?
+            ORDER BY length(n.name), n.name
+            LIMIT 1
+            """,
+            (prefix, prefix[:-1] + "!")
+        ).fetchone()
+
+
+# Global store instance
+_drug_label_store = None
+
+
+def get_drug_label_store() -> DrugLabelStore:
+    """Get or create the global drug label store"""
+    global _drug_label_store
+    if _drug_label_store is None:
+        _drug_label_store = DrugLabelStore(settings.DRUG_LABEL_DB_PATH)
+    return _drug_label_store
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_lookup(normalized_name: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Exact names and aliases first, then whole-word prefixes
+
+    A miss raises LookupError rather than returning None: lru_cache does not keep
+    exceptions, so a drug added by a later rebuild is found without a restart.
+    """
+    store = get_drug_label_store()
+    candidates = drug_name_candidates(normalized_name)
+    for lookup in (store.lookup, store.lookup_prefix):
+        for candidate in candidates:
+            label = lookup(candidate)
+            if label:
+                return label
+    raise LookupError(normalized_name)
+
+
+def lookup_local_drug_label(drug_name: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """
+    Look up a drug in the local store
+
+    Returns (warnings, indications), or None when the store is missing or has no entry.
+    """
+    # Don't let sqlite3.connect create an empty file when no store was built
+    if not os.path.exists(settings.DRUG_LABEL_DB_PATH):
+        return None
+    try:
+        return _cached_lookup(normalize_drug_name(drug_name))
+    except (LookupError, sqlite3.Error):
+        return None
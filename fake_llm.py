@@ -0,0 +1,253 @@
+"""
+Offline stand-ins for load and latency testing (AI_PROVIDER=fake)
+A scripted chat model with realistic timing, and fixture-backed versions of the
+network tools, so the whole app runs on an isolated machine without API quota.
+"""
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool, StructuredTool
+
+from config import settings
+from tool_cache import normalize_query
+
+# Keyword rules deciding which tool the scripted model calls, checked in order
+TOOL_RULES = [
+    (r"\b(bmi|weight|height)\b", "calculate_bmi"),
+    (r"\b(tablet|medicine|dawai|dawa|paracetamol|ibuprofen|aspirin|metformin|amoxicillin|dose)\b", "check_drug_interactions"),
+    (r"\b(hospital|clinic|doctor near|nearby|phc)\b", "search_nearby_facilities"),
+    (r"\b(chest pain|unconscious|bleeding|snake|poison|burn|stroke)\b", "get_emergency_guidance"),
+    (r"\b(tips|healthy|diet|exercise|hydration|sleep)\b", "general_health_tips"),
+    (r"\b(latest|news|research|outbreak)\b", "search_medical_info"),
+]
+DEFAULT_TOOL = "search_wikipedia_medical"
+
+ANSWER_PHRASES = [
+    "Based on what you have described,", "it is important to", "rest well and drink plenty of fluids.",
+    "Common symptoms include", "fever, body ache, headache and tiredness.", "You can take",
+    "paracetamol for fever, as directed on the label.", "Avoid self-medicating with antibiotics.",
+    "Please see a doctor if", "symptoms last more than three days", "or get worse.",
+    "Watch for warning signs such as", "difficulty breathing, confusion or persistent vomiting.",
+    "Eat light, home-cooked food", "and keep your surroundings clean.",
+]
+DISCLAIMER = "This is general information, not a diagnosis. Please consult a healthcare professional."
+
+
+def _lognormal_seconds(rng: random.Random, median_ms: float, sigma: float) -> float:
+    """Sample a latency (seconds) from a log-normal distribution with the given median"""
+    return max(0.0, median_ms * math.exp(sigma * rng.gauss(0, 1)) / 1000)
+
+
+def _last_human_text(messages: Sequence[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else str(message.content)
+    return ""
+
+
+# ==================== SCRIPTED MODEL ====================
+
+class FakeMedicalChatModel(BaseChatModel):
+    """
+    Deterministic scripted chat model
+
+    The same conversation always produces the same tool calls, text and timing
+    (seeded from FAKE_LLM_SEED and the latest user message). On a user turn it
+    calls a keyword-matched tool with probability FAKE_LLM_TOOL_CALL_RATE;
+    after tool results it answers with about FAKE_LLM_OUTPUT_TOKENS tokens.
+    """
+
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "swasthai-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeMedicalChatModel":
+        return FakeMedicalChatModel(tool_names=[t.name if isinstance(t, BaseTool) else str(t) for t in tools])
+
+    # ---------- Script ----------
+
+    def _rng(self, messages: Sequence[BaseMessage]) -> random.Random:
+        rounds = sum(1 for m in messages if isinstance(m, ToolMessage))
+        return random.Random(f"{settings.FAKE_LLM_SEED}:{rounds}:{_last_human_text(messages)}")
+
+    def _tool_call(self, rng: random.Random, messages: Sequence[BaseMessage]) -> Optional[Dict[str, Any]]:
+        """Tool call to emit for this turn, or None to answer directly"""
+        if not self.tool_names or isinstance(messages[-1], ToolMessage):
+            return None
+        if rng.random() >= settings.FAKE_LLM_TOOL_CALL_RATE:
+            return None
+
+        text = _last_human_text(messages).lower()
+        name = next((tool for pattern, tool in TOOL_RULES if re.search(pattern, text)), DEFAULT_TOOL)
+        if name not in self.tool_names:
+            name = DEFAULT_TOOL if DEFAULT_TOOL in self.tool_names else self.tool_names[0]
+
+        topic = " ".join(re.findall(r"[a-z]+", text)[:6]) or "general health"
+        args = {
+            "calculate_bmi": {"weight_kg": 60.0, "height_cm": 165.0},
+            "check_drug_interactions": {"drug_name": next(
+                (w for w in text.split() if w in {"paracetamol", "ibuprofen", "aspirin", "metformin", "amoxicillin"}),
+                "paracetamol"
+            )},
+            "get_emergency_guidance": {"symptom": topic},
+            "search_nearby_facilities": {"location": "village", "facility_type": "hospital"},
+            "general_health_tips": {"topic": topic},
+        }.get(name, {"query": topic})
+        return {"name": name, "args": args, "id": f"call_{rng.getrandbits(48):012x}", "type": "tool_call"}
+
+    def _answer_tokens(self, rng: random.Random, messages: Sequence[BaseMessage]) -> List[str]:
+        """Answer text split into stream tokens"""
+        count = max(10, int(rng.gauss(settings.FAKE_LLM_OUTPUT_TOKENS, settings.FAKE_LLM_OUTPUT_TOKENS * 0.2)))
+        tool_words = []
+        if isinstance(messages[-1], ToolMessage):
+            tool_words = str(messages[-1].content).split()[:40]
+
+        words: List[str] = []
+        while len(words) < count - len(DISCLAIMER.split()):
+            if tool_words and rng.random() < 0.3:
+                start = rng.randrange(len(tool_words))
+                words.extend(tool_words[start:start + 8])
+            else:
+                words.extend(rng.choice(ANSWER_PHRASES).split())
+        words = words[:count - len(DISCLAIMER.split())] + DISCLAIMER.split()
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    def _plan(self, messages: Sequence[BaseMessage]):
+        """(tool_call or None, tokens, time to first token, delay per token)"""
+        rng = self._rng(messages)
+        tool_call = self._tool_call(rng, messages)
+        tokens = [] if tool_call else self._answer_tokens(rng, messages)
+        first_token = _lognormal_seconds(rng, settings.FAKE_LLM_FIRST_TOKEN_MS, settings.FAKE_LLM_LATENCY_SIGMA)
+        per_token = 1 / settings.FAKE_LLM_TOKENS_PER_SECOND if settings.FAKE_LLM_TOKENS_PER_SECOND > 0 else 0
+        return tool_call, tokens, first_token, per_token
+
+    @staticmethod
+    def _message(tool_call: Optional[Dict[str, Any]], tokens: List[str]) -> AIMessage:
+        if tool_call:
+            return AIMessage(content="", tool_calls=[tool_call])
+        return AIMessage(content="".join(tokens))
+
+    # ---------- Model API ----------
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tool_call, tokens, first_token, per_token = self._plan(messages)
+        time.sleep(first_token + per_token * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=self._message(tool_call, tokens))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tool_call, tokens, first_token, per_token = self._plan(messages)
+        await asyncio.sleep(first_token + per_token * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=self._message(tool_call, tokens))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tool_call, tokens, first_token, per_token = self._plan(messages)
+        time.sleep(first_token)
+        if tool_call:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[{
+                "name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"], "index": 0
+            }]))
+            return
+        for token in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            time.sleep(per_token)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tool_call, tokens, first_token, per_token = self._plan(messages)
+        await asyncio.sleep(first_token)
+        if tool_call:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[{
+                "name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"], "index": 0
+            }]))
+            return
+        for token in tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            await asyncio.sleep(per_token)
+
+
+# ==================== TOOL FIXTURES ====================
+
+_fixtures: Optional[Dict[str, Any]] = None
+
+
+def load_tool_fixtures() -> Dict[str, Any]:
+    """Recorded tool responses and latencies from FAKE_TOOL_FIXTURES_PATH"""
+    global _fixtures
+    if _fixtures is None:
+        with open(settings.FAKE_TOOL_FIXTURES_PATH, encoding="utf-8") as f:
+            _fixtures = json.load(f)
+    return _fixtures
+
+
+def _fixture_response(tool_name: str, query: str) -> str:
+    fixture = load_tool_fixtures()[tool_name]
+    key = normalize_query(query)
+    responses = fixture["responses"]
+    if key in responses:
+        return responses[key]
+    # Fall back to the first recorded query mentioned in the argument, then the default
+    match = next((response for recorded, response in responses.items() if recorded in key), None)
+    return match or fixture["default"].format(query=query)
+
+
+def _fixture_latency(tool_name: str, query: str) -> float:
+    latency = load_tool_fixtures()[tool_name].get("latency_ms", {})
+    rng = random.Random(f"{settings.FAKE_LLM_SEED}:{tool_name}:{normalize_query(query)}")
+    return _lognormal_seconds(rng, latency.get("median", 0), latency.get("sigma", 0))
+
+
+def fixture_tool(original: BaseTool) -> BaseTool:
+    """Same name, description and arguments as a network tool, answered from fixtures"""
+    arg_name = next(iter(original.args))
+
+    def run(**kwargs) -> str:
+        query = str(kwargs[arg_name])
+        time.sleep(_fixture_latency(original.name, query))
+        return _fixture_response(original.name, query)
+
+    async def arun(**kwargs) -> str:
+        query = str(kwargs[arg_name])
+        await asyncio.sleep(_fixture_latency(original.name, query))
+        return _fixture_response(original.name, query)
+
+    return StructuredTool(
+        name=original.name,
+        description=original.description,
+        args_schema=original.args_schema,
+        func=run,
+        coroutine=arun,
+    )
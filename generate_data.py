@@ -0,0 +1,218 @@
+"""
+Synthetic Data Generator for SwasthAI
+Bulk-loads realistic users and chat messages for scale testing and benchmarks
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, text
+
+from database import engine, init_db, daily_counts, record_stats, SessionLocal, User, Message, MessageArchive
+from auth import get_password_hash
+
+# Every generated user shares this prefix so the data can be removed again
+USERNAME_PREFIX = "synth_"
+DEFAULT_PASSWORD = "synthetic-password"
+
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Anita", "Vikram", "Sunita", "Arjun", "Kavya", "Ravi", "Meena",
+               "Suresh", "Lakshmi", "Imran", "Fatima", "Gurpreet", "Harpreet", "Joseph", "Mary", "Deepak", "Pooja"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Singh", "Kumar", "Yadav", "Reddy", "Nair", "Khan", "Das",
+              "Gupta", "Mishra", "Iyer", "Joshi", "Chauhan", "Thomas", "Ansari", "Mehta", "Rao", "Pillai"]
+
+CONDITIONS = ["fever", "dengue", "malaria", "typhoid", "diabetes", "high blood pressure", "cough", "cold",
+              "headache", "stomach pain", "diarrhoea", "back pain", "skin rash", "asthma", "anaemia"]
+DRUGS = ["paracetamol", "ibuprofen", "metformin", "amoxicillin", "cetirizine", "ORS", "aspirin", "omeprazole"]
+QUESTION_TEMPLATES = [
+    "What are the symptoms of {condition}?",
+    "I have had {condition} for {days} days, what should I do?",
+    "Can I take {drug} for {condition}?",
+    "{condition} ke lakshan kya hain?",
+    "My child has {condition} since {days} days. Is it serious?",
+    "How to prevent {condition} in the rainy season?",
+    "What is the dose of {drug} for an adult?",
+    "Is {drug} safe during pregnancy?",
+]
+ANSWER_PARAGRAPHS = [
+    "Based on what you have described, {condition} is common and most mild cases improve with rest, fluids and simple care at home.",
+    "Common symptoms of {condition} include tiredness, body ache and a general feeling of being unwell. Keep track of how long they last.",
+    "You can take {drug} as directed on the label, but do not exceed the recommended dose and avoid combining it with other medicines without advice.",
+    "Drink plenty of clean water, ORS or coconut water, eat light home-cooked food and get enough sleep while you recover.",
+    "⚠️ Please see a doctor or visit the nearest PHC if symptoms last more than three days, get worse, or if you notice difficulty breathing, confusion or bleeding.",
+    "To prevent {condition}, wash hands regularly, use mosquito nets and repellents, and avoid stagnant water around your home.",
+    "This is general health information, not a diagnosis. Please consult a qualified healthcare professional for advice specific to you.",
+]
+
+
+def _question(rng: random.Random) -> str:
+    return rng.choice(QUESTION_TEMPLATES).format(
+        condition=rng.choice(CONDITIONS), drug=rng.choice(DRUGS), days=rng.randint(1, 10)
+    )
+
+
+def _answer(rng: random.Random) -> str:
+    condition, drug = rng.choice(CONDITIONS), rng.choice(DRUGS)
+    paragraphs = rng.sample(ANSWER_PARAGRAPHS, rng.randint(3, 6))
+    return "\n\n".join(p.format(condition=condition, drug=drug) for p in paragraphs)
+
+
+def _message_counts(rng: random.Random, users: int, messages: int) -> list:
+    """Split the message total across users with a heavy tail (a few very active users)"""
+    weights = [rng.paretovariate(1.2) for _ in range(users)]
+    scale = messages / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    # Hand out the rounding remainder so the total is exact
+    for i in rng.sample(range(users), messages - sum(counts)) if messages > sum(counts) else []:
+        counts[i] += 1
+    return counts
+
+
+def _fast_bulk_load():
+    """Relax durability for the load (SQLite only); the data is disposable"""
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("PRAGMA journal_mode=WAL"))
+            conn.execute(text("PRAGMA synchronous=OFF"))
+
+
+def generate(users: int, messages: int, days: int = 180, batch_size: int = 10000, seed: int = 42) -> dict:
+    """
+    Insert synthetic users and messages
+
+    Args:
+        users: Number of users to create
+        messages: Total number of messages across all users
+        days: Spread account and message timestamps over this many past days
+        batch_size: Rows per INSERT batch
+        seed: Random seed (same seed, same data)
+
+    Returns:
+        Summary with counts and timings
+    """
+    rng = random.Random(seed)
+    init_db()
+    _fast_bulk_load()
+
+    # bcrypt is deliberately slow; one hash shared by every synthetic user
+    hashed_password = get_password_hash(DEFAULT_PASSWORD)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    with engine.connect() as conn:
+        first_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM users")).scalar() + 1
+
+    user_rows = []
+    created_at = {}
+    for i in range(users):
+        user_id = first_id + i
+        joined = now - timedelta(days=rng.uniform(0, days))
+        created_at[user_id] = joined
+        user_rows.append({
+            "id": user_id,
+            "username": f"{USERNAME_PREFIX}{user_id:08d}",
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "hashed_password": hashed_password,
+            "is_admin": False,
+            "created_at": joined,
+        })
+
+    # Core inserts skip the ORM flush hooks, so platform stats are recorded per batch
+    with engine.begin() as conn:
+        for start in range(0, len(user_rows), batch_size):
+            rows = user_rows[start:start + batch_size]
+            conn.execute(insert(User), rows)
+            record_stats(conn, {"users": len(rows)}, daily_counts(rows, "new_users"))
+    users_seconds = time.perf_counter() - started
+    print(f"👥 Inserted {users:,} users in {users_seconds:.1f}s")
+
+    counts = _message_counts(rng, users, messages) if users else []
+    batch = []
+    inserted = 0
+
+    def flush():
+        nonlocal inserted
+        with engine.begin() as conn:
+            conn.execute(insert(Message), batch)
+            record_stats(conn, {"messages": len(batch)}, daily_counts(batch, "messages"))
+        inserted += len(batch)
+        batch.clear()
+        print(f"   💬 {inserted:,}/{messages:,} messages", end="\r")
+
+    for offset, count in enumerate(counts):
+        user_id = first_id + offset
+        # Alternate user/assistant turns at increasing times after the account was created
+        timestamp = created_at[user_id]
+        span = max(1.0, (now - timestamp).total_seconds())
+        for n in range(count):
+            role = "user" if n % 2 == 0 else "assistant"
+            if role == "user":
+                timestamp = min(now, timestamp + timedelta(seconds=rng.uniform(0, span / max(1, count))))
+            else:
+                timestamp = timestamp + timedelta(seconds=rng.uniform(2, 20))
+            batch.append({
+                "user_id": user_id,
+                "role": role,
+                "content": _question(rng) if role == "user" else _answer(rng),
+                "created_at": timestamp,
+            })
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+
+    total_seconds = time.perf_counter() - started
+    print(f"\n✅ Inserted {inserted:,} messages in {total_seconds - users_seconds:.1f}s")
+    return {
+        "users": users,
+        "messages": inserted,
+        "first_user_id": first_id,
+        "max_messages_per_user": max(counts) if counts else 0,
+        "seconds": round(total_seconds, 2),
+    }
+
+
+def clear_synthetic_data() -> int:
+    """Delete every synthetic user and their messages; returns users removed"""
+    db = SessionLocal()
+    try:
+        synthetic = db.query(User.id).filter(User.username.like(f"{USERNAME_PREFIX}%"))
+        db.query(Message).filter(Message.user_id.in_(synthetic.subquery().select())).delete(synchronize_session=False)
+        archived = db.query(MessageArchive).filter(MessageArchive.user_id.in_(synthetic.subquery().select()))
+        archived_messages = archived.with_entities(func.coalesce(func.sum(MessageArchive.message_count), 0)).scalar()
+        archived.delete(synchronize_session=False)
+        record_stats(db.connection(), {"messages": -archived_messages})  # Blocks are not tracked by the delete hook
+        removed = db.query(User).filter(User.username.like(f"{USERNAME_PREFIX}%")).delete(synchronize_session=False)
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic SwasthAI users and messages")
+    parser.add_argument("--users", type=int, default=1000, help="Users to create (default: 1000)")
+    parser.add_argument("--messages", type=int, default=20000, help="Total messages (default: 20000)")
+    parser.add_argument("--days", type=int, default=180, help="Spread timestamps over this many days")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per insert batch")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--clear", action="store_true", help=f"Delete all '{USERNAME_PREFIX}*' users and their messages instead")
+    args = parser.parse_args()
+
+    if args.clear:
+        removed = clear_synthetic_data()
+        print(f"🗑️  Removed {removed:,} synthetic users")
+        return
+
+    print("🧪 Generating SwasthAI synthetic data")
+    print("=" * 50)
+    summary = generate(args.users, args.messages, args.days, args.batch_size, args.seed)
+    print(f"   Busiest user has {summary['max_messages_per_user']:,} messages")
+    print(f"   Synthetic users log in with password '{DEFAULT_PASSWORD}'")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n👋 Cancelled")
@@ -0,0 +1,69 @@
+"""
+Shared HTTP clients for SwasthAI agent tools
+Process-wide keep-alive connection pools (HTTP/2 where available); reused connections
+skip DNS lookups and TLS handshakes, so no resolver cache of our own is needed
+"""
+import threading
+from typing import Optional
+
+import httpx
+
+from config import settings
+
+try:
+    import h2  # noqa: F401 - httpx needs the h2 package for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# ==================== CLIENTS ====================
+
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_client_lock = threading.Lock()
+
+
+def _client_options() -> dict:
+    return {
+        "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        "timeout": httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "headers": {"User-Agent": f"{settings.APP_NAME} (healthcare assistant)"},
+        "follow_redirects": True,
+    }
+
+
+def get_http_client() -> httpx.Client:
+    """Get or create the shared synchronous client (thread-safe)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(**_client_options())
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get or create the shared async client"""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = httpx.AsyncClient(**_client_options())
+    return _async_client
+
+
+async def close_http_clients():
+    """Close both pools (call on application shutdown)"""
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,120 @@
+"""
+Build the local OpenFDA drug-label store for SwasthAI
+Streams the bulk drug-label downloads (https://open.fda.gov/data/downloads/) into the
+SQLite store used by check_drug_interactions, keeping only warnings and indications.
+
+Usage:
+    python ingest_openfda.py drug-label-0001-of-0012.json.zip drug-label-0002-of-0012.json.zip ...
+"""
+import argparse
+import io
+import json
+import re
+import time
+import zipfile
+from typing import IO, Iterator
+
+from config import settings
+from drug_labels import DrugLabelStore
+
+CHUNK_SIZE = 1 << 20
+RESULTS_START = re.compile(r'"results"\s*:\s*\[')
+
+
+def iter_label_records(stream: IO[str]) -> Iterator[dict]:
+    """
+    Yield objects from the top-level "results" array one at a time
+
+    The dump files are single JSON documents of several hundred MB, so they are
+    decoded incrementally instead of with json.load().
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+
+    # Skip "meta" (which has its own "results" object) up to the results array
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        buffer += chunk
+        match = RESULTS_START.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        buffer = buffer[-64:]
+
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield record
+
+
+def iter_dump_records(path: str) -> Iterator[dict]:
+    """Records from a .json file or every .json member of a .zip"""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.endswith(".json"):
+                    with archive.open(member) as raw:
+                        yield from iter_label_records(io.TextIOWrapper(raw, encoding="utf-8"))
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from iter_label_records(f)
+
+
+def _first(record: dict, field: str):
+    values = record.get(field)
+    return values[0] if values else None
+
+
+def ingest(paths, store_path: str):
+    """Rebuild the store from one or more dump files"""
+    store = DrugLabelStore(store_path)
+    store.create()
+
+    started = time.time()
+    seen = kept = 0
+    for path in paths:
+        print(f"📄 Reading {path}")
+        for record in iter_dump_records(path):
+            seen += 1
+            openfda = record.get("openfda", {})
+            names = openfda.get("brand_name", []) + openfda.get("generic_name", [])
+            warnings = _first(record, "warnings")
+            indications = _first(record, "indications_and_usage")
+            if not names or not (warnings or indications):
+                continue
+
+            if store.add_label(names, warnings, indications):
+                kept += 1
+            if seen % 10000 == 0:
+                store.commit()
+                print(f"   ...{kept} labels stored ({seen} read)")
+
+    store.commit()
+    print(f"✅ Stored {kept} of {seen} labels in {store_path} in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local OpenFDA drug-label store")
+    parser.add_argument("dumps", nargs="+", help="drug-label-*.json.zip or extracted .json files")
+    parser.add_argument("--store", default=settings.DRUG_LABEL_DB_PATH, help="Output SQLite store path")
+    args = parser.parse_args()
+
+    try:
+        ingest(args.dumps, args.store)
+    except KeyboardInterrupt:
+        print("\n\n👋 Cancelled")
@@ -0,0 +1,119 @@
+"""
+Build the offline Wikipedia medical index for SwasthAI
+Loads a Wikipedia dump into the SQLite FTS5 index used by search_wikipedia_medical
+
+Usage:
+    python ingest_wikipedia.py enwiki-medicine-pages-articles.xml.bz2
+    python ingest_wikipedia.py medical_articles.jsonl --all
+
+Supported inputs:
+    - MediaWiki XML export (.xml or .xml.bz2), e.g. a WikiProject Medicine subset
+    - JSON Lines (.jsonl or .jsonl.gz) with "title" and "text" fields (plain text or wikitext)
+"""
+import argparse
+import bz2
+import gzip
+import json
+import re
+import time
+import xml.etree.ElementTree as ET
+from typing import Iterator, Tuple
+
+from config import settings
+from medical_corpus import WikipediaIndex, clean_wikitext, lead_section
+
+# Articles are kept when their wikitext shows one of these medical markers
+MEDICAL_MARKERS = re.compile(
+    r"\{\{\s*Infobox (medical condition|disease|drug|symptom|medical intervention|anatomy)"
+    r"|\[\[Category:[^\]]*(disease|disorder|syndrome|infection|medical|medicine|symptom|drug|"
+    r"anatomy|health|therapy|cancer|virus|bacteria|vaccine|surgery|pharmac)",
+    re.I
+)
+
+BATCH_SIZE = 500
+MAX_BODY_CHARS = 20000
+MAX_SUMMARY_CHARS = 3000
+
+
+def _open(path: str):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_xml_pages(path: str) -> Iterator[Tuple[str, str]]:
+    """Stream (title, wikitext) for main-namespace, non-redirect pages of a MediaWiki export"""
+    with _open(path) as f:
+        title, namespace, text, redirect = None, None, None, False
+        for event, elem in ET.iterparse(f, events=("end",)):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                namespace = elem.text
+            elif tag == "redirect":
+                redirect = True
+            elif tag == "text":
+                text = elem.text or ""
+            elif tag == "page":
+                if namespace == "0" and not redirect and title:
+                    yield title, text
+                title, namespace, text, redirect = None, None, None, False
+                elem.clear()
+
+
+def iter_jsonl_pages(path: str) -> Iterator[Tuple[str, str]]:
+    """Stream (title, text) from a JSON Lines file"""
+    with _open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["title"], record.get("text", "")
+
+
+def ingest(path: str, index_path: str, keep_all: bool = False):
+    """Rebuild the index from a dump"""
+    pages = iter_jsonl_pages(path) if ".jsonl" in path else iter_xml_pages(path)
+    index = WikipediaIndex(index_path)
+    index.create()
+
+    started = time.time()
+    seen = kept = 0
+    batch = []
+    for title, wikitext in pages:
+        seen += 1
+        if not keep_all and not MEDICAL_MARKERS.search(wikitext):
+            continue
+
+        summary = clean_wikitext(lead_section(wikitext))[:MAX_SUMMARY_CHARS]
+        body = clean_wikitext(wikitext)[:MAX_BODY_CHARS]
+        if not summary:
+            continue
+
+        batch.append((title, summary, body))
+        if len(batch) >= BATCH_SIZE:
+            kept += index.add_articles(batch)
+            batch = []
+            print(f"   ...{kept} articles indexed ({seen} pages read)")
+
+    if batch:
+        kept += index.add_articles(batch)
+
+    print("📦 Optimizing index...")
+    index.optimize()
+    print(f"✅ Indexed {kept} of {seen} pages into {index_path} in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline Wikipedia medical index")
+    parser.add_argument("dump", help="MediaWiki XML (.xml/.xml.bz2) or JSON Lines (.jsonl/.jsonl.gz) dump")
+    parser.add_argument("--index", default=settings.WIKI_INDEX_PATH, help="Output SQLite index path")
+    parser.add_argument("--all", action="store_true", help="Index every article, not only medical ones")
+    args = parser.parse_args()
+
+    try:
+        ingest(args.dump, args.index, keep_all=args.all)
+    except KeyboardInterrupt:
+        print("\n\n👋 Cancelled")
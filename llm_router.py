@@ -0,0 +1,339 @@
+"""
+Multi-provider LLM routing for SwasthAI
+Honours AI_PROVIDER, fails over to a secondary provider on errors or timeouts,
+optionally hedges slow requests, and tracks per-provider latency/error EWMAs.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from pydantic import ConfigDict
+
+from config import settings
+from metrics import metrics
+
+PROVIDERS = ("gemini", "openai")
+
+# Inner provider calls must not report to the graph's callbacks, or streamed tokens would arrive twice
+_INNER_CONFIG = {"callbacks": []}
+
+
+def create_provider_llm(provider: str) -> BaseChatModel:
+    """Create the chat model for one provider; raises ValueError if it is not configured"""
+    if provider == "gemini":
+        if not settings.GOOGLE_API_KEY:
+            raise ValueError("GOOGLE_API_KEY not set in environment")
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        try:
+            return ChatGoogleGenerativeAI(
+                model=settings.GEMINI_MODEL,
+                google_api_key=settings.GOOGLE_API_KEY,
+                temperature=0.7,
+                max_output_tokens=2000,
+                timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                convert_system_message_to_human=True
+            )
+        except Exception as e:
+            raise ValueError(f"Failed to initialize Gemini: {e}")
+
+    if provider == "openai":
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY not set in environment")
+        from langchain_openai import ChatOpenAI
+        try:
+            return ChatOpenAI(
+                model=settings.OPENAI_MODEL,
+                api_key=settings.OPENAI_API_KEY,
+                temperature=0.7,
+                max_tokens=2000,
+                timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+                max_retries=0  # The router fails over instead of retrying
+            )
+        except Exception as e:
+            raise ValueError(f"Failed to initialize OpenAI: {e}")
+
+    if provider == "fake":
+        from fake_llm import FakeMedicalChatModel
+        return FakeMedicalChatModel()
+
+    raise ValueError(f"Unknown AI provider: {provider}")
+
+
+# ==================== PROVIDER HEALTH ====================
+
+class ProviderStats:
+    """Latency and error-rate EWMAs plus a recent-latency window for percentiles"""
+
+    def __init__(self, name: str, alpha: float = 0.2, window: int = 200):
+        self.name = name
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_rate_ewma = 0.0
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self.error_rate_ewma = (1 - self.alpha) * self.error_rate_ewma + self.alpha * (0.0 if ok else 1.0)
+            if ok:
+                self._latencies.append(seconds)
+                self.latency_ewma = seconds if self.latency_ewma is None else (
+                    (1 - self.alpha) * self.latency_ewma + self.alpha * seconds
+                )
+        metrics.incr(f"llm.{self.name}.{'success' if ok else 'error'}")
+        metrics.set_gauge(f"llm.{self.name}.error_rate_ewma", round(self.error_rate_ewma, 4))
+        if self.latency_ewma is not None:
+            metrics.set_gauge(f"llm.{self.name}.latency_ewma_seconds", round(self.latency_ewma, 4))
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile over the recent window, None until there are enough samples"""
+        with self._lock:
+            if len(self._latencies) < 20:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    @property
+    def healthy(self) -> bool:
+        return self.error_rate_ewma < settings.LLM_UNHEALTHY_ERROR_RATE
+
+
+_provider_stats: Dict[str, ProviderStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_provider_stats(provider: str) -> ProviderStats:
+    """Get or create the shared health stats for a provider"""
+    with _stats_lock:
+        if provider not in _provider_stats:
+            _provider_stats[provider] = ProviderStats(provider)
+        return _provider_stats[provider]
+
+
+# ==================== ROUTER ====================
+
+class LLMRouter(BaseChatModel):
+    """
+    Chat model that routes each call across configured providers
+
+    Providers are tried in preference order, with unhealthy ones (high error EWMA)
+    moved to the back. Non-streaming async calls may be hedged: if the first
+    provider hasn't answered within its p95 latency, the next one is started too
+    and the first answer wins. Streaming calls fail over only before the first token.
+    """
+
+    providers: List[Tuple[str, Runnable]]
+    hedge: bool = False
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @property
+    def _llm_type(self) -> str:
+        return "swasthai-router"
+
+    @property
+    def provider_names(self) -> List[str]:
+        return [name for name, _ in self.providers]
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "LLMRouter":
+        """Bind tools on every provider; the router itself stays the model the graph calls"""
+        return LLMRouter(
+            providers=[(name, llm.bind_tools(tools, **kwargs)) for name, llm in self.providers],
+            hedge=self.hedge
+        )
+
+    def _ordered(self) -> List[Tuple[str, Runnable]]:
+        healthy = [p for p in self.providers if get_provider_stats(p[0]).healthy]
+        unhealthy = [p for p in self.providers if not get_provider_stats(p[0]).healthy]
+        return healthy + unhealthy
+
+    def _hedge_delay(self, provider: str) -> float:
+        p95 = get_provider_stats(provider).percentile(settings.LLM_HEDGE_PERCENTILE)
+        return max(p95, settings.LLM_HEDGE_MIN_DELAY_SECONDS) if p95 is not None else settings.LLM_HEDGE_DELAY_SECONDS
+
+    @staticmethod
+    def _result(message: BaseMessage) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # ---------- Sync ----------
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        last_error: Optional[Exception] = None
+        for index, (name, llm) in enumerate(self._ordered()):
+            if index:
+                metrics.incr("llm.failover")
+            started = time.perf_counter()
+            try:
+                message = llm.invoke(messages, config=_INNER_CONFIG, stop=stop, **kwargs)
+            except Exception as e:
+                get_provider_stats(name).record(time.perf_counter() - started, ok=False)
+                print(f"⚠️  LLM provider {name} failed: {e}")
+                last_error = e
+                continue
+            get_provider_stats(name).record(time.perf_counter() - started, ok=True)
+            return self._result(message)
+        raise last_error
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        last_error: Optional[Exception] = None
+        for index, (name, llm) in enumerate(self._ordered()):
+            if index:
+                metrics.incr("llm.failover")
+            started = time.perf_counter()
+            streamed = False
+            try:
+                for chunk in llm.stream(messages, config=_INNER_CONFIG, stop=stop, **kwargs):
+                    streamed = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                get_provider_stats(name).record(time.perf_counter() - started, ok=False)
+                if streamed:
+                    raise  # Tokens already reached the user; can't switch providers mid-answer
+                print(f"⚠️  LLM provider {name} failed: {e}")
+                last_error = e
+                continue
+            get_provider_stats(name).record(time.perf_counter() - started, ok=True)
+            return
+        raise last_error
+
+    # ---------- Async ----------
+
+    async def _acall(self, name: str, llm: Runnable, messages: List[BaseMessage], **kwargs: Any) -> BaseMessage:
+        started = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(
+                llm.ainvoke(messages, config=_INNER_CONFIG, **kwargs),
+                timeout=settings.LLM_REQUEST_TIMEOUT_SECONDS
+            )
+        except asyncio.CancelledError:
+            raise  # Lost a hedge race; not the provider's fault
+        except Exception as e:
+            get_provider_stats(name).record(time.perf_counter() - started, ok=False)
+            print(f"⚠️  LLM provider {name} failed: {e!r}")
+            raise
+        get_provider_stats(name).record(time.perf_counter() - started, ok=True)
+        return message
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        candidates = self._ordered()
+        pending: Dict[asyncio.Task, str] = {}
+        last_error: Optional[Exception] = None
+        next_index = 0
+
+        def start_next():
+            nonlocal next_index
+            name, llm = candidates[next_index]
+            next_index += 1
+            task = asyncio.ensure_future(self._acall(name, llm, messages, stop=stop, **kwargs))
+            pending[task] = name
+
+        start_next()
+        try:
+            while pending:
+                can_hedge = self.hedge and next_index < len(candidates) and len(pending) == 1
+                timeout = self._hedge_delay(next(iter(pending.values()))) if can_hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Slower than this provider's p95: race a second provider against it
+                    metrics.incr("llm.hedged")
+                    start_next()
+                    continue
+
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        if next_index > 1:
+                            metrics.incr(f"llm.won_by.{name}")
+                        return self._result(task.result())
+                    last_error = task.exception()
+
+                if not pending and next_index < len(candidates):
+                    metrics.incr("llm.failover")
+                    start_next()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        last_error: Optional[Exception] = None
+        for index, (name, llm) in enumerate(self._ordered()):
+            if index:
+                metrics.incr("llm.failover")
+            started = time.perf_counter()
+            streamed = False
+            try:
+                async for chunk in llm.astream(messages, config=_INNER_CONFIG, stop=stop, **kwargs):
+                    streamed = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                get_provider_stats(name).record(time.perf_counter() - started, ok=False)
+                if streamed:
+                    raise  # Tokens already reached the user; can't switch providers mid-answer
+                print(f"⚠️  LLM provider {name} failed: {e!r}")
+                last_error = e
+                continue
+            get_provider_stats(name).record(time.perf_counter() - started, ok=True)
+            return
+        raise last_error
+
+
+def provider_order() -> List[str]:
+    """AI_PROVIDER first, then LLM_FALLBACK_PROVIDER (default: the other provider)"""
+    primary = settings.AI_PROVIDER.lower()
+    if primary == "fake":
+        return [primary]  # Never fall back to a real (billed) provider in test mode
+    fallback = (settings.LLM_FALLBACK_PROVIDER or "").lower()
+    order = [primary]
+    if fallback and fallback != "none":
+        order.append(fallback)
+    elif not fallback:
+        order.extend(p for p in PROVIDERS if p != primary)
+    return [p for i, p in enumerate(order) if p not in order[:i]]
+
+
+def create_router() -> LLMRouter:
+    """Router over every provider in provider_order() that has credentials"""
+    providers = []
+    errors = []
+    for name in provider_order():
+        try:
+            providers.append((name, create_provider_llm(name)))
+        except ValueError as e:
+            errors.append(str(e))
+    if not providers:
+        raise ValueError("; ".join(errors) or "No AI provider configured")
+    if providers[0][0] != settings.AI_PROVIDER.lower():
+        print(f"⚠️  AI_PROVIDER={settings.AI_PROVIDER} is not configured, using {providers[0][0]}")
+    return LLMRouter(providers=providers, hedge=settings.LLM_HEDGE_ENABLED and len(providers) > 1)
@@ -2,23 +2,34 @@
 SwasthAI Chat MVP - Main Application
 FastAPI backend with LangChain/LangGraph AI agent
 """
-from fastapi import FastAPI, Depends, HTTPException, status, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Depends, HTTPException, status, Request, BackgroundTasks, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, func, select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import base64
+import json
 import os
 
 # Local imports
 from config import settings
-from database import get_db, init_db, User, Message
+from database import (
+    get_async_db, init_db, async_engine, AsyncSessionLocal,
+    User, Message, MessageArchive, ConversationSummary, PlatformStat, DailyStat
+)
 from auth import (
     authenticate_user,
     create_access_token,
     get_current_user,
     get_current_admin,
-    get_password_hash
+    get_password_hash,
+    get_user_by_username
 )
 from schemas import (
     UserSignup,
@@ -32,7 +43,20 @@ from schemas import (
     SuccessResponse,
     ErrorResponse
 )
-from ai_agent import get_agent
+from ai_agent import cached_answer, get_agent
+from metrics import metrics
+from answer_cache import get_answer_cache
+from http_client import close_http_clients
+from triage import triage_message
+from tool_cache import get_tool_cache, normalize_query
+from singleflight import get_singleflight
+from admission import get_admission
+from conversation_memory import load_conversation_context, update_conversation_summary
+from write_behind import get_message_writer, sync_user_messages, close_message_writer
+from archive import (
+    start_archiver, stop_archiver, load_archived_page, load_all_archived,
+    archived_message_counts, delete_archived_messages
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -64,6 +88,7 @@ async def startup_event():
     print(f"🚀 {settings.APP_NAME} is starting...")
     print(f"📊 Database: {settings.DATABASE_URL}")
     print(f"🤖 AI Provider: {settings.AI_PROVIDER.upper()}")
+    start_archiver()
     
     try:
         # Test AI agent initialization
@@ -74,6 +99,15 @@ async def startup_event():
         print("   Please check your API keys in .env file")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the archiver and flush queued messages, then close pooled HTTP and database connections"""
+    await stop_archiver()
+    await close_message_writer()
+    await close_http_clients()
+    await async_engine.dispose()
+
+
 # ==================== FRONTEND ROUTES ====================
 
 @app.get("/", response_class=HTMLResponse)
@@ -171,12 +205,12 @@ async def admin_page(request: Request):
 # ==================== API ROUTES ====================
 
 @app.post("/api/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
+async def signup(user_data: UserSignup, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user account
     """
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await get_user_by_username(db, user_data.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -184,7 +218,7 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     new_user = User(
         username=user_data.username,
         full_name=user_data.full_name,
@@ -192,8 +226,7 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -206,11 +239,11 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
 
 
 @app.post("/api/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and return JWT token
     """
-    user = authenticate_user(db, user_data.username, user_data.password)
+    user = await authenticate_user(db, user_data.username, user_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -236,97 +269,292 @@ async def get_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+async def _save_exchange(db: AsyncSession, user_id: int, user_content: str, assistant_content: str, emergency: Optional[str] = None):
+    """Save a user message and the assistant's reply (preceded by any emergency guidance shown)"""
+    rows = [{"role": "user", "content": user_content}]
+    if emergency:
+        rows.append({"role": "assistant", "content": emergency})
+    rows.append({"role": "assistant", "content": assistant_content})
+    
+    writer = get_message_writer()
+    if writer is not None:
+        # Batched with other requests' messages (WRITE_BEHIND_ENABLED)
+        await writer.write(user_id, rows)
+        return
+    db.add_all([Message(user_id=user_id, **row) for row in rows])
+    await db.commit()
+
+
+# Identical first-turn questions asked at the same time share one agent run
+chat_flight = get_singleflight("chat")
+
+
+def _first_turn_key(message: str, conversation_history: list, summary: str) -> Optional[str]:
+    """Coalescing key for a history-free message, None when the answer depends on history"""
+    if conversation_history or summary:
+        return None
+    return normalize_query(message)
+
+
+def _with_emergency(exc: HTTPException, emergency: Optional[str]) -> HTTPException:
+    """
+    A copy of a chat error carrying this request's red-flag guidance (see http_exception_handler)
+    
+    Always a new exception: requests coalesced by chat_flight all receive the
+    leader's exception object, so tagging it in place would leak one user's
+    guidance into another's response.
+    """
+    tagged = HTTPException(status_code=exc.status_code, detail=exc.detail, headers=exc.headers)
+    tagged.emergency = emergency
+    return tagged
+
+
+def _sse_event(event: dict) -> str:
+    """Format an agent event as a Server-Sent Events frame"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(
     chat_message: ChatMessage,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Send a message to the AI assistant and get a response
+    
+    Emergency guidance for red-flag messages is returned in `emergency`, both with
+    the answer and on every error response (429, 500, 503), so shedding or failing
+    the AI work never loses it. Only the streaming route delivers it before the answer.
+    Answer-cache hits are served without passing admission control.
     """
+    # Red-flag check on the raw message, before any AI work
+    emergency = triage_message(chat_message.message)
+    admission = get_admission()
+    
     try:
-        # Get conversation history (last 10 messages)
-        recent_messages = db.query(Message).filter(
-            Message.user_id == current_user.id
-        ).order_by(Message.created_at.desc()).limit(10).all()
-        
-        # Reverse to chronological order
-        recent_messages.reverse()
+        # Get conversation context (rolling summary + newest raw messages)
+        conversation_history, summary = await load_conversation_context(db, current_user.id)
         
-        # Convert to format expected by AI agent
-        conversation_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in recent_messages
-        ]
+        # A cached first-turn answer needs no LLM slot, so it is never shed or queued
+        ai_response = cached_answer(chat_message.message, conversation_history, summary)
+        if ai_response is None:
+            # Shed load early (429 + Retry-After) when the LLM queue is full
+            admission.check(current_user.id)
+            
+            # Get AI response (first use builds the agent, which must not block the loop)
+            agent = await run_in_threadpool(get_agent)
+            
+            async def answer() -> str:
+                async with admission.llm_slot():
+                    return await agent.achat(chat_message.message, conversation_history, summary)
+            
+            # The per-user limit is this request's own, so it stays outside the shared flight
+            async with admission.user_slot(current_user.id):
+                flight_key = _first_turn_key(chat_message.message, conversation_history, summary)
+                if flight_key:
+                    ai_response = await chat_flight.ado(flight_key, answer)
+                else:
+                    ai_response = await answer()
         
-        # Get AI response
-        agent = get_agent()
-        ai_response = agent.chat(chat_message.message, conversation_history)
+        # Save user message and AI response
+        await _save_exchange(db, current_user.id, chat_message.message, ai_response, emergency)
         
-        # Save user message
-        user_message = Message(
-            user_id=current_user.id,
-            role="user",
-            content=chat_message.message
-        )
-        db.add(user_message)
+        # Fold aged-out messages into the summary after the response is sent
+        background_tasks.add_task(update_conversation_summary, current_user.id)
         
-        # Save AI response
-        assistant_message = Message(
-            user_id=current_user.id,
-            role="assistant",
-            content=ai_response
-        )
-        db.add(assistant_message)
-        
-        db.commit()
-        
-        return ChatResponse(response=ai_response)
+        return ChatResponse(response=ai_response, emergency=emergency)
     
+    except HTTPException as e:
+        # Admission rejections (429) pass through, still carrying the guidance
+        raise _with_emergency(e, emergency)
     except ValueError as e:
         # API key not configured
-        raise HTTPException(
+        raise _with_emergency(HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"AI service not configured: {str(e)}"
-        )
+        ), emergency)
     except Exception as e:
         # Other errors
         print(f"Chat error: {e}")
-        raise HTTPException(
+        raise _with_emergency(HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process chat message"
+        ), emergency)
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(
+    chat_message: ChatMessage,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Send a message to the AI assistant and stream the response as Server-Sent Events
+    
+    Events: emergency, token, tool_start, tool_end, done, error.
+    Emergency guidance for red-flag messages is sent before the agent runs.
+    The exchange is saved once the final response has been produced.
+    Requests over the admission limits get 429 before the stream starts, with the
+    guidance in the body's `emergency`; a request that times out waiting for an LLM
+    slot gets an error event with retry_after after the emergency event.
+    Answer-cache hits are streamed without passing admission control.
+    """
+    emergency = triage_message(chat_message.message)
+    admission = get_admission()
+    
+    try:
+        conversation_history, summary = await load_conversation_context(db, current_user.id)
+        cached = cached_answer(chat_message.message, conversation_history, summary)
+        if cached is None:
+            admission.check(current_user.id)
+            agent = await run_in_threadpool(get_agent)
+    except HTTPException as e:
+        raise _with_emergency(e, emergency)
+    except ValueError as e:
+        raise _with_emergency(HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI service not configured: {str(e)}"
+        ), emergency)
+    
+    user_id = current_user.id
+    user_content = chat_message.message
+    
+    flight_key = _first_turn_key(user_content, conversation_history, summary)
+    
+    async def event_stream():
+        if emergency:
+            yield _sse_event({"type": "emergency", "guidance": emergency})
+        
+        if cached is not None:
+            response_text = cached
+            yield _sse_event({"type": "token", "content": cached})
+            yield _sse_event({"type": "done", "response": cached})
+        else:
+            response_text = None
+            # Not a leader until joined: a per-user 429 must not fail someone else's flight
+            leader = False
+            try:
+                async with admission.user_slot(user_id):
+                    flight, leader = chat_flight.join(flight_key) if flight_key else (None, True)
+                    if leader:
+                        async with admission.llm_slot():
+                            async for event in agent.astream_chat(user_content, conversation_history, summary):
+                                if event["type"] == "done":
+                                    response_text = event["response"]
+                                    if flight_key:
+                                        chat_flight.resolve(flight_key, response_text)
+                                yield _sse_event(event)
+                    else:
+                        # Same question already being answered: wait for it and send the whole reply
+                        response_text = await asyncio.shield(flight)
+                        yield _sse_event({"type": "done", "response": response_text})
+            except HTTPException as e:
+                # Headers are already sent, so an admission timeout becomes an error event
+                yield _sse_event({
+                    "type": "error",
+                    "detail": e.detail,
+                    "retry_after": int((e.headers or {}).get("Retry-After", 0)) or None
+                })
+                return
+            except Exception as e:
+                print(f"Chat stream error: {e}")
+                yield _sse_event({"type": "error", "detail": "Failed to process chat message"})
+                return
+            finally:
+                if leader and flight_key:
+                    # No-op after resolve(); otherwise followers get the failure (or disconnect)
+                    chat_flight.fail(flight_key, RuntimeError("Coalesced chat request did not complete"))
+        
+        # The request-scoped session is already closed once streaming starts
+        try:
+            async with AsyncSessionLocal() as stream_db:
+                await _save_exchange(stream_db, user_id, user_content, response_text, emergency)
+        except Exception as e:
+            print(f"Chat stream save error: {e}")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(update_conversation_summary, user_id)
+    )
+
+
+def _encode_cursor(message: Message) -> str:
+    """Opaque keyset cursor for a message's (created_at, id) position"""
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """(created_at, id) from a cursor produced by _encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
 
 
 @app.get("/api/messages", response_model=ChatHistoryResponse)
 async def get_chat_history(
+    before: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    limit: int = Query(50, ge=1, le=200, description="Messages per page"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get chat history for current user
+    Get chat history for current user, newest page first
+    
+    Keyset-paginated on (user_id, created_at, id): each page holds up to `limit`
+    messages in chronological order, and `next_cursor` fetches the page before it.
+    Once the hot table runs out, pages continue into the user's archived history.
     """
-    messages = db.query(Message).filter(
-        Message.user_id == current_user.id
-    ).order_by(Message.created_at.asc()).all()
+    await sync_user_messages(current_user.id)
+    position = _decode_cursor(before) if before else None
+    query = select(Message).where(Message.user_id == current_user.id)
+    if position:
+        created_at, message_id = position
+        query = query.where(or_(
+            Message.created_at < created_at,
+            and_(Message.created_at == created_at, Message.id < message_id)
+        ))
+    
+    # One extra row tells us whether an older page exists
+    result = await db.execute(query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1))
+    messages = list(result.scalars())
+    if len(messages) <= limit:
+        # Reached the end of the hot table; archive blocks are only opened this far back
+        oldest = (messages[-1].created_at, messages[-1].id) if messages else position
+        messages += await load_archived_page(db, current_user.id, oldest, limit + 1 - len(messages))
+    has_more = len(messages) > limit
+    messages = messages[:limit]
     
     return ChatHistoryResponse(
-        messages=messages,
-        total_messages=len(messages)
+        messages=list(reversed(messages)),
+        has_more=has_more,
+        next_cursor=_encode_cursor(messages[-1]) if has_more else None
     )
 
 
 @app.delete("/api/messages", response_model=SuccessResponse)
 async def clear_chat_history(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Clear all chat history for current user
     """
-    db.query(Message).filter(Message.user_id == current_user.id).delete()
-    db.commit()
+    await sync_user_messages(current_user.id)  # Queued messages would otherwise reappear
+    await db.execute(delete(Message).where(Message.user_id == current_user.id))
+    await delete_archived_messages(db, current_user.id)
+    await db.execute(delete(ConversationSummary).where(ConversationSummary.user_id == current_user.id))
+    await db.commit()
     
     return SuccessResponse(message="Chat history cleared successfully")
 
@@ -336,60 +564,125 @@ async def get_greeting(current_user: User = Depends(get_current_user)):
     """
     Get a personalized greeting from the AI assistant
     """
-    agent = get_agent()
+    agent = await run_in_threadpool(get_agent)
     greeting = agent.get_greeting()
     return {"greeting": greeting}
 
 
 # ==================== ADMIN API ROUTES ====================
 
+ADMIN_USER_SORTS = {
+    "created_at": User.created_at,
+    "username": User.username,
+    "id": User.id,
+    "total_messages": None,  # Aggregate; handled separately
+}
+
+
 @app.get("/api/admin/users")
 async def get_all_users(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=100),
+    sort: str = Query("created_at", description="created_at, username, id or total_messages"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    q: Optional[str] = Query(None, max_length=50, description="Username search"),
     current_admin: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all users (Admin only)
+    Get one page of users with their message counts (Admin only)
     """
-    users = db.query(User).order_by(User.created_at.desc()).all()
+    if sort not in ADMIN_USER_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort must be one of: {', '.join(ADMIN_USER_SORTS)}"
+        )
+    
+    filters = []
+    if q:
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        filters.append(User.username.ilike(f"%{escaped}%", escape="\\"))
+    total_users = (await db.execute(select(func.count()).select_from(User).where(*filters))).scalar()
+    offset = (page - 1) * page_size
     
-    users_data = []
-    for user in users:
-        message_count = db.query(Message).filter(Message.user_id == user.id).count()
-        users_data.append({
+    if sort == "total_messages":
+        # Sorting by count needs every user's count: one grouped join (plus archived blocks)
+        counts = select(
+            Message.user_id, func.count(Message.id).label("total")
+        ).group_by(Message.user_id).subquery()
+        archived = select(
+            MessageArchive.user_id, func.sum(MessageArchive.message_count).label("total")
+        ).group_by(MessageArchive.user_id).subquery()
+        total = func.coalesce(counts.c.total, 0) + func.coalesce(archived.c.total, 0)
+        result = await db.execute(
+            select(User, total).outerjoin(counts, counts.c.user_id == User.id).outerjoin(
+                archived, archived.c.user_id == User.id
+            ).where(*filters).order_by(
+                total.desc() if order == "desc" else total.asc(), User.id
+            ).offset(offset).limit(page_size)
+        )
+        rows = result.all()
+    else:
+        column = ADMIN_USER_SORTS[sort]
+        result = await db.execute(
+            select(User).where(*filters).order_by(
+                column.desc() if order == "desc" else column.asc(), User.id
+            ).offset(offset).limit(page_size)
+        )
+        users = list(result.scalars())
+        # Counts for just this page in one grouped query
+        page_ids = [user.id for user in users]
+        page_counts = dict((await db.execute(select(Message.user_id, func.count(Message.id)).where(
+            Message.user_id.in_(page_ids)
+        ).group_by(Message.user_id))).all()) if users else {}
+        archived_counts = await archived_message_counts(db, page_ids)
+        rows = [(user, page_counts.get(user.id, 0) + archived_counts.get(user.id, 0)) for user in users]
+    
+    users_data = [
+        {
             "id": user.id,
             "username": user.username,
             "full_name": user.full_name,
             "is_admin": user.is_admin,
             "created_at": user.created_at.isoformat(),
             "total_messages": message_count
-        })
+        }
+        for user, message_count in rows
+    ]
     
     return {
         "users": users_data,
-        "total_users": len(users_data)
+        "total_users": total_users,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": max(1, -(-total_users // page_size))
     }
 
 
 @app.get("/api/admin/users/{user_id}/messages")
 async def get_user_messages(
     user_id: int,
+    include_archived: bool = Query(True, description="Also decompress archived history"),
     current_admin: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all messages for a specific user (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    await sync_user_messages(user_id)
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    messages = db.query(Message).filter(
-        Message.user_id == user_id
-    ).order_by(Message.created_at.asc()).all()
+    result = await db.execute(
+        select(Message).where(Message.user_id == user_id).order_by(Message.created_at.asc())
+    )
+    messages = list(result.scalars())
+    if include_archived:
+        messages = await load_all_archived(db, user_id) + messages
     
     messages_data = [
         {
@@ -414,40 +707,94 @@ async def get_user_messages(
 
 @app.get("/api/admin/stats")
 async def get_admin_stats(
+    days: int = Query(14, ge=1, le=365, description="Days of daily activity to return"),
     current_admin: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get platform statistics (Admin only)
+    
+    Reads the counters and daily buckets maintained on every write, so the
+    cost does not grow with the number of users or messages.
     """
-    total_users = db.query(User).count()
-    total_messages = db.query(Message).count()
-    total_admins = db.query(User).filter(User.is_admin == True).count()
+    totals = {row.name: row.value for row in (await db.execute(select(PlatformStat))).scalars()}
+    total_users = totals.get("users", 0)
+    total_messages = totals.get("messages", 0)
+    
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=max(days, 7) - 1)
+    result = await db.execute(select(DailyStat).where(DailyStat.day >= first_day))
+    buckets = {row.day: row for row in result.scalars()}
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        bucket = buckets.get(day)
+        daily.append({
+            "day": day.isoformat(),
+            "new_users": bucket.new_users if bucket else 0,
+            "messages": bucket.messages if bucket else 0
+        })
     
-    # Get recent users (last 7 days)
-    from datetime import datetime, timedelta
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    new_users_week = db.query(User).filter(User.created_at >= seven_days_ago).count()
+    # Sign-ups over the last 7 days, including today
+    new_users_week = sum(
+        row.new_users for day, row in buckets.items() if day > today - timedelta(days=7)
+    )
     
     return {
         "total_users": total_users,
         "total_messages": total_messages,
-        "total_admins": total_admins,
+        "total_admins": totals.get("admins", 0),
         "new_users_this_week": new_users_week,
-        "avg_messages_per_user": round(total_messages / total_users, 2) if total_users > 0 else 0
+        "avg_messages_per_user": round(total_messages / total_users, 2) if total_users > 0 else 0,
+        "daily": daily
     }
 
 
+@app.get("/api/admin/metrics")
+async def get_admin_metrics(current_admin: User = Depends(get_current_admin)):
+    """
+    Get performance counters and cache statistics (Admin only)
+    """
+    return {
+        **metrics.snapshot(),
+        "tool_cache": await run_in_threadpool(get_tool_cache().stats)
+    }
+
+
+@app.delete("/api/admin/tool-cache", response_model=SuccessResponse)
+async def clear_tool_cache(
+    tool: Optional[str] = None,
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Clear cached tool results, optionally for a single tool (Admin only)
+    """
+    removed = await run_in_threadpool(get_tool_cache().clear, tool)
+    return SuccessResponse(message=f"Cleared {removed} cached tool results")
+
+
+@app.delete("/api/admin/answer-cache", response_model=SuccessResponse)
+async def clear_answer_cache(
+    query: Optional[str] = None,
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Invalidate cached answers similar to a question, or all of them (Admin only)
+    """
+    removed = get_answer_cache().invalidate(query)
+    return SuccessResponse(message=f"Removed {removed} cached answers")
+
+
 @app.delete("/api/admin/users/{user_id}")
 async def delete_user(
     user_id: int,
     current_admin: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a user (Admin only)
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -461,8 +808,13 @@ async def delete_user(
             detail="Cannot delete your own account"
         )
     
-    db.delete(user)
-    db.commit()
+    # Bulk-delete the dependents first; cascading through the ORM would load every message
+    await sync_user_messages(user.id)
+    await db.execute(delete(Message).where(Message.user_id == user.id))
+    await delete_archived_messages(db, user.id)
+    await db.execute(delete(ConversationSummary).where(ConversationSummary.user_id == user.id))
+    await db.delete(user)
+    await db.commit()
     
     return {"message": f"User {user.username} deleted successfully"}
 
@@ -480,7 +832,7 @@ async def health_check():
 
 
 @app.get("/api/check-username/{username}")
-async def check_username_availability(username: str, db: Session = Depends(get_db)):
+async def check_username_availability(username: str, db: AsyncSession = Depends(get_async_db)):
     """
     Check if username is available (for real-time validation)
     """
@@ -495,7 +847,7 @@ async def check_username_availability(username: str, db: Session = Depends(get_d
         return {"available": False, "message": "Please use a username, not an email address"}
     
     # Check if username exists
-    existing_user = db.query(User).filter(User.username == username.lower()).first()
+    existing_user = await get_user_by_username(db, username.lower())
     
     if existing_user:
         return {"available": False, "message": "Username already taken"}
@@ -509,9 +861,14 @@ async def check_username_availability(username: str, db: Session = Depends(get_d
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler"""
     from fastapi.responses import JSONResponse
+    content = {"error": exc.detail, "detail": str(exc.status_code)}
+    if getattr(exc, "emergency", None):
+        # Red-flag guidance from the chat routes (see _with_emergency)
+        content["emergency"] = exc.emergency
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": exc.detail, "detail": str(exc.status_code)}
+        content=content,
+        headers=getattr(exc, "headers", None)
     )
 
 
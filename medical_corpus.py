@@ -0,0 +1,177 @@
+"""
+Offline Wikipedia medical corpus for SwasthAI
+SQLite FTS5 index of medical articles, queried with BM25 ranking
+"""
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from config import settings
+
+
+def clean_wikitext(text: str) -> str:
+    """Strip MediaWiki markup down to readable plain text"""
+    text = re.sub(r"<!--.*?-->", "", text, flags=re.S)
+    text = re.sub(r"<ref[^>/]*/>", "", text)
+    text = re.sub(r"<ref[^>]*>.*?</ref>", "", text, flags=re.S)
+
+    # Templates and tables nest, so remove innermost ones until none are left
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r"\{\{[^{}]*\}\}", "", text)
+        text = re.sub(r"\{\|[^{}]*?\|\}", "", text, flags=re.S)
+
+    # Files/images may contain nested links in their captions
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r"\[\[(?:File|Image|Category):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]", "", text, flags=re.I)
+
+    text = re.sub(r"\[\[[^\[\]|]*\|([^\[\]]*)\]\]", r"\1", text)
+    text = re.sub(r"\[\[([^\[\]]*)\]\]", r"\1", text)
+    text = re.sub(r"\[https?://[^\s\]]+ ([^\]]*)\]", r"\1", text)
+    text = re.sub(r"\[https?://[^\]]*\]", "", text)
+    text = re.sub(r"'{2,}", "", text)
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"^=+\s*(.*?)\s*=+\s*$", r"\n\1\n", text, flags=re.M)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def lead_section(wikitext: str) -> str:
+    """Wikitext before the first section heading"""
+    match = re.search(r"^==[^=].*==\s*$", wikitext, flags=re.M)
+    return wikitext[:match.start()] if match else wikitext
+
+
+# Question words and filler that would otherwise match almost every article
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "to", "in", "on", "at", "by", "with", "from", "about", "and", "or",
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "can", "could", "should", "would", "will",
+    "what", "which", "who", "whom", "when", "where", "why", "how", "it", "its", "this", "that", "these", "those",
+    "i", "me", "my", "we", "our", "you", "your", "he", "she", "his", "her", "they", "their",
+    "tell", "explain", "please", "know", "information", "info", "wikipedia", "article",
+    "kya", "hai", "hain", "ke", "ka", "ki", "ko", "se", "mein", "me", "batao",
+}
+
+
+def _content_terms(query: str) -> List[str]:
+    """Lowercased query words without stopwords, in order, without repeats"""
+    terms = []
+    for term in re.findall(r"\w+", query.lower()):
+        if term not in STOPWORDS and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def _fts_query(terms: List[str], operator: str) -> str:
+    """Safe FTS5 query joining quoted terms with AND or OR"""
+    return f" {operator} ".join(f'"{term}"' for term in terms)
+
+
+class WikipediaIndex:
+    """Full-text index of Wikipedia medical articles"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def create(self):
+        """Create an empty index, replacing any existing one"""
+        conn = self._connection()
+        conn.execute("DROP TABLE IF EXISTS articles")
+        conn.execute("""
+            CREATE VIRTUAL TABLE articles USING fts5(
+                title, summary, body,
+                tokenize = 'porter unicode61'
+            )
+        """)
+        conn.commit()
+
+    def add_articles(self, articles: Iterable[Tuple[str, str, str]]) -> int:
+        """Insert (title, summary, body) rows; returns the number inserted"""
+        conn = self._connection()
+        cursor = conn.executemany("INSERT INTO articles (title, summary, body) VALUES (?, ?, ?)", articles)
+        conn.commit()
+        return cursor.rowcount
+
+    def optimize(self):
+        """Merge FTS5 segments after a bulk load"""
+        conn = self._connection()
+        conn.execute("INSERT INTO articles (articles) VALUES ('optimize')")
+        conn.commit()
+
+    def _match(self, fts_query: str, limit: int, min_score: Optional[float] = None) -> List[Tuple[str, str]]:
+        # FTS5's bm25() is negative, more negative is better
+        rows = self._connection().execute(
+            """
+            SELECT title, summary, bm25(articles, 10.0, 2.0, 1.0) AS score FROM articles
+            WHERE articles MATCH ?
+            ORDER BY score
+            LIMIT ?
+            """,
+            (fts_query, limit)
+        ).fetchall()
+        return [(title, summary) for title, summary, score in rows if min_score is None or -score >= min_score]
+
+    def search(self, query: str, limit: int = 2) -> List[Tuple[str, str]]:
+        """
+        Best (title, summary) matches by BM25; title and summary hits weigh more than body hits
+
+        Articles containing every content term come first. Only when none does are
+        partial (OR) matches considered, and then only above WIKI_MIN_PARTIAL_SCORE,
+        so "dengue fever" does not come back as Malaria just because of "fever".
+        """
+        terms = _content_terms(query)
+        if not terms:
+            return []
+        results = self._match(_fts_query(terms, "AND"), limit)
+        if results or len(terms) == 1:
+            return results
+        return self._match(_fts_query(terms, "OR"), limit, min_score=settings.WIKI_MIN_PARTIAL_SCORE)
+
+
+# Global index instance
+_wikipedia_index = None
+
+
+def get_wikipedia_index() -> WikipediaIndex:
+    """Get or create the global Wikipedia index"""
+    global _wikipedia_index
+    if _wikipedia_index is None:
+        _wikipedia_index = WikipediaIndex(settings.WIKI_INDEX_PATH)
+    return _wikipedia_index
+
+
+def search_local_wikipedia(query: str, top_k: int = 2, max_chars: int = 3000) -> Optional[str]:
+    """
+    Search the offline index
+
+    Returns text in the same "Page:/Summary:" layout as the network wrapper,
+    or None when the index is missing or has no good enough match (a miss lets
+    the caller fall back to the network).
+    """
+    # Don't let sqlite3.connect create an empty file when no index was built
+    if not os.path.exists(settings.WIKI_INDEX_PATH):
+        return None
+
+    index = get_wikipedia_index()
+    try:
+        results = index.search(query, limit=top_k)
+    except sqlite3.Error:
+        return None
+    if not results:
+        return None
+    text = "\n\n".join(f"Page: {title}\nSummary: {summary}" for title, summary in results)
+    return text[:max_chars]
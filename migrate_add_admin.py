@@ -1,59 +1,19 @@
 """
 Migration script to add is_admin column to users table
-Run this script once to update your existing database
+Kept for existing instructions; the change is now migration 1 in migrations.py,
+which runs automatically at startup against whatever DATABASE_URL points to.
 """
 
-import sqlite3
-import os
+from migrations import run_migrations
 
-# Database path
-DB_PATH = "swasthai.db"
 
 def migrate_database():
-    """Add is_admin column to users table"""
-    
-    if not os.path.exists(DB_PATH):
-        print(f"❌ Database file '{DB_PATH}' not found!")
-        print("Please make sure you're running this script from the correct directory.")
-        return False
-    
+    """Add is_admin column to users table (and apply any other pending migrations)"""
     try:
-        # Connect to database
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Check if column already exists
-        cursor.execute("PRAGMA table_info(users)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if 'is_admin' in columns:
-            print("✅ Column 'is_admin' already exists in users table!")
-            conn.close()
-            return True
-        
-        # Add is_admin column with default value False
-        print("📝 Adding 'is_admin' column to users table...")
-        cursor.execute("""
-            ALTER TABLE users 
-            ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT 0
-        """)
-        
-        conn.commit()
-        print("✅ Successfully added 'is_admin' column!")
-        
-        # Show current table structure
-        cursor.execute("PRAGMA table_info(users)")
-        columns = cursor.fetchall()
-        print("\n📋 Current users table structure:")
-        for col in columns:
-            print(f"   - {col[1]} ({col[2]})")
-        
-        conn.close()
+        applied = run_migrations()
+        if not applied:
+            print("✅ Database schema is already up to date!")
         return True
-        
-    except sqlite3.Error as e:
-        print(f"❌ Database error: {e}")
-        return False
     except Exception as e:
         print(f"❌ Error: {e}")
         return False
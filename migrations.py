@@ -0,0 +1,184 @@
+"""
+Versioned schema migrations for SwasthAI
+Ordered, idempotent steps recorded in a schema_version table; works on SQLite and Postgres.
+
+New databases get the current schema from create_all and only record the versions;
+existing databases apply whatever is missing. Startup costs one SELECT when up to date.
+
+Usage:
+    python migrations.py            # Apply pending migrations
+    python migrations.py --status   # Show applied and pending migrations
+"""
+import argparse
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from database import engine
+
+metadata = MetaData()
+schema_version = Table(
+    "schema_version", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+# Arbitrary key for pg_advisory_lock so only one worker migrates at a time
+POSTGRES_LOCK_KEY = 4_203_117
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # False for steps that cannot run in a transaction (CREATE INDEX CONCURRENTLY)
+    transactional: bool = True
+
+
+# ==================== HELPERS ====================
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def create_index(conn: Connection, name: str, table: str, columns: List[str]):
+    """
+    CREATE INDEX IF NOT EXISTS; on Postgres built CONCURRENTLY so writes continue
+
+    A failed concurrent build leaves an INVALID index behind, which is dropped
+    and rebuilt instead of being mistaken for an existing one.
+    """
+    cols = ", ".join(columns)
+    if conn.dialect.name == "postgresql":
+        valid = conn.execute(text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ), {"name": name}).scalar()
+        if valid is False:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({cols})"))
+    else:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({cols})"))
+
+
+def drop_index(conn: Connection, name: str):
+    concurrently = " CONCURRENTLY" if conn.dialect.name == "postgresql" else ""
+    conn.execute(text(f"DROP INDEX{concurrently} IF EXISTS {name}"))
+
+
+# ==================== MIGRATIONS ====================
+# Append only. Each step must be idempotent: create_all may already have built
+# the object on a new database, and two workers may race on a fresh start.
+
+def _add_users_is_admin(conn: Connection):
+    """Formerly migrate_add_admin.py"""
+    if not has_column(conn, "users", "is_admin"):
+        default = "false" if conn.dialect.name == "postgresql" else "0"
+        conn.execute(text(f"ALTER TABLE users ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT {default}"))
+
+
+def _add_messages_user_created_index(conn: Connection):
+    """History queries filter on user_id and order by (created_at, id); the composite covers both"""
+    create_index(conn, "ix_messages_user_created_id", "messages", ["user_id", "created_at", "id"])
+    # Its leading column makes the single-column index redundant
+    drop_index(conn, "ix_messages_user_id")
+
+
+def _add_content_dictionaries(conn: Connection):
+    """
+    Table for the shared message compression dictionaries
+
+    messages.content keeps its TEXT column, so nothing else changes at startup.
+    Existing rows are converted offline with `python content_compression.py --train`
+    rather than here, where a large table would hold up every worker's startup.
+    """
+    from database import ContentDictionary
+    ContentDictionary.__table__.create(conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    Migration(1, "add users.is_admin", _add_users_is_admin),
+    Migration(2, "composite index messages(user_id, created_at, id)", _add_messages_user_created_index,
+              transactional=False),
+    Migration(3, "content_dictionaries table for message compression", _add_content_dictionaries),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ==================== RUNNER ====================
+
+def current_version(conn: Connection) -> int:
+    return conn.execute(select(func.coalesce(func.max(schema_version.c.version), 0))).scalar()
+
+
+def _record(conn: Connection, migration: Migration, savepoint: bool):
+    """Mark a migration applied (savepoint=True inside a transaction, False on an autocommit connection)"""
+    insert = schema_version.insert().values(version=migration.version, name=migration.name)
+    try:
+        if savepoint:
+            with conn.begin_nested():
+                conn.execute(insert)
+        else:
+            conn.execute(insert)
+    except IntegrityError:
+        pass  # Another worker recorded it first; the step itself is idempotent
+
+
+def run_migrations(target_engine: Optional[Engine] = None) -> List[Migration]:
+    """Apply pending migrations in order; returns the ones applied"""
+    target_engine = target_engine or engine
+    metadata.create_all(bind=target_engine)
+
+    with target_engine.connect() as conn:
+        if current_version(conn) >= LATEST_VERSION:
+            return []
+
+    applied = []
+    # Autocommit: transactional steps open their own transaction, the rest run bare
+    with target_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": POSTGRES_LOCK_KEY})
+        try:
+            done = set(conn.execute(select(schema_version.c.version)).scalars())
+            for migration in MIGRATIONS:
+                if migration.version in done:
+                    continue
+                print(f"🔧 Migration {migration.version}: {migration.name}")
+                if migration.transactional:
+                    with target_engine.begin() as tx:
+                        migration.apply(tx)
+                        _record(tx, migration, savepoint=True)
+                else:
+                    migration.apply(conn)
+                    _record(conn, migration, savepoint=False)
+                applied.append(migration)
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": POSTGRES_LOCK_KEY})
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply SwasthAI schema migrations")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations only")
+    args = parser.parse_args()
+
+    if not args.status:
+        from database import init_db
+        init_db()  # Creates missing tables, then runs the migrations
+
+    metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        done = {row.version: row for row in conn.execute(select(schema_version))}
+    for migration in MIGRATIONS:
+        row = done.get(migration.version)
+        state = f"applied {row.applied_at:%Y-%m-%d %H:%M}" if row else "pending"
+        print(f"   {migration.version:>3}  {migration.name:<55} {state}")
+
+
+if __name__ == "__main__":
+    main()
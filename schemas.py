@@ -52,6 +52,7 @@ class ChatMessage(BaseModel):
 
 class MessageResponse(BaseModel):
     """Schema for a single message in history"""
+    id: int
     role: str
     content: str
     created_at: datetime
@@ -63,13 +64,16 @@ class MessageResponse(BaseModel):
 class ChatResponse(BaseModel):
     """Schema for AI response"""
     response: str
+    emergency: Optional[str] = None  # Red-flag guidance matched before the AI ran
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
 class ChatHistoryResponse(BaseModel):
-    """Schema for chat history"""
+    """Schema for one page of chat history (oldest first within the page)"""
     messages: List[MessageResponse]
-    total_messages: int
+    total_messages: Optional[int] = None  # Not counted per page; history can be very long
+    has_more: bool = False  # Older messages exist
+    next_cursor: Optional[str] = None  # Pass as `before` to fetch the next older page
 
 
 # Generic Response Schemas
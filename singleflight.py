@@ -0,0 +1,114 @@
+"""
+Single-flight request coalescing for SwasthAI
+Concurrent callers with the same key share one in-flight computation instead of
+repeating identical tool or LLM work.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from metrics import metrics
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls by key
+    
+    Sync callers (threads) and async callers (one event loop) are tracked
+    separately; each side shares work only with its own kind of caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+
+    # ---------- Threads ----------
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run func once for all threads calling with the same key at the same time"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            metrics.incr(f"singleflight.{self.name}.coalesced")
+            return future.result()
+
+        metrics.incr(f"singleflight.{self.name}.executed")
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    # ---------- Event loop ----------
+
+    def join(self, key: Hashable) -> Tuple[asyncio.Future, bool]:
+        """
+        Join the in-flight call for key, or become its leader
+        
+        Returns (future, is_leader). The leader must finish the call with
+        resolve() or fail(); followers await the future.
+        """
+        future = self._async_calls.get(key)
+        if future is not None:
+            metrics.incr(f"singleflight.{self.name}.coalesced")
+            return future, False
+        future = asyncio.get_running_loop().create_future()
+        # Followers may never await (e.g. client disconnected); don't log unretrieved errors
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._async_calls[key] = future
+        metrics.incr(f"singleflight.{self.name}.executed")
+        return future, True
+
+    def resolve(self, key: Hashable, result: Any):
+        """Hand the leader's result to every follower"""
+        future = self._async_calls.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def fail(self, key: Hashable, error: BaseException):
+        """Propagate the leader's failure to every follower"""
+        future = self._async_calls.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await func once for all coroutines calling with the same key at the same time"""
+        future, leader = self.join(key)
+        if not leader:
+            # Shield so one follower being cancelled doesn't cancel the shared result
+            return await asyncio.shield(future)
+
+        try:
+            result = await func()
+        except BaseException as e:
+            self.fail(key, e if isinstance(e, Exception) else RuntimeError("Coalesced call was cancelled"))
+            raise
+        self.resolve(key, result)
+        return result
+
+
+# Global single-flight groups
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_singleflight(name: str) -> SingleFlight:
+    """Get or create the named single-flight group"""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
@@ -53,39 +53,89 @@ async function loadUserInfo() {
     }
 }
 
+// Chat history paging state (newest page is loaded first, older pages on scroll-up)
+const HISTORY_PAGE_SIZE = 50;
+let historyCursor = null;
+let hasMoreHistory = false;
+let isLoadingHistory = false;
+
+async function fetchHistoryPage(before = null) {
+    const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE });
+    if (before) params.set('before', before);
+    
+    const response = await fetch(`/api/messages?${params}`, {
+        headers: {
+            'Authorization': `Bearer ${token}`
+        }
+    });
+    if (!response.ok) throw new Error(`History request failed: ${response.status}`);
+    
+    const data = await response.json();
+    historyCursor = data.next_cursor;
+    hasMoreHistory = data.has_more;
+    return data.messages;
+}
+
 // Load chat history
 async function loadChatHistory() {
     try {
-        const response = await fetch('/api/messages', {
-            headers: {
-                'Authorization': `Bearer ${token}`
-            }
-        });
+        isLoadingHistory = true;
+        const messages = await fetchHistoryPage();
         
-        if (response.ok) {
-            const data = await response.json();
-            
-            // Clear loading message
-            chatMessages.innerHTML = '';
-            
-            if (data.messages.length === 0) {
-                // Show welcome message
-                await showGreeting();
-            } else {
-                // Display messages
-                data.messages.forEach(msg => {
-                    appendMessage(msg.content, msg.role, msg.created_at);
-                });
-            }
-            
-            scrollToBottom();
+        // Clear loading message
+        chatMessages.innerHTML = '';
+        
+        if (messages.length === 0) {
+            // Show welcome message
+            await showGreeting();
+        } else {
+            // Display messages
+            messages.forEach(msg => {
+                appendMessage(msg.content, msg.role, msg.created_at);
+            });
         }
+        
+        scrollToBottom();
     } catch (error) {
         console.error('Error loading chat history:', error);
         chatMessages.innerHTML = '<p style="text-align:center; color: var(--danger-color);">Failed to load messages</p>';
+    } finally {
+        isLoadingHistory = false;
+    }
+    
+    // A short first page may not fill the screen, so there is nothing to scroll
+    if (hasMoreHistory && chatMessages.scrollHeight <= chatMessages.clientHeight) {
+        loadOlderMessages();
+    }
+}
+
+// Prepend the next older page, keeping the visible messages in place
+async function loadOlderMessages() {
+    if (!hasMoreHistory || isLoadingHistory) return;
+    isLoadingHistory = true;
+    
+    try {
+        const messages = await fetchHistoryPage(historyCursor);
+        const previousHeight = chatMessages.scrollHeight;
+        
+        const fragment = document.createDocumentFragment();
+        messages.forEach(msg => {
+            fragment.appendChild(createMessageElement(msg.content, msg.role, msg.created_at));
+        });
+        chatMessages.insertBefore(fragment, chatMessages.firstChild);
+        
+        chatMessages.scrollTop += chatMessages.scrollHeight - previousHeight;
+    } catch (error) {
+        console.error('Error loading older messages:', error);
+    } finally {
+        isLoadingHistory = false;
     }
 }
 
+chatMessages.addEventListener('scroll', () => {
+    if (chatMessages.scrollTop < 200) loadOlderMessages();
+}, { passive: true });
+
 // Show greeting message
 async function showGreeting() {
     try {
@@ -104,8 +154,8 @@ async function showGreeting() {
     }
 }
 
-// Append message to chat
-function appendMessage(content, role, timestamp = null) {
+// Build a message element
+function createMessageElement(content, role, timestamp = null) {
     const messageDiv = document.createElement('div');
     messageDiv.className = `message ${role}`;
     
@@ -128,7 +178,12 @@ function appendMessage(content, role, timestamp = null) {
     
     messageDiv.appendChild(avatar);
     messageDiv.appendChild(bubble);
-    chatMessages.appendChild(messageDiv);
+    return messageDiv;
+}
+
+// Append message to chat
+function appendMessage(content, role, timestamp = null) {
+    chatMessages.appendChild(createMessageElement(content, role, timestamp));
 }
 
 // Format message content with better HTML rendering
@@ -225,6 +280,107 @@ function scrollToBottom() {
     chatMessages.scrollTop = chatMessages.scrollHeight;
 }
 
+// Friendly labels for tool activity shown while a reply streams in
+const TOOL_LABELS = {
+    search_medical_info: 'Searching medical information',
+    search_wikipedia_medical: 'Looking up Wikipedia',
+    check_drug_interactions: 'Checking medicine information',
+    calculate_bmi: 'Calculating BMI',
+    get_emergency_guidance: 'Checking emergency guidance',
+    search_nearby_facilities: 'Finding healthcare facilities',
+    general_health_tips: 'Collecting health tips'
+};
+
+// Parse one Server-Sent Events frame into {event, data}
+function parseSseFrame(frame) {
+    let event = 'message';
+    const dataLines = [];
+    frame.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    });
+    if (dataLines.length === 0) return null;
+    return { event, data: JSON.parse(dataLines.join('\n')) };
+}
+
+// Render a streamed reply from /api/chat/stream as tokens arrive
+async function renderStreamedReply(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    let bubble = null;
+    let status = null;
+    
+    const ensureBubble = () => {
+        if (!bubble) {
+            removeTypingIndicator();
+            appendMessage('', 'assistant');
+            bubble = chatMessages.lastElementChild.querySelector('.message-bubble');
+        }
+        return bubble;
+    };
+    
+    const render = () => {
+        const target = ensureBubble();
+        target.innerHTML = formatMessageContent(text, 'assistant');
+        if (status) target.appendChild(status);
+        scrollToBottom();
+    };
+    
+    const handle = ({ event, data }) => {
+        if (event === 'emergency') {
+            // Red-flag guidance arrives before the AI answer; show it as its own message
+            removeTypingIndicator();
+            appendMessage(data.guidance, 'assistant');
+            showTypingIndicator();
+        } else if (event === 'token') {
+            text += data.content;
+            render();
+        } else if (event === 'tool_start') {
+            status = document.createElement('div');
+            status.className = 'message-status';
+            status.textContent = data.tools.map(name => TOOL_LABELS[name] || name).join(', ') + '…';
+            render();
+        } else if (event === 'tool_end') {
+            status = null;
+            render();
+        } else if (event === 'done') {
+            // Replace streamed fragments (which may include text from tool-calling rounds) with the final answer
+            text = data.response;
+            status = null;
+            render();
+        } else if (event === 'error') {
+            text = data.retry_after
+                ? `${data.detail} (try again in about ${data.retry_after}s)`
+                : `Sorry, I encountered an error: ${data.detail}`;
+            status = null;
+            render();
+        }
+    };
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = parseSseFrame(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            if (frame) handle(frame);
+        }
+    }
+    
+    if (!bubble) {
+        removeTypingIndicator();
+        appendMessage('Sorry, I could not process your message. Please try again.', 'assistant');
+    }
+}
+
 // Send message
 chatForm.addEventListener('submit', async (e) => {
     e.preventDefault();
@@ -247,7 +403,7 @@ chatForm.addEventListener('submit', async (e) => {
     showTypingIndicator();
     
     try {
-        const response = await fetch('/api/chat', {
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Authorization': `Bearer ${token}`,
@@ -256,14 +412,21 @@ chatForm.addEventListener('submit', async (e) => {
             body: JSON.stringify({ message })
         });
         
-        removeTypingIndicator();
-        
         if (response.ok) {
-            const data = await response.json();
-            appendMessage(data.response, 'assistant');
+            await renderStreamedReply(response);
+        } else if (response.status === 429) {
+            // Server is shedding load; tell the user when to retry
+            removeTypingIndicator();
+            const error = await response.json();
+            // Red-flag guidance is never shed with the AI work
+            if (error.emergency) appendMessage(error.emergency, 'assistant');
+            const retryAfter = response.headers.get('Retry-After');
+            appendMessage(`${error.error}${retryAfter ? ` (try again in about ${retryAfter}s)` : ''}`, 'assistant');
         } else {
+            removeTypingIndicator();
             const error = await response.json();
-            appendMessage(`Sorry, I encountered an error: ${error.detail}`, 'assistant');
+            if (error.emergency) appendMessage(error.emergency, 'assistant');
+            appendMessage(`Sorry, I encountered an error: ${error.error || error.detail}`, 'assistant');
         }
     } catch (error) {
         console.error('Chat error:', error);
@@ -313,6 +476,8 @@ clearChatBtn.addEventListener('click', async () => {
         
         if (response.ok) {
             chatMessages.innerHTML = '';
+            historyCursor = null;
+            hasMoreHistory = false;
             await showGreeting();
             scrollToBottom();
         }
@@ -0,0 +1,57 @@
+"""
+Shared pytest setup: a throwaway SQLite database and the offline AI provider
+Settings are read at import time, so the environment is set before any app module loads.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+_data_dir = tempfile.mkdtemp(prefix="swasthai-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["AI_PROVIDER"] = "fake"
+os.environ["TOOL_CACHE_PATH"] = os.path.join(_data_dir, "tool_cache.db")
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Create the schema once per test run"""
+    from database import init_db
+    init_db()
+
+
+def run_async(coroutine_function, *args):
+    """Run a coroutine on a fresh loop; pooled async connections are bound to the loop, so dispose them after"""
+    from database import async_engine
+
+    async def run():
+        try:
+            return await coroutine_function(*args)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def make_user(database):
+    """Factory for users with unique names; returns the new user's id"""
+    from database import SessionLocal, User
+
+    def make(is_admin: bool = False) -> int:
+        db = SessionLocal()
+        try:
+            user = User(username=f"test_{uuid.uuid4().hex[:12]}", full_name="Test User",
+                        hashed_password="x", is_admin=is_admin)
+            db.add(user)
+            db.commit()
+            return user.id
+        finally:
+            db.close()
+    return make
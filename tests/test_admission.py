@@ -0,0 +1,101 @@
+"""
+Admission control: per-user and queue limits, queue timeout, and Retry-After hints
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from admission import AdmissionController
+
+
+def _controller(**overrides):
+    options = {"max_concurrency": 2, "max_queue": 2, "queue_timeout": 0.05, "max_per_user": 1}
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def _rejection(controller, user_id):
+    with pytest.raises(HTTPException) as error:
+        controller.check(user_id)
+    assert error.value.status_code == 429
+    return error.value
+
+
+def test_retry_after_scales_with_backlog():
+    controller = _controller()
+    assert controller._retry_after() == 3  # ceil(1 / 2 * 5.0)
+    controller._waiting = 3
+    assert controller._retry_after() == 10  # ceil(4 / 2 * 5.0)
+    controller._avg_service_seconds = 0.01
+    assert controller._retry_after() == 1
+
+
+def test_second_message_from_same_user_is_shed():
+    async def scenario():
+        controller = _controller()
+        async with controller.slot(1):
+            rejection = _rejection(controller, 1)
+            assert "being answered" in rejection.detail
+            assert rejection.headers["Retry-After"] == "3"
+            controller.check(2)
+        controller.check(1)
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_is_shed_with_retry_after():
+    async def scenario():
+        controller = _controller(queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold(user_id):
+            async with controller.slot(user_id):
+                await release.wait()
+
+        holders = [asyncio.create_task(hold(user_id)) for user_id in range(1, 5)]
+        await asyncio.sleep(0.01)
+        assert (controller._active, controller._waiting) == (2, 2)
+
+        rejection = _rejection(controller, 99)
+        assert "many requests" in rejection.detail
+        assert rejection.headers["Retry-After"] == "8"  # ceil(3 / 2 * 5.0)
+
+        release.set()
+        await asyncio.gather(*holders)
+        assert (controller._active, controller._waiting, controller._per_user) == (0, 0, {})
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_sheds_and_releases_user():
+    async def scenario():
+        controller = _controller(max_concurrency=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot(1):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as error:
+            async with controller.slot(2):
+                pass
+        assert error.value.status_code == 429
+        assert controller._per_user == {1: 1}
+
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+
+
+def test_service_time_average_follows_slot_duration():
+    async def scenario():
+        controller = _controller()
+        async with controller.slot(1):
+            pass
+        assert controller._avg_service_seconds == pytest.approx(4.0, abs=0.01)  # 0.8 * 5.0 + 0.2 * ~0
+
+    asyncio.run(scenario())
@@ -0,0 +1,58 @@
+"""
+Answer cache matching: paraphrases hit, medically different questions never do
+"""
+import pytest
+
+from answer_cache import AnswerCache, normalize_question, qualifiers
+
+
+def _cache() -> AnswerCache:
+    return AnswerCache(threshold=0.95, ttl=3600, max_entries=100)
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("treatment for type 1 diabetes", "treatment for type 2 diabetes"),
+    ("how much paracetamol can I take", "how much paracetamol can my child take"),
+    ("side effects of metformin 500", "side effects of metformin 1000"),
+    ("I have sugar", "I have diabetes"),
+    ("is paracetamol safe", "is paracetamol safe during pregnancy"),
+    ("dose of ibuprofen for adults", "dose of ibuprofen for a baby"),
+    ("symptoms of dengue", "symptoms of malaria"),
+])
+def test_near_misses_do_not_hit(cached, asked):
+    cache = _cache()
+    cache.put(cached, "cached answer")
+    assert cache.get(asked) is None
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What are the symptoms of dengue?", "symptoms of dengue"),
+    ("dengue ke lakshan kya hain", "what are the symptoms of dengue"),
+    ("How to prevent malaria?", "how to prevent malaria"),
+    ("treatment for type 2 diabetes", "Treatment for Type 2 diabetes?"),
+])
+def test_paraphrases_hit(cached, asked):
+    cache = _cache()
+    cache.put(cached, "cached answer")
+    assert cache.get(asked) == "cached answer"
+
+
+def test_numbers_and_subjects_are_qualifiers():
+    assert qualifiers(normalize_question("Can my child take 250 mg paracetamol?")) == {"my", "child", "250", "mg"}
+    assert qualifiers(normalize_question("symptoms of dengue")) == frozenset()
+
+
+def test_put_does_not_replace_entry_with_other_qualifiers():
+    cache = _cache()
+    cache.put("treatment for type 1 diabetes", "type 1 answer")
+    cache.put("treatment for type 2 diabetes", "type 2 answer")
+    assert cache.get("treatment for type 1 diabetes") == "type 1 answer"
+    assert cache.get("treatment for type 2 diabetes") == "type 2 answer"
+
+
+def test_invalidate_matches_qualifiers():
+    cache = _cache()
+    cache.put("treatment for type 1 diabetes", "type 1 answer")
+    cache.put("treatment for type 2 diabetes", "type 2 answer")
+    assert cache.invalidate("treatment for type 2 diabetes") == 1
+    assert cache.get("treatment for type 1 diabetes") == "type 1 answer"
@@ -0,0 +1,158 @@
+"""
+Cold-history archival: monthly blocks, paging across live and archived messages,
+and platform counters through archiving and deletion
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+import main
+from archive import archive_user, archived_message_counts, decode_block
+from conftest import run_async
+from database import AsyncSessionLocal, SessionLocal, Message, MessageArchive, PlatformStat
+
+NOW = datetime.utcnow()
+
+
+def _add_messages(user_id: int, created: list) -> list:
+    """One message per timestamp, content numbered in chronological order; returns the contents"""
+    db = SessionLocal()
+    try:
+        contents = [f"message {i} of user {user_id}" for i in range(len(created))]
+        db.add_all([
+            Message(user_id=user_id, role="user" if i % 2 == 0 else "assistant", content=content, created_at=at)
+            for i, (content, at) in enumerate(zip(contents, created))
+        ])
+        db.commit()
+        return contents
+    finally:
+        db.close()
+
+
+def _archive(user_id: int, days: float = 90) -> int:
+    db = SessionLocal()
+    try:
+        return archive_user(db, user_id, NOW - timedelta(days=days))
+    finally:
+        db.close()
+
+
+def _message_total() -> int:
+    db = SessionLocal()
+    try:
+        return db.execute(select(PlatformStat.value).where(PlatformStat.name == "messages")).scalar()
+    finally:
+        db.close()
+
+
+def _blocks(user_id: int) -> list:
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(MessageArchive).where(MessageArchive.user_id == user_id).order_by(MessageArchive.month)
+        ).scalars().all()
+    finally:
+        db.close()
+
+
+def _hot_count(user_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.execute(select(func.count()).where(Message.user_id == user_id)).scalar()
+    finally:
+        db.close()
+
+
+async def _archived_counts(user_ids):
+    async with AsyncSessionLocal() as db:
+        return await archived_message_counts(db, user_ids)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def account(client):
+    """(user_id, auth headers) of a new user"""
+    response = client.post("/api/signup", json={
+        "username": f"archive_{uuid.uuid4().hex[:12]}", "password": "secret123", "full_name": "Archive Test"
+    })
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return client.get("/api/user", headers=headers).json()["id"], headers
+
+
+# Four messages in each of two old months, then three recent ones
+OLD_MONTHS = [datetime(2024, 1, 10) + timedelta(hours=i) for i in range(4)] + \
+             [datetime(2024, 2, 20) + timedelta(hours=i) for i in range(4)]
+RECENT = [NOW - timedelta(days=1) + timedelta(minutes=i) for i in range(3)]
+
+
+def test_old_messages_move_into_monthly_blocks(make_user):
+    user_id = make_user()
+    contents = _add_messages(user_id, OLD_MONTHS + RECENT)
+    total_before = _message_total()
+
+    assert _archive(user_id) == 8
+
+    blocks = _blocks(user_id)
+    assert [(b.month, b.message_count) for b in blocks] == [("2024-01", 4), ("2024-02", 4)]
+    assert [m.content for b in blocks for m in decode_block(b)] == contents[:8]
+    assert (blocks[0].first_created_at, blocks[0].last_created_at) == (OLD_MONTHS[0], OLD_MONTHS[3])
+    assert _hot_count(user_id) == 3
+    # Archived messages still exist: the core delete must not lower the platform total
+    assert _message_total() == total_before
+    assert run_async(_archived_counts, [user_id]) == {user_id: 8}
+
+
+def test_rearchiving_merges_into_the_existing_block(make_user):
+    user_id = make_user()
+    _add_messages(user_id, OLD_MONTHS[:2])
+    _archive(user_id)
+    _add_messages(user_id, [OLD_MONTHS[0] - timedelta(hours=1), OLD_MONTHS[1] + timedelta(minutes=30)])
+
+    assert _archive(user_id) == 2
+
+    [block] = _blocks(user_id)
+    archived = decode_block(block)
+    assert block.message_count == 4
+    assert [m.created_at for m in archived] == sorted(m.created_at for m in archived)
+    assert block.last_message_id == max(m.id for m in archived)
+
+
+def test_history_pages_continue_into_the_archive(client, account):
+    user_id, headers = account
+    contents = _add_messages(user_id, OLD_MONTHS + RECENT)
+    _archive(user_id)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"before": cursor} if cursor else {})}
+        page = client.get("/api/messages", params=params, headers=headers).json()
+        pages.append([m["content"] for m in page["messages"]])
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+
+    assert pages[0] == contents[-3:]  # Newest page is the hot table
+    assert [content for page in reversed(pages) for content in page] == contents
+    assert cursor is None
+
+
+def test_clearing_history_removes_blocks_and_counts(client, account):
+    user_id, headers = account
+    _add_messages(user_id, OLD_MONTHS + RECENT)
+    _archive(user_id)
+    total_before = _message_total()
+
+    client.delete("/api/messages", headers=headers).raise_for_status()
+
+    assert _blocks(user_id) == []
+    assert _hot_count(user_id) == 0
+    assert _message_total() == total_before - len(OLD_MONTHS + RECENT)
@@ -0,0 +1,68 @@
+"""
+Answer-cache hits are served before admission control, so load shedding never drops them
+"""
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+
+import main
+from answer_cache import get_answer_cache
+
+CACHED_QUESTION = "what are the early symptoms of chikungunya"
+CACHED_ANSWER = "Chikungunya usually starts with sudden fever and severe joint pain."
+
+
+class _FullAdmission:
+    """Admission controller that sheds every request that reaches it"""
+
+    def check(self, user_id: int):
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Busy", headers={"Retry-After": "3"})
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def headers(client):
+    response = client.post("/api/signup", json={
+        "username": f"cache_{uuid.uuid4().hex[:12]}", "password": "secret123", "full_name": "Cache Test"
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(autouse=True)
+def cached_question(monkeypatch):
+    monkeypatch.setattr(main, "get_admission", lambda: _FullAdmission())
+    get_answer_cache().put(CACHED_QUESTION, CACHED_ANSWER)
+    yield
+    get_answer_cache().invalidate(CACHED_QUESTION)
+
+
+def test_chat_serves_cache_hit_while_shedding(client, headers):
+    response = client.post("/api/chat", json={"message": CACHED_QUESTION}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["response"] == CACHED_ANSWER
+
+    history = client.get("/api/messages", headers=headers).json()["messages"]
+    assert [m["content"] for m in history] == [CACHED_QUESTION, CACHED_ANSWER]
+
+
+def test_stream_serves_cache_hit_while_shedding(client, headers):
+    response = client.post("/api/chat/stream", json={"message": CACHED_QUESTION}, headers=headers)
+    assert response.status_code == 200
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [event["type"] for event in events] == ["token", "done"]
+    assert events[-1]["response"] == CACHED_ANSWER
+
+
+@pytest.mark.parametrize("path", ["/api/chat", "/api/chat/stream"])
+def test_cache_miss_is_still_shed(client, headers, path):
+    response = client.post(path, json={"message": "how do I treat a sprained ankle"}, headers=headers)
+    assert response.status_code == 429
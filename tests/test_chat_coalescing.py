@@ -0,0 +1,113 @@
+"""
+Coalesced first-turn chats: followers get their own errors and their own admission outcome
+"""
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import HTTPException, status
+
+import main
+from admission import AdmissionController
+from conftest import run_async
+
+RED_FLAG = "My mother has severe chest pain and is sweating"
+
+
+class _SlowFailingAgent:
+    """Takes a moment (so requests coalesce), then fails the way a queue timeout does"""
+
+    def __init__(self):
+        self.calls = 0
+        self.raised = None
+
+    async def achat(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        self.raised = HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Busy",
+                                    headers={"Retry-After": "4"})
+        raise self.raised
+
+
+class _SlowAgent:
+    def __init__(self):
+        self.calls = 0
+
+    async def achat(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        return "Please see a doctor today."
+
+
+async def _signup(client: httpx.AsyncClient) -> dict:
+    response = await client.post("/api/signup", json={
+        "username": f"flight_{uuid.uuid4().hex[:12]}", "password": "secret123", "full_name": "Flight Test"
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+
+@pytest.fixture
+def admission(monkeypatch, database):
+    controller = AdmissionController(max_concurrency=4, max_queue=4, queue_timeout=5, max_per_user=1)
+    monkeypatch.setattr(main, "get_admission", lambda: controller)
+    return controller
+
+
+def test_with_emergency_never_tags_the_shared_exception():
+    shared = HTTPException(status_code=429, detail="Busy", headers={"Retry-After": "4"})
+
+    tagged = main._with_emergency(shared, "call 108")
+
+    assert tagged is not shared
+    assert (tagged.status_code, tagged.detail, tagged.headers, tagged.emergency) == (429, "Busy", {"Retry-After": "4"}, "call 108")
+    assert not hasattr(shared, "emergency")
+
+
+def test_followers_get_their_own_copy_of_the_leader_error(admission, monkeypatch):
+    agent = _SlowFailingAgent()
+    monkeypatch.setattr(main, "get_agent", lambda: agent)
+
+    async def scenario():
+        async with _client() as client:
+            headers = [await _signup(client) for _ in range(3)]
+            return await asyncio.gather(*(
+                client.post("/api/chat", json={"message": RED_FLAG}, headers=h) for h in headers
+            ))
+
+    responses = run_async(scenario)
+
+    assert agent.calls == 1
+    assert [r.status_code for r in responses] == [429, 429, 429]
+    assert all("EMERGENCY" in r.json()["emergency"] and r.headers["Retry-After"] == "4" for r in responses)
+    assert not hasattr(agent.raised, "emergency")
+
+
+def test_follower_is_not_shed_by_the_leaders_per_user_limit(admission, monkeypatch):
+    agent = _SlowAgent()
+    monkeypatch.setattr(main, "get_agent", lambda: agent)
+    question = f"is turmeric milk good for a cold {uuid.uuid4().hex[:6]}"
+
+    async def scenario():
+        async with _client() as client:
+            busy, other = await _signup(client), await _signup(client)
+            leader = asyncio.create_task(client.post("/api/chat", json={"message": question}, headers=busy))
+            await asyncio.sleep(0.05)
+            # The busy user's second message is over their limit; the other user's joins the flight
+            second, follower = await asyncio.gather(
+                client.post("/api/chat", json={"message": question}, headers=busy),
+                client.post("/api/chat", json={"message": question}, headers=other),
+            )
+            return await leader, second, follower
+
+    leader, second, follower = run_async(scenario)
+
+    assert agent.calls == 1
+    assert (leader.status_code, second.status_code, follower.status_code) == (200, 429, 200)
+    assert follower.json()["response"] == "Please see a doctor today."
+    assert admission._per_user == {}
@@ -0,0 +1,67 @@
+"""
+Red-flag guidance survives admission rejections and agent failures on both chat routes
+"""
+import uuid
+
+import pytest
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+
+import main
+
+RED_FLAG = "My father has severe chest pain since an hour"
+
+
+class _FullAdmission:
+    """Admission controller that sheds every request"""
+
+    def check(self, user_id: int):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="SwasthAI is handling many requests right now. Please try again shortly.",
+            headers={"Retry-After": "7"}
+        )
+
+
+class _FailingAgent:
+    async def achat(self, *args, **kwargs):
+        raise RuntimeError("provider down")
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def headers(client):
+    response = client.post("/api/signup", json={
+        "username": f"triage_{uuid.uuid4().hex[:12]}", "password": "secret123", "full_name": "Triage Test"
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.parametrize("path", ["/api/chat", "/api/chat/stream"])
+def test_shed_request_still_returns_guidance(client, headers, monkeypatch, path):
+    monkeypatch.setattr(main, "get_admission", lambda: _FullAdmission())
+    response = client.post(path, json={"message": RED_FLAG}, headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert "chest pain" not in response.json()["error"]
+    assert "EMERGENCY" in response.json()["emergency"]
+
+
+def test_shed_request_without_red_flag_has_no_guidance(client, headers, monkeypatch):
+    monkeypatch.setattr(main, "get_admission", lambda: _FullAdmission())
+    response = client.post("/api/chat", json={"message": "tips for better sleep"}, headers=headers)
+    assert response.status_code == 429
+    assert "emergency" not in response.json()
+
+
+def test_agent_failure_still_returns_guidance(client, headers, monkeypatch):
+    monkeypatch.setattr(main, "get_agent", lambda: _FailingAgent())
+    response = client.post("/api/chat", json={"message": RED_FLAG}, headers=headers)
+    assert response.status_code == 500
+    assert "EMERGENCY" in response.json()["emergency"]
@@ -0,0 +1,98 @@
+"""
+CompressedText round trips: short and long values, legacy plain-text rows, trained dictionaries,
+and the passthrough on dialects that are not compressed
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+
+import content_compression
+from config import settings
+from content_compression import CompressedText, compress_existing_messages, decompress_content
+from database import SessionLocal, Message, engine
+
+LONG_REPLY = (
+    "**Dengue fever** is spread by Aedes mosquitoes. Drink plenty of fluids, rest, and take "
+    "paracetamol for fever. Avoid ibuprofen and aspirin. ⚠️ See a doctor at once for bleeding gums, "
+    "severe abdominal pain or persistent vomiting. खूब पानी पिएं।\n"
+) * 8
+
+
+def _save(user_id: int, content: str) -> int:
+    db = SessionLocal()
+    try:
+        message = Message(user_id=user_id, role="assistant", content=content)
+        db.add(message)
+        db.commit()
+        return message.id
+    finally:
+        db.close()
+
+
+def _stored(message_id: int):
+    """(typeof(content), value) as stored, and the value read back through the ORM"""
+    db = SessionLocal()
+    try:
+        raw = db.execute(text("SELECT typeof(content) FROM messages WHERE id = :id"), {"id": message_id}).scalar()
+        return raw, db.get(Message, message_id).content
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def user_id(make_user):
+    return make_user()
+
+
+def test_short_value_stays_plain_text(user_id):
+    short = "Take rest and drink fluids."
+    assert len(short.encode("utf-8")) < settings.CONTENT_COMPRESSION_MIN_BYTES
+    assert _stored(_save(user_id, short)) == ("text", short)
+
+
+def test_long_value_is_stored_compressed_and_reads_back(user_id):
+    assert len(LONG_REPLY.encode("utf-8")) >= settings.CONTENT_COMPRESSION_MIN_BYTES
+    assert _stored(_save(user_id, LONG_REPLY)) == ("blob", LONG_REPLY)
+
+
+def test_legacy_plain_text_rows_read_back_and_backfill(user_id):
+    with engine.begin() as conn:
+        message_id = conn.execute(text(
+            "INSERT INTO messages (user_id, role, content) VALUES (:user_id, 'assistant', :content)"
+        ), {"user_id": user_id, "content": LONG_REPLY}).lastrowid
+    assert _stored(message_id) == ("text", LONG_REPLY)
+
+    summary = compress_existing_messages()
+
+    assert summary["messages"] >= 1 and summary["bytes_after"] < summary["bytes_before"]
+    assert _stored(message_id) == ("blob", LONG_REPLY)
+    assert compress_existing_messages()["messages"] == 0
+
+
+def test_trained_dictionary_round_trip(user_id, monkeypatch):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO messages (user_id, role, content) VALUES (:user_id, 'assistant', :content)"
+        ), [{"user_id": user_id, "content": f"Reply {i}.\n{LONG_REPLY}"} for i in range(content_compression.MIN_TRAINING_SAMPLES)])
+    monkeypatch.setattr(content_compression, "_current_id", content_compression._current_id)
+
+    dictionary_id = content_compression.train_dictionary()
+
+    assert dictionary_id
+    packed = content_compression.compress_content(LONG_REPLY)
+    assert content_compression.HEADER.unpack_from(packed)[1] == dictionary_id
+    assert decompress_content(packed) == LONG_REPLY
+    # Rows written with an earlier dictionary (or none) still decode
+    assert _stored(_save(user_id, LONG_REPLY)) == ("blob", LONG_REPLY)
+
+
+def test_non_sqlite_dialect_passes_text_through():
+    column = CompressedText()
+    assert column.process_bind_param(LONG_REPLY, postgresql.dialect()) == LONG_REPLY
+    assert column.process_result_value(LONG_REPLY, postgresql.dialect()) == LONG_REPLY
+    assert isinstance(column.process_bind_param(LONG_REPLY, sqlite.dialect()), bytes)
+
+
+def test_disabled_compression_writes_plain_text(monkeypatch):
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_ENABLED", False)
+    assert CompressedText().process_bind_param(LONG_REPLY, sqlite.dialect()) == LONG_REPLY
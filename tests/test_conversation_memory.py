@@ -0,0 +1,92 @@
+"""
+Conversation context: nothing between the summary and the raw history is dropped
+"""
+from datetime import datetime, timedelta
+
+from conftest import run_async
+from config import settings
+from context_builder import history_message_tokens
+from conversation_memory import load_conversation_context, _raw_window_start
+from database import SessionLocal, AsyncSessionLocal, Message, ConversationSummary
+
+
+def _add_messages(user_id: int, contents) -> list:
+    """Insert alternating user/assistant messages a second apart; returns their ids"""
+    db = SessionLocal()
+    try:
+        start = datetime.utcnow() - timedelta(hours=1)
+        messages = [
+            Message(user_id=user_id, role="user" if i % 2 == 0 else "assistant", content=content,
+                    created_at=start + timedelta(seconds=i))
+            for i, content in enumerate(contents)
+        ]
+        db.add_all(messages)
+        db.commit()
+        return [message.id for message in messages]
+    finally:
+        db.close()
+
+
+def _set_summary(user_id: int, last_message_id: int):
+    db = SessionLocal()
+    try:
+        db.add(ConversationSummary(user_id=user_id, summary="Earlier: asked about fever.", last_message_id=last_message_id))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _context(user_id: int):
+    async with AsyncSessionLocal() as db:
+        return await load_conversation_context(db, user_id)
+
+
+def test_unsummarized_messages_outside_raw_window_are_loaded(make_user):
+    user_id = make_user()
+    ids = _add_messages(user_id, [f"message {i}" for i in range(12)])
+    _set_summary(user_id, last_message_id=ids[1])
+
+    history, summary = run_async(_context, user_id)
+    assert summary == "Earlier: asked about fever."
+    assert [m["content"] for m in history] == [f"message {i}" for i in range(2, 12)]
+
+
+def test_many_short_messages_fill_the_token_budget(make_user):
+    user_id = make_user()
+    _add_messages(user_id, [f"ok {i}" for i in range(60)])
+
+    history, _ = run_async(_context, user_id)
+    assert len(history) == 60
+
+
+def test_long_history_stops_at_the_token_budget(make_user):
+    user_id = make_user()
+    long_text = "fever " * 200  # ~200 tokens each
+    _add_messages(user_id, [f"{i} {long_text}" for i in range(100)])
+
+    history, _ = run_async(_context, user_id)
+    assert 0 < len(history) < 100
+    assert history[-1]["content"].startswith("99 ")
+    assert sum(history_message_tokens(m["role"], m["content"]) for m in history) >= settings.CONTEXT_TOKEN_BUDGET
+
+
+def test_raw_window_is_sized_in_tokens(make_user):
+    user_id = make_user()
+    short_ids = _add_messages(user_id, [f"ok {i}" for i in range(30)])
+    db = SessionLocal()
+    try:
+        assert _raw_window_start(db, user_id) == short_ids[0]  # Everything fits
+        long_ids = _add_messages(user_id, ["fever " * 300 for _ in range(20)])
+        window_start = _raw_window_start(db, user_id)
+        assert window_start in long_ids and window_start != long_ids[0]
+    finally:
+        db.close()
+
+
+def test_summarized_messages_are_not_repeated(make_user):
+    user_id = make_user()
+    ids = _add_messages(user_id, [f"message {i}" for i in range(4)])
+    _set_summary(user_id, last_message_id=ids[1])
+
+    history, _ = run_async(_context, user_id)
+    assert [m["content"] for m in history] == ["message 2", "message 3"]
@@ -0,0 +1,54 @@
+"""
+Local drug-label lookups: aliases, strengths, generic prefixes and uncached misses
+"""
+import pytest
+
+import drug_labels
+from config import settings
+from drug_labels import DrugLabelStore, drug_name_candidates, lookup_local_drug_label
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    path = str(tmp_path / "drug_labels.db")
+    monkeypatch.setattr(settings, "DRUG_LABEL_DB_PATH", path)
+    monkeypatch.setattr(drug_labels, "_drug_label_store", None)
+    builder = DrugLabelStore(path)
+    builder.create()
+    builder.add_label(["Tylenol", "ACETAMINOPHEN"], "Liver warning", "Pain and fever")
+    builder.add_label(["METFORMIN HYDROCHLORIDE"], "Lactic acidosis", "Type 2 diabetes")
+    builder.commit()
+    yield builder
+    drug_labels._cached_lookup.cache_clear()
+
+
+def test_candidates_strip_strength_and_map_aliases():
+    assert drug_name_candidates("Dolo 650 Tablet") == ["dolo 650 tablet", "dolo", "acetaminophen"]
+    assert drug_name_candidates("Paracetamol") == ["paracetamol", "acetaminophen"]
+
+
+@pytest.mark.parametrize("name", ["Crocin", "paracetamol", "Dolo 650", "tylenol"])
+def test_brand_and_international_names_find_the_us_label(store, name):
+    assert lookup_local_drug_label(name) == ("Liver warning", "Pain and fever")
+
+
+def test_generic_name_matches_salt_form(store):
+    assert lookup_local_drug_label("Metformin") == ("Lactic acidosis", "Type 2 diabetes")
+    assert lookup_local_drug_label("metform") is None
+
+
+def test_misses_are_not_cached(store):
+    assert lookup_local_drug_label("Brufen") is None
+
+    store.add_label(["IBUPROFEN"], "Stomach bleeding", "Pain")
+    store.commit()
+
+    assert lookup_local_drug_label("Brufen") == ("Stomach bleeding", "Pain")
+
+
+def test_rebuild_clears_cached_hits(store):
+    assert lookup_local_drug_label("tylenol") is not None
+
+    store.create()
+
+    assert lookup_local_drug_label("tylenol") is None
@@ -0,0 +1,168 @@
+"""
+LLM routing: failover on errors and timeouts, unhealthy providers last, hedged requests,
+and the latency/error EWMAs behind those decisions
+"""
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import Runnable
+
+import llm_router
+from config import settings
+from llm_router import LLMRouter, ProviderStats, get_provider_stats
+
+QUESTION = [HumanMessage(content="What helps with a sore throat?")]
+
+
+class _StubModel(Runnable):
+    """Provider stand-in with a fixed reply, failure and delay"""
+
+    def __init__(self, name: str, delay: float = 0.0, error: Exception = None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.finished = 0
+
+    def _reply(self) -> AIMessage:
+        if self.error:
+            raise self.error
+        self.finished += 1
+        return AIMessage(content=f"answer from {self.name}")
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self._reply()
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self._reply()
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(llm_router, "_provider_stats", {})
+
+
+def _router(*models, hedge=False) -> LLMRouter:
+    return LLMRouter(providers=[(model.name, model) for model in models], hedge=hedge)
+
+
+def test_sync_call_fails_over_on_error():
+    primary = _StubModel("primary", error=RuntimeError("quota exceeded"))
+    secondary = _StubModel("secondary")
+
+    assert _router(primary, secondary).invoke(QUESTION).content == "answer from secondary"
+    assert (primary.calls, secondary.calls) == (1, 1)
+    assert get_provider_stats("primary").error_rate_ewma == pytest.approx(0.2)
+    assert get_provider_stats("secondary").error_rate_ewma == 0.0
+
+
+def test_async_call_fails_over_on_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_REQUEST_TIMEOUT_SECONDS", 0.05)
+    primary = _StubModel("primary", delay=1.0)
+    secondary = _StubModel("secondary")
+
+    result = asyncio.run(_router(primary, secondary).ainvoke(QUESTION))
+
+    assert result.content == "answer from secondary"
+    assert primary.finished == 0
+    assert get_provider_stats("primary").error_rate_ewma == pytest.approx(0.2)
+
+
+def test_every_provider_failing_raises_the_last_error():
+    router = _router(_StubModel("primary", error=RuntimeError("first")), _StubModel("secondary", error=RuntimeError("second")))
+    with pytest.raises(RuntimeError, match="second"):
+        router.invoke(QUESTION)
+
+
+def test_unhealthy_provider_is_tried_last(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_UNHEALTHY_ERROR_RATE", 0.5)
+    primary, secondary = _StubModel("primary"), _StubModel("secondary")
+    for _ in range(4):
+        get_provider_stats("primary").record(1.0, ok=False)
+    assert get_provider_stats("primary").error_rate_ewma > 0.5
+
+    router = _router(primary, secondary)
+
+    assert [name for name, _ in router._ordered()] == ["secondary", "primary"]
+    assert router.invoke(QUESTION).content == "answer from secondary"
+    assert primary.calls == 0
+
+
+def test_hedged_request_won_by_second_provider(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY_SECONDS", 0.05)
+    primary = _StubModel("primary", delay=1.0)
+    secondary = _StubModel("secondary", delay=0.01)
+
+    started = time.perf_counter()
+    result = asyncio.run(_router(primary, secondary, hedge=True).ainvoke(QUESTION))
+
+    assert result.content == "answer from secondary"
+    assert time.perf_counter() - started < 0.5
+    assert (primary.calls, primary.finished) == (1, 0)
+    # Losing the race is not an error
+    assert get_provider_stats("primary").error_rate_ewma == 0.0
+
+
+def test_hedged_request_won_by_first_provider(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY_SECONDS", 0.05)
+    primary = _StubModel("primary", delay=0.15)
+    secondary = _StubModel("secondary", delay=1.0)
+
+    result = asyncio.run(_router(primary, secondary, hedge=True).ainvoke(QUESTION))
+
+    assert result.content == "answer from primary"
+    assert (secondary.calls, secondary.finished) == (1, 0)
+
+
+def test_no_hedge_when_first_provider_answers_in_time(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY_SECONDS", 0.5)
+    primary, secondary = _StubModel("primary", delay=0.01), _StubModel("secondary")
+
+    assert asyncio.run(_router(primary, secondary, hedge=True).ainvoke(QUESTION)).content == "answer from primary"
+    assert secondary.calls == 0
+
+
+def test_hedge_delay_uses_fixed_value_until_enough_samples(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY_SECONDS", 6.0)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "LLM_HEDGE_PERCENTILE", 0.95)
+    router = _router(_StubModel("primary"), _StubModel("secondary"))
+    stats = get_provider_stats("primary")
+
+    for seconds in range(1, 20):
+        stats.record(float(seconds), ok=True)
+    assert router._hedge_delay("primary") == 6.0
+
+    stats.record(20.0, ok=True)
+    # 20 samples of 1..20 s: index int(0.95 * 20) = 19 -> 20 s
+    assert router._hedge_delay("primary") == 20.0
+
+
+def test_hedge_delay_never_below_minimum(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_SECONDS", 1.0)
+    router = _router(_StubModel("primary"), _StubModel("secondary"))
+    for _ in range(20):
+        get_provider_stats("primary").record(0.2, ok=True)
+    assert router._hedge_delay("primary") == 1.0
+
+
+def test_ewma_updates():
+    stats = ProviderStats("ewma-test", alpha=0.5)
+
+    stats.record(2.0, ok=True)
+    assert (stats.latency_ewma, stats.error_rate_ewma) == (2.0, 0.0)
+
+    stats.record(4.0, ok=True)
+    assert stats.latency_ewma == 3.0
+
+    # Failures move the error rate but leave latency alone
+    stats.record(30.0, ok=False)
+    assert (stats.latency_ewma, stats.error_rate_ewma) == (3.0, 0.5)
+    stats.record(1.0, ok=True)
+    assert (stats.latency_ewma, stats.error_rate_ewma) == (2.0, 0.25)
@@ -0,0 +1,45 @@
+"""
+Offline Wikipedia search: unrelated articles are a miss, so the network fallback runs
+"""
+import pytest
+
+import medical_corpus
+from config import settings
+from medical_corpus import WikipediaIndex, search_local_wikipedia
+
+ARTICLES = {
+    "Malaria": "Malaria is a mosquito-borne infectious disease caused by Plasmodium parasites. "
+               "Symptoms include fever, tiredness, vomiting and headaches.",
+    "Asthma": "Asthma is a long-term inflammatory disease of the airways of the lungs. Symptoms include "
+              "episodes of wheezing, coughing, chest tightness and shortness of breath.",
+}
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "wiki.db")
+    index = WikipediaIndex(path)
+    index.create()
+    index.add_articles([(title, summary, summary) for title, summary in ARTICLES.items()])
+    monkeypatch.setattr(settings, "WIKI_INDEX_PATH", path)
+    monkeypatch.setattr(medical_corpus, "_wikipedia_index", None)
+    return path
+
+
+@pytest.mark.parametrize("query", ["dengue fever", "what is dengue", "what is the treatment for dengue"])
+def test_unrelated_queries_miss(index_path, query):
+    assert search_local_wikipedia(query) is None
+
+
+@pytest.mark.parametrize("query, title", [
+    ("malaria", "Malaria"),
+    ("what are the symptoms of malaria", "Malaria"),
+    ("asthma wheezing", "Asthma"),
+])
+def test_matching_queries_hit(index_path, query, title):
+    result = search_local_wikipedia(query)
+    assert result.startswith(f"Page: {title}\n")
+
+
+def test_stopword_only_query_misses(index_path):
+    assert search_local_wikipedia("what is it") is None
@@ -0,0 +1,83 @@
+"""
+Versioned migrations on a pre-migration database: order, the history index swap, and re-runs
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from migrations import LATEST_VERSION, MIGRATIONS, run_migrations, schema_version
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A database as it looked before versioned migrations: no is_admin, single-column user index"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(50) UNIQUE NOT NULL, "
+            "full_name VARCHAR(100), hashed_password VARCHAR(255) NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE messages (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), "
+            "role VARCHAR(20) NOT NULL, content TEXT NOT NULL, created_at DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_messages_user_id ON messages (user_id)"))
+        conn.execute(text("CREATE INDEX ix_messages_created_at ON messages (created_at)"))
+        conn.execute(text("INSERT INTO users (id, username, hashed_password) VALUES (1, 'asha', 'x')"))
+        conn.execute(
+            text("INSERT INTO messages (user_id, role, content, created_at) VALUES (1, :role, :content, '2024-01-01')"),
+            [{"role": "user", "content": "Fever for two days"},
+             {"role": "assistant", "content": "Drink plenty of fluids and rest. " * 200}]
+        )
+    yield engine
+    engine.dispose()
+
+
+def _indexes(engine):
+    return {index["name"] for index in inspect(engine).get_indexes("messages")}
+
+
+def test_applies_every_migration_in_order(legacy_engine):
+    applied = run_migrations(legacy_engine)
+
+    assert [m.version for m in applied] == [m.version for m in MIGRATIONS] == sorted(m.version for m in MIGRATIONS)
+    with legacy_engine.connect() as conn:
+        recorded = conn.execute(select(schema_version.c.version).order_by(schema_version.c.version)).scalars().all()
+    assert recorded == list(range(1, LATEST_VERSION + 1))
+    assert "is_admin" in {c["name"] for c in inspect(legacy_engine).get_columns("users")}
+
+
+def test_swaps_single_column_index_for_composite(legacy_engine):
+    run_migrations(legacy_engine)
+
+    indexes = _indexes(legacy_engine)
+    assert "ix_messages_user_created_id" in indexes
+    assert "ix_messages_user_id" not in indexes
+    with legacy_engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM messages WHERE user_id = 1 ORDER BY created_at DESC, id DESC LIMIT 20"
+        )))
+    assert "ix_messages_user_created_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_startup_leaves_existing_rows_for_the_offline_backfill(legacy_engine):
+    run_migrations(legacy_engine)
+
+    assert "content_dictionaries" in inspect(legacy_engine).get_table_names()
+    with legacy_engine.connect() as conn:
+        kinds = conn.execute(text("SELECT DISTINCT typeof(content) FROM messages")).scalars().all()
+    assert kinds == ["text"]
+
+
+def test_rerun_and_partial_state_apply_only_missing_steps(legacy_engine):
+    run_migrations(legacy_engine)
+    assert run_migrations(legacy_engine) == []
+
+    with legacy_engine.begin() as conn:
+        conn.execute(schema_version.delete().where(schema_version.c.version > 1))
+        conn.execute(text("CREATE INDEX ix_messages_user_id ON messages (user_id)"))
+
+    applied = run_migrations(legacy_engine)
+
+    assert [m.version for m in applied] == [2, 3]
+    assert "ix_messages_user_id" not in _indexes(legacy_engine)
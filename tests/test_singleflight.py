@@ -0,0 +1,124 @@
+"""
+Single-flight coalescing: followers share the leader's result, and its failure
+"""
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _run_threads(flight, func, count):
+    """Start `count` callers once the leader is inside func; returns [(result, error)]"""
+    outcomes = [None] * count
+
+    def call(i):
+        try:
+            outcomes[i] = (flight.do("key", func), None)
+        except Exception as e:
+            outcomes[i] = (None, e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "answer"
+
+    threading.Timer(0.2, release.set).start()
+    outcomes = _run_threads(flight, compute, 5)
+
+    assert calls == [1]
+    assert outcomes == [("answer", None)] * 5
+
+
+def test_threads_see_leader_failure_and_next_call_retries():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        release.wait(timeout=5)
+        raise ValueError("upstream down")
+
+    threading.Timer(0.2, release.set).start()
+    outcomes = _run_threads(flight, failing, 4)
+
+    assert calls == [1]
+    assert all(result is None and isinstance(error, ValueError) for result, error in outcomes)
+    # The failure is not remembered: the next caller leads a fresh call
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+async def _gather_followers(flight, leader_func, followers=3):
+    leader = asyncio.create_task(flight.ado("key", leader_func))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(flight.ado("key", leader_func)) for _ in range(followers)]
+    return leader, tasks
+
+
+def test_async_followers_see_leader_exception():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            raise ValueError("upstream down")
+
+        leader, followers = await _gather_followers(flight, failing)
+        results = await asyncio.gather(leader, *followers, return_exceptions=True)
+        assert calls == [1]
+        assert all(isinstance(result, ValueError) for result in results)
+        assert await flight.ado("key", lambda: asyncio.sleep(0, result="recovered")) == "recovered"
+
+    asyncio.run(scenario())
+
+
+def test_async_leader_cancelled_fails_followers():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        leader, followers = await _gather_followers(flight, slow)
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.gather(*followers, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
+
+
+def test_async_follower_cancelled_keeps_leader_running():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        leader, followers = await _gather_followers(flight, compute, followers=2)
+        await asyncio.sleep(0)
+        followers[0].cancel()
+        assert await leader == "answer"
+        assert await followers[1] == "answer"
+
+    asyncio.run(scenario())
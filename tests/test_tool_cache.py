@@ -0,0 +1,115 @@
+"""
+Tool result cache: TTL expiry, stale-while-revalidate, LRU eviction, and the async disk tier
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+import tool_cache
+from tool_cache import ToolCache, cached_tool_result
+
+
+class _Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(tool_cache.time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    instance = ToolCache(str(tmp_path / "tool_cache.db"), max_entries=2)
+    monkeypatch.setattr(tool_cache, "_tool_cache", instance)
+    return instance
+
+
+def test_entry_goes_fresh_stale_then_missing(cache, clock, tmp_path):
+    cache.set("wiki", "malaria", "Malaria is...", ttl=10, stale_ttl=20)
+    assert cache.get("wiki", "malaria") == ("Malaria is...", "fresh")
+
+    clock.now += 15
+    assert cache.get("wiki", "malaria") == ("Malaria is...", "stale")
+
+    clock.now += 20
+    assert cache.get("wiki", "malaria") == (None, "miss")
+    # Another worker reading the same SQLite file sees the same expiry
+    assert ToolCache(cache.path).get("wiki", "malaria") == (None, "miss")
+
+
+def test_memory_tier_evicts_least_recently_used(cache):
+    for key in ("a", "b"):
+        cache.set("wiki", key, key.upper(), ttl=60)
+    cache.get("wiki", "a")
+    cache.set("wiki", "c", "C", ttl=60)
+
+    assert list(cache._memory) == [("wiki", "a"), ("wiki", "c")]
+    # Evicted from memory only; SQLite still has it and promotes it back
+    assert cache.get("wiki", "b") == ("B", "fresh")
+    assert ("wiki", "b") in cache._memory
+
+
+def test_stale_value_served_while_refresh_runs(cache, clock):
+    release = threading.Event()
+    calls = []
+
+    @cached_tool_result("swr", ttl=10, stale_ttl=100)
+    def lookup(query):
+        calls.append(query)
+        if len(calls) > 1:
+            release.wait(timeout=5)
+        return f"answer {len(calls)}"
+
+    assert lookup("dengue") == "answer 1"
+    clock.now += 20
+
+    started = time.monotonic()
+    assert lookup("dengue") == "answer 1"
+    assert time.monotonic() - started < 1
+    # A second stale read does not start another refresh
+    assert lookup("dengue") == "answer 1"
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.get("swr", "dengue")[0] != "answer 2" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert lookup("dengue") == "answer 2"
+    assert len(calls) == 2
+
+
+def test_async_path_reads_and_writes_sqlite_off_the_event_loop(cache, monkeypatch):
+    disk_threads = []
+    original_get, original_set = ToolCache._disk_get, ToolCache._disk_set
+
+    def recording_get(self, entry_key):
+        disk_threads.append(threading.current_thread())
+        return original_get(self, entry_key)
+
+    def recording_set(self, entry_key, entry):
+        disk_threads.append(threading.current_thread())
+        return original_set(self, entry_key, entry)
+
+    monkeypatch.setattr(ToolCache, "_disk_get", recording_get)
+    monkeypatch.setattr(ToolCache, "_disk_set", recording_set)
+
+    @cached_tool_result("async_lookup", ttl=60)
+    async def lookup(query):
+        return f"result for {query}"
+
+    async def scenario():
+        assert await lookup("asthma") == "result for asthma"
+        cache._memory.clear()
+        assert await lookup("asthma") == "result for asthma"
+
+    asyncio.run(scenario())
+    assert len(disk_threads) == 3  # miss read, write, read after the memory tier was cleared
+    assert threading.main_thread() not in disk_threads
@@ -0,0 +1,126 @@
+"""
+Tool calls stay within their deadlines: the node reports a timeout and the
+network clients underneath are bounded so worker threads come back
+"""
+import time
+import uuid
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+import ai_agent
+
+
+class _RecordingClient:
+    """Stands in for the shared httpx client and records each request's timeout"""
+
+    def __init__(self):
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        time.sleep(0.05)
+        if params.get("list") == "search":
+            return _Response({"query": {"search": [{"title": "Malaria"}]}})
+        return _Response({"query": {"pages": [{"title": "Malaria", "extract": "A mosquito-borne disease."}]}})
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@tool
+def slow_lookup(query: str) -> str:
+    """Test tool that outlives its deadline"""
+    time.sleep(0.5)
+    return "late"
+
+
+def _state(*tool_calls):
+    return {"messages": [AIMessage(content="", tool_calls=list(tool_calls))]}
+
+
+def test_node_reports_timed_out_call(monkeypatch):
+    monkeypatch.setitem(ai_agent.TOOL_TIMEOUTS, "slow_lookup", 0.1)
+    node = ai_agent.ParallelToolNode([slow_lookup])
+
+    started = time.monotonic()
+    result = node.invoke(_state({"name": "slow_lookup", "args": {"query": "x"}, "id": "call_1"}))
+
+    assert time.monotonic() - started < 0.4
+    message = result["messages"][0]
+    assert message.status == "error"
+    assert '"status": "timed_out"' in message.content
+
+
+def test_wikipedia_requests_share_the_tool_deadline(monkeypatch):
+    client = _RecordingClient()
+    monkeypatch.setattr(ai_agent, "get_http_client", lambda: client)
+
+    result = ai_agent._fetch_wikipedia(f"malaria {uuid.uuid4().hex}")
+
+    assert "A mosquito-borne disease." in result
+    deadline = ai_agent.TOOL_TIMEOUTS["search_wikipedia_medical"]
+    first, second = client.timeouts
+    assert first <= deadline
+    assert second < first
+
+
+def test_request_timeout_never_reaches_zero():
+    assert ai_agent._request_timeout(time.monotonic() - 5) == 0.1
+
+
+class _SlowOpenFDAClient:
+    """OpenFDA stand-in that uses up the deadline and finds no label"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        return httpx.Response(404, request=httpx.Request("GET", url))
+
+
+def test_drug_lookup_skips_web_fallback_once_deadline_passed(monkeypatch):
+    monkeypatch.setitem(ai_agent.TOOL_TIMEOUTS, "check_drug_interactions", 0.5)
+    client = _SlowOpenFDAClient(delay=0.6)
+    monkeypatch.setattr(ai_agent, "get_http_client", lambda: client)
+    monkeypatch.setattr(ai_agent, "_ddgs", lambda timeout: pytest.fail("web fallback ran after the deadline"))
+
+    with pytest.raises(TimeoutError):
+        ai_agent._fetch_drug_info(f"unknowndrug{uuid.uuid4().hex[:6]}")
+    assert client.timeouts[0] <= 0.5
+
+
+def test_drug_lookup_fallback_gets_the_remaining_budget(monkeypatch):
+    client = _SlowOpenFDAClient(delay=0)
+    searches = []
+
+    class _DDGS:
+        def text(self, query, backend, max_results):
+            return [{"title": "Label", "body": "Side effects..."}]
+
+    def ddgs(timeout):
+        searches.append(timeout)
+        return _DDGS()
+
+    monkeypatch.setattr(ai_agent, "get_http_client", lambda: client)
+    monkeypatch.setattr(ai_agent, "_ddgs", ddgs)
+
+    result = ai_agent._fetch_drug_info(f"unknowndrug{uuid.uuid4().hex[:6]}")
+
+    assert "Side effects..." in result
+    deadline = ai_agent.TOOL_TIMEOUTS["check_drug_interactions"]
+    assert client.timeouts[0] <= deadline
+    assert searches and 1 <= searches[0] <= deadline
@@ -0,0 +1,94 @@
+"""
+Write-behind message batching: durability modes, read-your-writes, and flush on close
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from conftest import run_async
+from database import AsyncSessionLocal, Message
+from write_behind import MessageWriteBehind
+
+
+def _exchange(question: str):
+    return [{"role": "user", "content": question}, {"role": "assistant", "content": f"About {question}..."}]
+
+
+async def _count(user_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).where(Message.user_id == user_id))).scalar()
+
+
+def _writer(durability: str, flush_interval: float = 0.01) -> MessageWriteBehind:
+    return MessageWriteBehind(flush_interval=flush_interval, max_batch=500, max_pending=10000, durability=durability)
+
+
+def test_ack_returns_after_commit_and_batches_requests(make_user, monkeypatch):
+    users = [make_user() for _ in range(3)]
+    batches = []
+    original_insert = MessageWriteBehind._insert
+
+    async def recording_insert(rows):
+        batches.append(len(rows))
+        await original_insert(rows)
+
+    monkeypatch.setattr(MessageWriteBehind, "_insert", staticmethod(recording_insert))
+
+    async def scenario():
+        writer = _writer("ack", flush_interval=0.05)
+        await asyncio.gather(*(writer.write(user_id, _exchange("fever")) for user_id in users))
+        assert [await _count(user_id) for user_id in users] == [2, 2, 2]
+        await writer.close()
+
+    run_async(scenario)
+    assert batches == [6]
+
+
+def test_async_mode_is_visible_after_sync_user(make_user):
+    user_id = make_user()
+
+    async def scenario():
+        writer = _writer("async", flush_interval=10)
+        await writer.write(user_id, _exchange("cough"))
+        assert await _count(user_id) == 0
+
+        await writer.sync_user(user_id)
+        assert await _count(user_id) == 2
+        await writer.close()
+
+    run_async(scenario)
+
+
+def test_close_flushes_queued_messages(make_user):
+    user_ids = [make_user(), make_user()]
+
+    async def scenario():
+        writer = _writer("async", flush_interval=10)
+        for user_id in user_ids:
+            await writer.write(user_id, _exchange("headache"))
+        await writer.close()
+        assert [await _count(user_id) for user_id in user_ids] == [2, 2]
+        with pytest.raises(RuntimeError):
+            await writer.write(user_ids[0], _exchange("again"))
+
+    run_async(scenario)
+
+
+def test_failed_request_does_not_sink_its_batch(make_user):
+    good, bad = make_user(), make_user()
+
+    async def scenario():
+        writer = _writer("ack", flush_interval=0.05)
+        results = await asyncio.gather(
+            writer.write(good, _exchange("rash")),
+            writer.write(bad, [{"role": None, "content": "missing role"}]),
+            return_exceptions=True,
+        )
+        assert results[0] is None
+        assert isinstance(results[1], Exception)
+        assert await _count(good) == 2
+        assert await _count(bad) == 0
+        await writer.close()
+
+    run_async(scenario)
@@ -0,0 +1,293 @@
+"""
+Two-tier TTL cache for external tool results
+Bounded in-process LRU in front of a SQLite table shared by all workers on the host
+"""
+import asyncio
+import functools
+import inspect
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from config import settings
+from metrics import metrics
+from singleflight import get_singleflight
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a free-text tool argument into a cache key"""
+    text = re.sub(r"\s+", " ", str(text).lower())
+    return text.strip(" \t\n.,;:!?'\"")
+
+
+class ToolCache:
+    """
+    Cache of tool results keyed by (tool, normalized query)
+
+    Each entry has a fresh period (ttl) followed by a stale period (stale_ttl)
+    during which it is still served while a background refresh runs.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[str, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._refreshing = set()
+        self._refresh_tasks = set()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="swasthai-cache-refresh")
+        self._init_db()
+
+    # ---------- SQLite tier ----------
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections are not shared across threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tool_cache (
+                tool TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                stale_until REAL NOT NULL,
+                PRIMARY KEY (tool, key)
+            )
+        """)
+        conn.execute("DELETE FROM tool_cache WHERE stale_until < ?", (time.time(),))
+        conn.commit()
+
+    def _disk_get(self, entry_key: Tuple[str, str]) -> Optional[Tuple[str, float, float]]:
+        """Read one entry from SQLite and promote it to the memory tier"""
+        row = self._connection().execute(
+            "SELECT value, expires_at, stale_until FROM tool_cache WHERE tool = ? AND key = ?", entry_key
+        ).fetchone()
+        if row is None:
+            return None
+        entry = tuple(row)
+        self._memory_set(entry_key, entry)
+        return entry
+
+    def _disk_set(self, entry_key: Tuple[str, str], entry: Tuple[str, float, float]):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO tool_cache (tool, key, value, expires_at, stale_until) VALUES (?, ?, ?, ?, ?)",
+            (*entry_key, *entry)
+        )
+        conn.commit()
+
+    # ---------- Memory tier ----------
+
+    def _memory_get(self, entry_key: Tuple[str, str]) -> Optional[Tuple[str, float, float]]:
+        with self._lock:
+            entry = self._memory.get(entry_key)
+            if entry is not None:
+                self._memory.move_to_end(entry_key)
+            return entry
+
+    def _memory_set(self, entry_key: Tuple[str, str], entry: Tuple[str, float, float]):
+        with self._lock:
+            self._memory[entry_key] = entry
+            self._memory.move_to_end(entry_key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ---------- Public API ----------
+
+    def get(self, tool: str, key: str) -> Tuple[Optional[str], str]:
+        """
+        Look up a cached result
+
+        Returns (value, state) where state is "fresh", "stale" or "miss".
+        """
+        entry = self._memory_get((tool, key))
+        if entry is not None:
+            return self._result(tool, entry, "memory")
+        return self._result(tool, self._disk_get((tool, key)), "sqlite")
+
+    async def aget(self, tool: str, key: str) -> Tuple[Optional[str], str]:
+        """
+        get() for the event loop
+
+        SQLite reads can wait on the busy timeout, so that tier runs in a worker thread.
+        """
+        entry = self._memory_get((tool, key))
+        if entry is not None:
+            return self._result(tool, entry, "memory")
+        return self._result(tool, await asyncio.to_thread(self._disk_get, (tool, key)), "sqlite")
+
+    def _result(self, tool: str, entry: Optional[Tuple[str, float, float]], tier: str) -> Tuple[Optional[str], str]:
+        now = time.time()
+        if entry is None or entry[2] < now:
+            metrics.incr(f"tool_cache.{tool}.miss")
+            return None, "miss"
+
+        state = "fresh" if entry[1] >= now else "stale"
+        metrics.incr(f"tool_cache.{tool}.hit_{tier}")
+        if state == "stale":
+            metrics.incr(f"tool_cache.{tool}.stale_served")
+        return entry[0], state
+
+    def set(self, tool: str, key: str, value: str, ttl: float, stale_ttl: float = 0):
+        """Store a result in both tiers"""
+        now = time.time()
+        entry = (value, now + ttl, now + ttl + stale_ttl)
+        self._memory_set((tool, key), entry)
+        self._disk_set((tool, key), entry)
+
+    async def aset(self, tool: str, key: str, value: str, ttl: float, stale_ttl: float = 0):
+        """set() for the event loop; the SQLite write and commit run in a worker thread"""
+        now = time.time()
+        entry = (value, now + ttl, now + ttl + stale_ttl)
+        self._memory_set((tool, key), entry)
+        await asyncio.to_thread(self._disk_set, (tool, key), entry)
+
+    def clear(self, tool: Optional[str] = None) -> int:
+        """Drop cached results for one tool, or everything; returns rows removed"""
+        with self._lock:
+            for entry_key in [k for k in self._memory if tool is None or k[0] == tool]:
+                del self._memory[entry_key]
+        conn = self._connection()
+        if tool is None:
+            cursor = conn.execute("DELETE FROM tool_cache")
+        else:
+            cursor = conn.execute("DELETE FROM tool_cache WHERE tool = ?", (tool,))
+        conn.commit()
+        return cursor.rowcount
+
+    def refresh_in_background(self, tool: str, key: str, compute: Callable[[], str], ttl: float, stale_ttl: float):
+        """Recompute a stale entry off the request path (at most one refresh per key)"""
+        entry_key = (tool, key)
+        with self._lock:
+            if entry_key in self._refreshing:
+                return
+            self._refreshing.add(entry_key)
+
+        def refresh():
+            try:
+                self.set(tool, key, compute(), ttl, stale_ttl)
+                metrics.incr(f"tool_cache.{tool}.refreshed")
+            except Exception as e:
+                print(f"Tool cache refresh failed for {tool}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(entry_key)
+
+        self._refresh_executor.submit(refresh)
+
+    def refresh_in_background_async(self, tool: str, key: str, compute: Callable[[], Awaitable[str]], ttl: float, stale_ttl: float):
+        """Async counterpart of refresh_in_background, run as a task on the current loop"""
+        entry_key = (tool, key)
+        with self._lock:
+            if entry_key in self._refreshing:
+                return
+            self._refreshing.add(entry_key)
+
+        async def refresh():
+            try:
+                await self.aset(tool, key, await compute(), ttl, stale_ttl)
+                metrics.incr(f"tool_cache.{tool}.refreshed")
+            except Exception as e:
+                print(f"Tool cache refresh failed for {tool}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(entry_key)
+
+        # Keep a reference so the task isn't garbage collected before it finishes
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters plus current tier sizes"""
+        counters = metrics.snapshot()["counters"]
+        with self._lock:
+            memory_entries = len(self._memory)
+        sqlite_entries = self._connection().execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0]
+        return {
+            "memory_entries": memory_entries,
+            "sqlite_entries": sqlite_entries,
+            **{name: value for name, value in counters.items() if name.startswith("tool_cache.")},
+        }
+
+
+# Global tool cache instance
+_tool_cache = None
+
+
+def get_tool_cache() -> ToolCache:
+    """Get or create the global tool cache"""
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = ToolCache(settings.TOOL_CACHE_PATH, settings.TOOL_CACHE_MAX_ENTRIES)
+    return _tool_cache
+
+
+def cached_tool_result(tool: str, ttl: float, stale_ttl: float = 0):
+    """
+    Cache the string result of a single-argument lookup function (sync or async)
+
+    The wrapped function should raise on failure so errors are never cached.
+    Sync and async lookups for the same tool share one cache namespace.
+    Concurrent misses for the same normalized query share one call.
+    """
+    flight = get_singleflight(f"tool.{tool}")
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            async def compute_async(query: str, key: str) -> str:
+                value = await func(query)
+                if settings.TOOL_CACHE_ENABLED:
+                    await get_tool_cache().aset(tool, key, value, ttl, stale_ttl)
+                return value
+
+            @functools.wraps(func)
+            async def async_wrapper(query: str) -> str:
+                key = normalize_query(query)
+                if settings.TOOL_CACHE_ENABLED:
+                    cache = get_tool_cache()
+                    value, state = await cache.aget(tool, key)
+                    if state == "stale":
+                        cache.refresh_in_background_async(tool, key, lambda: func(query), ttl, stale_ttl)
+                    if value is not None:
+                        return value
+
+                return await flight.ado(key, lambda: compute_async(query, key))
+
+            return async_wrapper
+
+        def compute(query: str, key: str) -> str:
+            value = func(query)
+            if settings.TOOL_CACHE_ENABLED:
+                get_tool_cache().set(tool, key, value, ttl, stale_ttl)
+            return value
+
+        @functools.wraps(func)
+        def wrapper(query: str) -> str:
+            key = normalize_query(query)
+            if settings.TOOL_CACHE_ENABLED:
+                cache = get_tool_cache()
+                value, state = cache.get(tool, key)
+                if state == "stale":
+                    cache.refresh_in_background(tool, key, lambda: func(query), ttl, stale_ttl)
+                if value is not None:
+                    return value
+
+            return flight.do(key, lambda: compute(query, key))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,58 @@
+"""
+Deterministic emergency triage for SwasthAI
+Red-flag matching shared by the get_emergency_guidance tool and the pre-LLM fast path in /api/chat
+"""
+import re
+from typing import Optional
+
+EMERGENCY_NUMBERS = "Emergency Numbers India:\n- Ambulance: 102 or 108\n- Emergency: 112"
+
+EMERGENCY_GUIDANCE = {
+    'chest pain': '🚨 EMERGENCY: Call ambulance immediately (102/108). This could be a heart attack.',
+    'breathing': '🚨 EMERGENCY: Seek immediate medical help. Difficulty breathing requires urgent care.',
+    'severe bleeding': '🚨 EMERGENCY: Apply pressure to wound and call for emergency help immediately.',
+    'stroke': '🚨 EMERGENCY: Call 102/108 immediately. Remember FAST: Face drooping, Arm weakness, Speech difficulty, Time to call.',
+    'snake bite': '🚨 EMERGENCY: Keep calm, immobilize affected area, go to nearest hospital immediately.',
+    'poisoning': '🚨 EMERGENCY: Call poison control or go to emergency room immediately.',
+    'severe burn': '🚨 EMERGENCY: Cool with water, cover with clean cloth, seek immediate medical care.',
+    'unconscious': '🚨 EMERGENCY: Call 102/108, check breathing, put in recovery position if breathing.',
+}
+
+# Patterns for free-text user messages. Stricter than the tool's keywords so that
+# e.g. "breathing exercises for stress" does not raise an alarm; includes common Hinglish.
+RED_FLAG_PATTERNS = [
+    ('chest pain', r"chest (pain|tightness)|pain in (my |the )?chest|(seene|seena|chhati|chaati) (me|mein|mai)? ?(dard|pain)"),
+    ('breathing', r"(difficulty|trouble|problem|hard|struggling|unable|can'?t|cannot|not able) (to |in )?breath(e|ing)"
+                  r"|short(ness)? of breath|breathless|not breathing|saa?ns (nahi|lene me|lene mein|phool)"),
+    ('severe bleeding', r"(severe|heavy|heavily|lot of|lots of|uncontrolled) bleeding|bleeding (heavily|a lot|won'?t stop|not stopping)"
+                        r"|khoon (beh|nahi ruk|band nahi)"),
+    ('stroke', r"(having|had|has|have|signs of) (a )?stroke|face (is )?drooping|slurred speech|lakwa|laqwa"),
+    ('snake bite', r"snake ?bite|bitten by (a )?snake|sa+n?p ne kaat"),
+    ('poisoning', r"poison|zeher|zehar|jahar|swallowed (pesticide|bleach|kerosene|acid)|pesticide (pi|kha)"),
+    ('severe burn', r"(severe|bad|major|serious) burn|badly burn|jal gaya|jal gayi"),
+    ('unconscious', r"unconscious|not responding|unresponsive|passed out|behosh"),
+]
+
+_COMPILED_RED_FLAGS = [(key, re.compile(pattern, re.I)) for key, pattern in RED_FLAG_PATTERNS]
+
+
+def format_guidance(key: str) -> str:
+    """Guidance for a red flag plus India's emergency numbers"""
+    return f"{EMERGENCY_GUIDANCE[key]}\n\n{EMERGENCY_NUMBERS}"
+
+
+def match_emergency_keyword(symptom: str) -> Optional[str]:
+    """Guidance for a symptom description chosen by the model (simple keyword match)"""
+    symptom_lower = symptom.lower()
+    for keyword in EMERGENCY_GUIDANCE:
+        if keyword in symptom_lower:
+            return format_guidance(keyword)
+    return None
+
+
+def triage_message(message: str) -> Optional[str]:
+    """Guidance for a raw user message if it describes a red-flag emergency, else None"""
+    for key, pattern in _COMPILED_RED_FLAGS:
+        if pattern.search(message):
+            return format_guidance(key)
+    return None
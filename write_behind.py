@@ -0,0 +1,206 @@
+"""
+Write-behind batching of chat message inserts
+Concurrent requests hand their messages to one background writer, which commits
+them together every few milliseconds (or every N rows) instead of paying one
+commit - and on SQLite one write lock and fsync - per exchange.
+
+Durability (WRITE_BEHIND_DURABILITY):
+    "ack"   - the request waits until its batch is committed (group commit; nothing
+              acknowledged is lost, the win is fewer and larger transactions)
+    "async" - the request returns once queued; a crash can lose up to one flush
+              interval of messages
+Pending messages are flushed on shutdown, and before any read of that user's history.
+"""
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+from config import settings
+from database import async_engine, daily_counts, record_stats, Message
+from metrics import metrics
+
+
+class _PendingWrite:
+    """One request's messages; committed together or not at all"""
+
+    __slots__ = ("user_id", "rows", "future")
+
+    def __init__(self, user_id: int, rows: List[Dict], future: asyncio.Future):
+        self.user_id = user_id
+        self.rows = rows
+        self.future = future
+
+
+class MessageWriteBehind:
+    """Single background writer per event loop that commits queued messages in batches"""
+
+    def __init__(self, flush_interval: float, max_batch: int, max_pending: int, durability: str):
+        if durability not in ("ack", "async"):
+            raise ValueError(f"WRITE_BEHIND_DURABILITY must be 'ack' or 'async', got {durability!r}")
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.durability = durability
+        self._loop = asyncio.get_running_loop()
+        self._cond = asyncio.Condition()
+        self._queue: List[_PendingWrite] = []
+        self._queued_rows = 0
+        self._pending_users: Counter = Counter()
+        self._urgent = False
+        self._closed = False
+        self._task = self._loop.create_task(self._run())
+
+    # ---------- Request side ----------
+
+    async def write(self, user_id: int, rows: List[Dict]):
+        """
+        Queue one request's messages (dicts of Message columns)
+
+        Waits for the commit in "ack" mode; raises if that commit failed.
+        """
+        now = datetime.utcnow()
+        rows = [{"user_id": user_id, "created_at": now, **row} for row in rows]
+        pending = _PendingWrite(user_id, rows, self._loop.create_future())
+        # Nobody may await the future in "async" mode; don't warn about unread errors
+        pending.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        async with self._cond:
+            if self._closed:
+                raise RuntimeError("Message writer is closed")
+            if self._queued_rows >= self.max_pending:
+                metrics.incr("write_behind.backpressure")
+                self._urgent = True
+                self._cond.notify_all()
+                await self._cond.wait_for(lambda: self._queued_rows < self.max_pending or self._closed)
+            self._queue.append(pending)
+            self._queued_rows += len(rows)
+            self._pending_users[user_id] += 1
+            metrics.set_gauge("write_behind.queued_rows", self._queued_rows)
+            self._cond.notify_all()
+
+        if self.durability == "ack":
+            await asyncio.shield(pending.future)
+
+    async def sync_user(self, user_id: int):
+        """Wait until every message queued for this user is committed (read-your-writes)"""
+        async with self._cond:
+            if not self._pending_users.get(user_id):
+                return
+            last = next((p for p in reversed(self._queue) if p.user_id == user_id), None)
+            self._urgent = True
+            self._cond.notify_all()
+        metrics.incr("write_behind.read_flushes")
+        if last is not None:
+            await asyncio.wait([last.future])
+        else:
+            # Already taken by the writer; wait for that batch to land
+            async with self._cond:
+                await self._cond.wait_for(lambda: not self._pending_users.get(user_id))
+
+    async def close(self):
+        """Flush everything still queued and stop the writer"""
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        await self._task
+
+    # ---------- Writer side ----------
+
+    async def _run(self):
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return  # Closed and drained
+                if not (self._closed or self._urgent or self._queued_rows >= self.max_batch):
+                    # Let the batch fill for one interval (or until it is full)
+                    try:
+                        await asyncio.wait_for(self._cond.wait_for(
+                            lambda: self._closed or self._urgent or self._queued_rows >= self.max_batch
+                        ), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                batch, rows = [], 0
+                while self._queue and (not batch or rows + len(self._queue[0].rows) <= self.max_batch):
+                    pending = self._queue.pop(0)
+                    batch.append(pending)
+                    rows += len(pending.rows)
+                self._queued_rows -= rows
+                self._urgent = False
+                metrics.set_gauge("write_behind.queued_rows", self._queued_rows)
+
+            await self._commit(batch)
+
+            async with self._cond:
+                for pending in batch:
+                    self._pending_users[pending.user_id] -= 1
+                    if self._pending_users[pending.user_id] <= 0:
+                        del self._pending_users[pending.user_id]
+                self._cond.notify_all()
+
+    async def _commit(self, batch: List[_PendingWrite]):
+        started = time.perf_counter()
+        try:
+            await self._insert([row for pending in batch for row in pending.rows])
+        except Exception as e:
+            if len(batch) == 1:
+                metrics.incr("write_behind.failed_writes")
+                print(f"Write-behind insert failed for user {batch[0].user_id}: {e}")
+                batch[0].future.set_exception(e)
+                return
+            # One bad request (e.g. its user was just deleted) must not sink the rest
+            metrics.incr("write_behind.batch_retries")
+            for pending in batch:
+                await self._commit([pending])
+            return
+
+        metrics.incr("write_behind.flushes")
+        metrics.observe("write_behind.batch_rows", sum(len(p.rows) for p in batch))
+        metrics.observe("write_behind.flush_seconds", time.perf_counter() - started)
+        for pending in batch:
+            pending.future.set_result(None)
+
+    @staticmethod
+    async def _insert(rows: List[Dict]):
+        # One executemany instead of the ORM's per-row INSERTs; core inserts skip the
+        # flush hook, so platform stats are recorded in the same transaction here
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(Message), rows)
+            await conn.run_sync(record_stats, {"messages": len(rows)}, daily_counts(rows, "messages"))
+
+
+# Global writer, bound to the event loop it was created on
+_writer: Optional[MessageWriteBehind] = None
+
+
+def get_message_writer() -> Optional[MessageWriteBehind]:
+    """The running writer, or None when write-behind is disabled"""
+    global _writer
+    if not settings.WRITE_BEHIND_ENABLED:
+        return None
+    if _writer is None or _writer._loop is not asyncio.get_running_loop():
+        _writer = MessageWriteBehind(
+            flush_interval=settings.WRITE_BEHIND_FLUSH_MS / 1000,
+            max_batch=settings.WRITE_BEHIND_MAX_BATCH,
+            max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+            durability=settings.WRITE_BEHIND_DURABILITY,
+        )
+    return _writer
+
+
+async def sync_user_messages(user_id: int):
+    """Make a user's queued messages visible to a following read (no-op when disabled)"""
+    if _writer is not None and _writer._loop is asyncio.get_running_loop():
+        await _writer.sync_user(user_id)
+
+
+async def close_message_writer():
+    """Flush and stop the writer (application shutdown)"""
+    global _writer
+    if _writer is not None:
+        writer, _writer = _writer, None
+        await writer.close()